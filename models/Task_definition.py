@@ -95,19 +95,22 @@ class Task:
         except Exception as e:
             raise ValueError(f"Error while concatenating DataFrames: {e}")
 
-    def save_to_csv(self) -> None:
+    def get_csv_path(self) -> str:
         """
-        現在のTaskオブジェクトの情報をタスクcsvファイルに上書き保存する。
+        タスクcsvファイルのパスを返す。
         保存先フォルダはタスクIDの冒頭6文字が数字ならProject/Active、そうでなければDaily/Active。
-        ヘッダは9行固定、10行目からサブタスク行。
         """
         if len(self.task_id) >= 6 and self.task_id[:6].isdigit():
             folder_path = os.path.join("data", "Project", "Active")
         else:
             folder_path = os.path.join("data", "Daily", "Active")
+        return os.path.join(folder_path, f"{self.task_id}.csv")
 
-        file_path = os.path.join(folder_path, f"{self.task_id}.csv")
-
+    def to_csv_text(self) -> str:
+        """
+        現在のTaskオブジェクトの情報をタスクcsvファイルの内容（文字列）に変換する。
+        ヘッダは9行固定、10行目からサブタスク行。
+        """
         # ヘッダー9行固定
         header_lines = [
             f"{self.name}\n",
@@ -132,8 +135,16 @@ class Task:
                     str(row["is_incomplete"])
                 ]
                 subtask_lines.append(",".join(row_data) + "\n")
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.writelines(header_lines + subtask_lines)
+        return "".join(header_lines + subtask_lines)
+
+    def save_to_csv(self) -> None:
+        """
+        現在のTaskオブジェクトの情報をタスクcsvファイルに上書き保存する。
+        保存先はget_csv_path()、内容はto_csv_text()に従う。
+        """
+        # テキストモードで書き込み、改行コードは従来どおりOSの既定に合わせる
+        with open(self.get_csv_path(), "w", encoding="utf-8") as f:
+            f.write(self.to_csv_text())
 
 
 # --- タスクcsvファイルを読み込む関数 ---
@@ -224,6 +235,9 @@ class WillDoEntry:
     daily_work_time: Optional[int] = field(default=None, metadata={"label": "残時間/日"})  # 1日あたり作業時間
     deadline_date_nearest: Optional[str] = field(default=None, metadata={"label": "直近〆切"})  # 〆切日
 
+    source_version: Optional[str] = field(default=None, metadata={"label": "算出元版"})  # 算出元タスクcsvの版
+    computed_date: Optional[str] = field(default=None, metadata={"label": "算出日"})  # 残時間/日の算出日
+
     @classmethod
     def attr_map(cls, attr: str) -> str:
         """WillDoEntryクラスの属性名を日本語ラベルに変換"""
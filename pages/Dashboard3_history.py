@@ -245,9 +245,14 @@ if __name__ == "__main__":
     with c3:
         include_dsc = st.checkbox("議論(DSC)を含める", value=True, key="include_dsc_history")
 
-    # データ読み込み
+    # データ読み込み（日 × オーダ × 区分 の日別集計キューブ。KPI・トレンドはこの集計行のみを使う）
     with st.spinner("データを読み込み中..."):
-        worklog_df = Output_G.load_worklogs_in_period(start_date, end_date)
+        worklog_df, load_errors = Output_G.load_daily_cube(start_date, end_date)
+    if load_errors:
+        with st.expander(f"読み込めなかった工数実績：{len(load_errors)} 日分", expanded=False):
+            st.dataframe(
+                pd.DataFrame({"日付": list(load_errors), "エラー内容": list(load_errors.values())}),
+                hide_index=True)
 
     # KPI
     render_kpi_cards(worklog_df, include_mtg, include_dsc)
@@ -6,7 +6,10 @@ import pandas as pd
 import streamlit as st
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import services.B_WillDo_create as Output_B
 import services.E_WorkLog_formatting as Output_E
+import services.G_dashboard_aggregation as Output_G
+import services.H_monthly_archive as Output_H
 from sidebar import task_view
 
 if __name__ == "__main__":
@@ -19,6 +22,7 @@ if __name__ == "__main__":
 
     with col_center:
         add_daytime_break = st.checkbox("昼休憩を考慮", value=True)
+        interactive_chart = st.checkbox("グラフを拡大・ホバー表示", value=False)
 
     with col_right:
         selected_date = st.date_input(
@@ -29,28 +33,29 @@ if __name__ == "__main__":
         )
 
     selected_str = selected_date.strftime("%y%m%d")
-    _worklog_main = os.path.join("data", "WorkLogs", f"工数実績{selected_str}.csv")
-    _worklog_old = os.path.join("data", "WorkLogs", "old", f"工数実績{selected_str}.csv")
-    WorkLog_filepath = _worklog_main if os.path.exists(_worklog_main) else _worklog_old
-
-    if os.path.exists(WorkLog_filepath):
-        # データ処理
-        df_break = Output_E.extract_rest_time_from_WorkLog(WorkLog_filepath)
-        df_sum_subtask_withMTG = Output_E.sum_df_each_subtask(WorkLog_filepath, include_MTG=True)
-        df_sum_subtask_withoutMTG = Output_E.sum_df_each_subtask(WorkLog_filepath, include_MTG=False)
-        df_sum_order_withMTG = Output_E.sum_df_each_order(df_sum_subtask_withMTG)
-        df_sum_order_withoutMTG = Output_E.sum_df_each_order(df_sum_subtask_withoutMTG)
-        summary_df = Output_E.calc_WorkLog_summary(WorkLog_filepath, df_sum_order_withMTG, add_daytime_break)
+    # 保存先フォルダ → oldフォルダ → 月次バンドルの順に探す
+    WorkLog_filepath = Output_H.resolve_day_path("WorkLog", selected_str)
+
+    if Output_H.exists(WorkLog_filepath):
+        # データ処理（csvは1回だけ読み込み、ファイルが変わらない限り集計結果を使い回す）
+        worklog_day = Output_E.load_WorkLog_day(WorkLog_filepath)
+        df_break = worklog_day.rest_df
+        df_sum_subtask_withMTG = worklog_day.sum_each_subtask(include_MTG=True)
+        df_sum_order_withMTG = worklog_day.sum_each_order(include_MTG=True)
+        df_sum_order_withoutMTG = worklog_day.sum_each_order(include_MTG=False)
+        summary_df = worklog_day.summary(add_daytime_break)
 
         # 表示
         # インデックスで降順ソートして表示
         st.data_editor(
-            pd.read_csv(WorkLog_filepath, parse_dates=['開始時刻', '終了時刻']).sort_index(ascending=False),
+            worklog_day.raw_df.sort_index(ascending=False),
             width="stretch")
 
-        fig = Output_E.make_WorkLog_barchart(WorkLog_filepath)
-        if fig is not None:
-            st.pyplot(fig)
+        # グラフは日ごと・表示方法ごとに1回だけ描画し、再実行時は描画済みのものを表示する
+        if interactive_chart:
+            st.plotly_chart(worklog_day.barchart_plotly, width="stretch")
+        else:
+            st.image(worklog_day.barchart_png(), width="stretch")
 
         st.markdown("#### ESS登録用出力")
         st.data_editor(summary_df, width="stretch", hide_index=True)
@@ -68,12 +73,13 @@ if __name__ == "__main__":
 
         st.markdown("#### Will-doリスト実績表示")
 
-        _willdo_main = os.path.join("data", "WillDo", f"WillDo{selected_str}.csv")
-        _willdo_old = os.path.join("data", "WillDo", "old", f"WillDo{selected_str}.csv")
-        willdo_file = _willdo_main if os.path.exists(_willdo_main) else _willdo_old
+        willdo_file = Output_H.resolve_day_path("WillDo", selected_str)
 
-        if os.path.exists(willdo_file):
-            df_past = pd.read_csv(willdo_file, encoding="utf-8-sig")
+        if Output_H.exists(willdo_file):
+            df_past = Output_H.read_csv(willdo_file, encoding="utf-8-sig")
+            # 未反映の状態変更イベントがあれば適用して表示
+            df_past = Output_B.apply_WillDo_status_events(
+                df_past, Output_B.read_WillDo_status_events(selected_str))
             st.data_editor(
                 df_past,
                 width="stretch",
@@ -85,3 +91,29 @@ if __name__ == "__main__":
 
     else:
         st.info("工数実績csv未作成です")
+
+    st.markdown("#### 期間まとめてESS・BJP登録用出力")
+    with st.expander("期間を指定して出力"):
+        period = st.date_input(
+            "期間を選択してください",
+            value=(selected_date.replace(day=1), selected_date),
+            key="registration_period_input",
+        )
+        if isinstance(period, tuple) and len(period) == 2:
+            period_start = datetime.datetime.combine(period[0], datetime.time.min)
+            period_end = datetime.datetime.combine(period[1], datetime.time.max)
+            tables = Output_G.build_registration_tables(period_start, period_end, add_daytime_break)
+            if tables["ESS"].empty:
+                st.info("指定期間の工数実績csvがありません")
+            else:
+                period_str = f"{period[0].strftime('%y%m%d')}-{period[1].strftime('%y%m%d')}"
+                for name, table in tables.items():
+                    st.markdown(f"##### {name}登録用")
+                    st.dataframe(table, width="stretch", hide_index=True)
+                    st.download_button(
+                        f"{name}登録用csvをダウンロード",
+                        table.to_csv(index=False).encode("utf-8-sig"),
+                        file_name=f"{name}登録用{period_str}.csv",
+                        mime="text/csv",
+                        key=f"registration_download_{name}",
+                    )
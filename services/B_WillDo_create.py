@@ -1,10 +1,11 @@
+import csv
 import os
 import re
 import shutil
 import sys
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import jpholiday
 import pandas as pd
@@ -12,6 +13,11 @@ import pandas as pd
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import models.Task_definition as Task_def
+import services.H_monthly_archive as Output_H
+
+# Will-doリストの状態変更イベントログの保存先と列定義
+STATUS_EVENT_DIR = os.path.join("data", "WillDo", "StatusEvents")
+STATUS_EVENT_COLUMNS = ["記録時刻", "タスクID", "サブID", "項目", "変更前", "変更後"]
 
 # -------------------------------------------------------------
 # wordの各項と対応する関数
@@ -24,6 +30,9 @@ def create_new_WillDo_with_DailyTasks():
     Returns:
         None
     """
+    # 未反映の状態変更イベントを各日のWill-doリストcsvに反映
+    fold_all_WillDo_status_events()
+
     # 全デイリータスクで既存の全サブタスクを完了状態にして保存
     complete_all_SubTasks_in_DailyTasks()
 
@@ -69,6 +78,8 @@ def add_WillDo_all_ProjectTasks() -> None:
         None
     """
     ESS_dt_str = Task_def.get_ESS_dt().strftime('%y%m%d')
+    # 追加する行と同じキーの行があってもイベントの対象行が変わらないよう、先に未反映のイベントを反映する
+    fold_WillDo_status_events(ESS_dt_str)
     WillDo_df = pd.read_csv(
         os.path.join("data", "WillDo", f"WillDo{ESS_dt_str}.csv"),
         encoding="utf-8-sig")
@@ -101,6 +112,8 @@ def add_WillDo_Task_with_ID(
 
     # Will-doリストcsvを読み込み
     ESS_dt_str = Task_def.get_ESS_dt().strftime('%y%m%d')
+    # 追加する行と同じキーの行があってもイベントの対象行が変わらないよう、先に未反映のイベントを反映する
+    fold_WillDo_status_events(ESS_dt_str)
     WillDo_df = pd.read_csv(
         os.path.join("data", "WillDo", f"WillDo{ESS_dt_str}.csv"),
         encoding="utf-8-sig")
@@ -145,6 +158,8 @@ def add_WillDo_meeting(
     """
     # Will-doリストcsvを読み込み
     ESS_dt_str = Task_def.get_ESS_dt().strftime('%y%m%d')
+    # 追加する行と同じキーの行があってもイベントの対象行が変わらないよう、先に未反映のイベントを反映する
+    fold_WillDo_status_events(ESS_dt_str)
     WillDo_df = pd.read_csv(
         os.path.join("data", "WillDo", f"WillDo{ESS_dt_str}.csv"),
         encoding="utf-8-sig")
@@ -212,6 +227,8 @@ def get_without_today_latest_WillDO_date() -> datetime.date:
             f for f in os.listdir(willdo_old_dir)
             if f.startswith("WillDo") and f.endswith(".csv")
         ]
+    # 月次バンドルに格納済みの日付も対象にする
+    willdo_files += [f"WillDo{d}.csv" for d in Output_H.list_bundled_dates("WillDo")]
     dates = []
     for filename in willdo_files:
         date_str = filename[len("WillDo"):len("WillDo") + 6]
@@ -264,6 +281,8 @@ def get_latest_WillDo_datetime() -> datetime:
     files = [f for f in os.listdir(worklog_dir) if re.match(r"WillDo\d{6}\.csv", f)]
     if os.path.exists(worklog_old_dir):
         files += [f for f in os.listdir(worklog_old_dir) if re.match(r"WillDo\d{6}\.csv", f)]
+    # 月次バンドルに格納済みの日付も対象にする
+    files += [f"WillDo{d}.csv" for d in Output_H.list_bundled_dates("WillDo")]
     if not files:
         raise FileNotFoundError("WillDoリストファイルが見つかりません。")
 
@@ -403,31 +422,36 @@ def add_DailyTasks_today_SubTask(
 
     return Daily_tasks_dict
 
-def ID_to_WillDoEntry(task_id: str, subtask_id: str) -> Task_def.WillDoEntry:
+def ID_to_WillDoEntry(
+        task_id: str, subtask_id: str,
+        task: Optional[Task_def.Task] = None,
+        Order_info: Optional[Task_def.OrderInformation] = None,
+        ) -> Task_def.WillDoEntry:
     """タスクIDとサブタスクIDからWillDoEntryオブジェクトを生成する。
 
     Args:
         task_id (str): タスクID
         subtask_id (str): サブタスクID
+        task (Optional[Task_def.Task]): 読み込み済みのTaskオブジェクト。指定しない場合はタスクcsvを読み込む
+        Order_info (Optional[Task_def.OrderInformation]): 読み込み済みのオーダ情報。指定しない場合は新たに読み込む
 
     Returns:
         WillDoEntry: 生成されたWillDoEntryオブジェクト
     """
-    # タスクIDの冒頭6文字がすべて数字ならProject/Active、そうでなければDaily/Active
-    if len(task_id) >= 6 and task_id[:6].isdigit():
-        folder_path = os.path.join("data", "Project", "Active")
-    else:
-        folder_path = os.path.join("data", "Daily", "Active")
-
     # タスクとサブタスクを取得
-    task = Task_def.read_task_csv(os.path.join(folder_path, f"{task_id}.csv"))
+    # ※算出元の版はタスクcsvの読み込み前に取得する（読み込み中に更新された場合は次回の再計算対象になる）
+    task_csv_path = get_task_csv_path(task_id)
+    source_version = get_task_csv_version(task_csv_path)
+    if task is None:
+        task = Task_def.read_task_csv(task_csv_path)
     subtask_row = task.sub_tasks[task.sub_tasks["subtask_id"] == subtask_id]
     if subtask_row.empty:
         raise ValueError(f"サブタスク {subtask_id} が見つかりません")
     subtask = subtask_row.iloc[0]
 
     # オーダ情報を取得
-    Order_info = Task_def.OrderInformation()
+    if Order_info is None:
+        Order_info = Task_def.OrderInformation()
 
     # 1. 未完了サブタスクをsort_index順に並べる
     incomplete_subtasks_df = task.sub_tasks[task.sub_tasks["is_incomplete"] == True].sort_values("sort_index")
@@ -520,7 +544,9 @@ def ID_to_WillDoEntry(task_id: str, subtask_id: str) -> Task_def.WillDoEntry:
         subtask_name=subtask["name"],
         estimated_time=subtask["estimated_time"],
         daily_work_time=estimated_time_per_day,
-        deadline_date_nearest=nearest_deadline
+        deadline_date_nearest=nearest_deadline,
+        source_version=source_version,
+        computed_date=datetime.now().strftime('%Y-%m-%d')
     )
 
 
@@ -535,6 +561,7 @@ def add_WillDo_Tasks(WillDo_df: pd.DataFrame, Tasks_dict: Dict[str, Task_def.Tas
         pd.DataFrame: Will-doエントリを含むDataFrame
     """
 
+    Order_info = Task_def.OrderInformation()
     for task in Tasks_dict.values():
         # 待機日が設定されている場合はスキップ
         if task.waiting_date is not None:
@@ -543,7 +570,8 @@ def add_WillDo_Tasks(WillDo_df: pd.DataFrame, Tasks_dict: Dict[str, Task_def.Tas
         incomplete_subtasks_df = task.sub_tasks[task.sub_tasks["is_incomplete"] == True]
         if not incomplete_subtasks_df.empty:
             subtask_row = incomplete_subtasks_df.loc[incomplete_subtasks_df["sort_index"].idxmin()]
-            will_do_entry = ID_to_WillDoEntry(task.task_id, subtask_row["subtask_id"])
+            will_do_entry = ID_to_WillDoEntry(
+                task.task_id, subtask_row["subtask_id"], task=task, Order_info=Order_info)
             # WillDoEntryをDataFrameに変換して追加
             entry_dict = {
                 Task_def.WillDoEntry.attr_map(k): v
@@ -561,6 +589,246 @@ def add_WillDo_Tasks(WillDo_df: pd.DataFrame, Tasks_dict: Dict[str, Task_def.Tas
     return WillDo_df
 
 
+def refresh_WillDo_entries(WillDo_df: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+    """Will-doリストの「残時間/日」と「直近〆切」を、必要な行だけ再計算する。
+
+    再計算の対象は以下のいずれかに該当する行のみ。
+    ・算出元タスクcsvの版（更新時刻とサイズ）が記録値と異なる行
+    ・直近〆切があり、算出日が今日でない行（〆切日までの平日日数が変わるため）
+    タスクcsvが存在しない行（打合せ、完了済タスク等）は対象外。
+
+    Args:
+        WillDo_df (pd.DataFrame): Will-doリストのDataFrame
+
+    Returns:
+        tuple[pd.DataFrame, int]: 再計算後のDataFrameと、再計算した行数
+    """
+    version_col = Task_def.WillDoEntry.attr_map("source_version")
+    date_col = Task_def.WillDoEntry.attr_map("computed_date")
+    daily_col = Task_def.WillDoEntry.attr_map("daily_work_time")
+    deadline_col = Task_def.WillDoEntry.attr_map("deadline_date_nearest")
+
+    df = WillDo_df.copy()
+    # 版管理列がない旧形式のWill-doリストは全行を再計算対象にする
+    for col in [version_col, date_col]:
+        if col not in df.columns:
+            df[col] = None
+        df[col] = df[col].astype(object)
+    df[deadline_col] = df[deadline_col].astype(object)
+
+    today_str = datetime.now().strftime('%Y-%m-%d')
+    version_by_task: Dict[str, Optional[str]] = {}
+    tasks_cache: Dict[str, Task_def.Task] = {}
+    Order_info = None
+    updated_count = 0
+
+    for idx, row in df.iterrows():
+        task_id = str(row["タスクID"])
+        if task_id not in version_by_task:
+            version_by_task[task_id] = get_task_csv_version(get_task_csv_path(task_id))
+        current_version = version_by_task[task_id]
+        if current_version is None:
+            continue
+
+        has_deadline = pd.notna(row[deadline_col]) and str(row[deadline_col]).strip() != ""
+        is_source_changed = row[version_col] != current_version
+        is_day_changed = has_deadline and row[date_col] != today_str
+        if not (is_source_changed or is_day_changed):
+            continue
+
+        # 同じタスクの行が複数ある場合もタスクcsvの読み込みは1回にする
+        if task_id not in tasks_cache:
+            tasks_cache[task_id] = Task_def.read_task_csv(get_task_csv_path(task_id))
+        if Order_info is None:
+            Order_info = Task_def.OrderInformation()
+        try:
+            entry = ID_to_WillDoEntry(
+                task_id, row["サブID"], task=tasks_cache[task_id], Order_info=Order_info)
+        except ValueError:
+            continue  # サブタスクが削除済みの場合は再計算しない
+
+        df.at[idx, daily_col] = entry.daily_work_time
+        df.at[idx, deadline_col] = (
+            entry.deadline_date_nearest.strftime('%Y-%m-%d')
+            if entry.deadline_date_nearest is not None else None)
+        df.at[idx, version_col] = entry.source_version
+        df.at[idx, date_col] = entry.computed_date
+        updated_count += 1
+
+    return df, updated_count
+
+
+def get_task_csv_path(task_id: str) -> str:
+    """タスクIDからタスクcsvのパスを返す。
+    タスクIDの冒頭6文字がすべて数字ならProject/Active、そうでなければDaily/Active。
+
+    Args:
+        task_id (str): タスクID
+
+    Returns:
+        str: タスクcsvのパス
+    """
+    if len(task_id) >= 6 and task_id[:6].isdigit():
+        folder_path = os.path.join("data", "Project", "Active")
+    else:
+        folder_path = os.path.join("data", "Daily", "Active")
+    return os.path.join(folder_path, f"{task_id}.csv")
+
+
+def get_task_csv_version(task_csv_path: str) -> Optional[str]:
+    """タスクcsvの版を「更新時刻(ns)-サイズ」形式の文字列で返す。
+
+    Args:
+        task_csv_path (str): タスクcsvのパス
+
+    Returns:
+        Optional[str]: 版文字列。ファイルが存在しない場合はNone
+    """
+    try:
+        stat = os.stat(task_csv_path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def append_WillDo_status_events(willdo_date: str, events: list[dict]) -> None:
+    """Will-doリストの状態変更イベントを未反映ログに追記する。
+    Will-doリストcsv自体は書き換えず、ログの末尾に行を追加するだけにする。
+
+    Args:
+        willdo_date (str): Will-doリストの日付（YYMMDD形式）
+        events (list[dict]): STATUS_EVENT_COLUMNSをキーに持つイベントの辞書のリスト
+    """
+    if not events:
+        return
+    os.makedirs(STATUS_EVENT_DIR, exist_ok=True)
+    log_path = _get_status_event_log_path(willdo_date)
+    is_new = not os.path.exists(log_path)
+    with open(log_path, "a", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=STATUS_EVENT_COLUMNS)
+        if is_new:
+            writer.writeheader()
+        writer.writerows(events)
+
+
+def read_WillDo_status_events(willdo_date: str, include_folded: bool = False) -> pd.DataFrame:
+    """Will-doリストの状態変更イベントを記録順に読み込む。
+
+    Args:
+        willdo_date (str): Will-doリストの日付（YYMMDD形式）
+        include_folded (bool): Trueの場合、csvに反映済みのイベントも含めて返す（その日の状態履歴）
+
+    Returns:
+        pd.DataFrame: STATUS_EVENT_COLUMNSを列に持つDataFrame
+    """
+    log_paths = [_get_status_event_log_path(willdo_date)]
+    if include_folded:
+        log_paths.insert(0, _get_status_event_log_path(willdo_date, folded=True))
+
+    dfs = [
+        pd.read_csv(path, encoding="utf-8-sig", dtype=str, keep_default_na=False)
+        for path in log_paths if os.path.exists(path)
+    ]
+    if not dfs:
+        return pd.DataFrame(columns=STATUS_EVENT_COLUMNS)
+    return pd.concat(dfs, ignore_index=True)
+
+
+def apply_WillDo_status_events(WillDo_df: pd.DataFrame, events_df: pd.DataFrame) -> pd.DataFrame:
+    """状態変更イベントをWill-doリストのDataFrameに適用する。
+    同じタスクID・サブID・項目のイベントは最後のものだけが有効になる。
+    タスクID・サブIDが一致する行が複数ある（会議の行など）イベントは、どの行の変更か特定できないため適用しない。
+
+    Args:
+        WillDo_df (pd.DataFrame): Will-doリストのDataFrame
+        events_df (pd.DataFrame): read_WillDo_status_eventsで読み込んだイベント
+
+    Returns:
+        pd.DataFrame: イベント適用後のDataFrame
+    """
+    if events_df.empty or WillDo_df.empty:
+        return WillDo_df
+
+    df = WillDo_df.copy()
+    latest_events = events_df.drop_duplicates(subset=["タスクID", "サブID", "項目"], keep="last")
+    row_keys = get_WillDo_row_keys(df)
+
+    for _, event in latest_events.iterrows():
+        if event["項目"] not in df.columns:
+            continue
+        mask = row_keys == f"{event['タスクID']}\t{event['サブID']}"
+        if mask.sum() == 1:
+            df[event["項目"]] = df[event["項目"]].astype(object)
+            df.loc[mask, event["項目"]] = event["変更後"] if event["変更後"] != "" else None
+    return df
+
+
+def get_WillDo_row_keys(WillDo_df: pd.DataFrame) -> pd.Series:
+    """状態変更イベントで行を特定するキー（タスクID・サブID）を行ごとに返す。
+
+    Args:
+        WillDo_df (pd.DataFrame): Will-doリストのDataFrame
+
+    Returns:
+        pd.Series: "タスクID\tサブID" の文字列（欠損値は空文字とする）
+    """
+    return WillDo_df["タスクID"].fillna("").astype(str) + "\t" + WillDo_df["サブID"].fillna("").astype(str)
+
+
+def fold_WillDo_status_events(willdo_date: str, apply_events: bool = True) -> bool:
+    """未反映の状態変更イベントをWill-doリストcsvに反映し、反映済みログに移す。
+
+    Will-doリストcsvは保存先フォルダ・oldフォルダから探し、見つかった場所に書き戻す。
+    csvが見つからない・バンドルに格納済みの場合は反映できないため、未反映ログのまま残す。
+
+    Args:
+        willdo_date (str): Will-doリストの日付（YYMMDD形式）
+        apply_events (bool): Falseの場合、csvへの反映は行わずに反映済みログに移す
+            （イベント適用後のDataFrameをcsv全体で保存した直後に使う）
+
+    Returns:
+        bool: 未反映ログを反映済みログに移した場合True
+    """
+    log_path = _get_status_event_log_path(willdo_date)
+    if not os.path.exists(log_path):
+        return False
+
+    events_df = read_WillDo_status_events(willdo_date)
+    if apply_events:
+        # バンドル内の仮想パスは通常のファイルとしては存在しないため、ここで除外される
+        willdo_file_path = Output_H.resolve_day_path("WillDo", willdo_date)
+        if not os.path.isfile(willdo_file_path):
+            return False
+        WillDo_df = pd.read_csv(willdo_file_path, encoding="utf-8-sig")
+        WillDo_df = apply_WillDo_status_events(WillDo_df, events_df)
+        WillDo_df.to_csv(willdo_file_path, index=False, encoding="utf-8-sig")
+
+    # 反映済みログに追記して未反映ログを削除（反映済みログはその日の状態履歴として残す）
+    folded_path = _get_status_event_log_path(willdo_date, folded=True)
+    os.makedirs(os.path.dirname(folded_path), exist_ok=True)
+    events_df.to_csv(
+        folded_path, mode="a", header=not os.path.exists(folded_path),
+        index=False, encoding="utf-8-sig")
+    os.remove(log_path)
+    return True
+
+
+def fold_all_WillDo_status_events() -> None:
+    """未反映ログが残っている全ての日付について、状態変更イベントをWill-doリストcsvに反映する。"""
+    if not os.path.exists(STATUS_EVENT_DIR):
+        return
+    for fname in os.listdir(STATUS_EVENT_DIR):
+        m = re.fullmatch(r"WillDoEvents(\d{6})\.csv", fname)
+        if m:
+            fold_WillDo_status_events(m.group(1))
+
+
+def _get_status_event_log_path(willdo_date: str, folded: bool = False) -> str:
+    """状態変更イベントログのパスを返す。反映済みログはfoldedサブフォルダに置く。"""
+    folder = os.path.join(STATUS_EVENT_DIR, "folded") if folded else STATUS_EVENT_DIR
+    return os.path.join(folder, f"WillDoEvents{willdo_date}.csv")
+
+
 def _archive_old_willdo_csvs(keep_latest_n: int = 2) -> None:
     """data/WillDoフォルダ内のWillDo CSVを日付降順に並び、新しい方からkeep_latest_n個を残しそれ以外をoldフォルダに移動する。"""
     willdo_dir = os.path.join("data", "WillDo")
@@ -582,6 +850,9 @@ def _archive_old_willdo_csvs(keep_latest_n: int = 2) -> None:
         dst = os.path.join(old_dir, f)
         shutil.move(src, dst)
 
+    # 締まった月の分は月次バンドルにまとめる
+    Output_H.compact_closed_months("WillDo")
+
 
 if __name__ == "__main__":
     create_new_WillDo_with_DailyTasks()
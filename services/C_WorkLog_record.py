@@ -1,13 +1,16 @@
+import csv
+import io
 import os
 import re
 import shutil
 import sys
 from datetime import datetime, timedelta
 
-import pandas as pd
-
 import models.Task_definition as Task_def
 import services.D_external_timer_boot as Output_D
+import services.H_monthly_archive as Output_H
+import services.I_file_transaction as Output_I
+import services.N_timer_scheduler as Output_N
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -18,6 +21,9 @@ WORKLOG_COLUMNS = [
     "開始時刻", "終了時刻"
 ]
 
+# 工数実績csv・タスクcsvへの書き込み確定時にfsyncしてディスクへの書き込みを保証するかどうか
+WORKLOG_FSYNC = False
+
 # -------------------------------------------------------------
 # wordの各項と対応する関数
 # -------------------------------------------------------------
@@ -41,37 +47,43 @@ def start_new_timer_and_record_WorkLog(
     start_time = datetime.now()
     end_time = start_time + timedelta(minutes=int(timer_minutes))
 
-    # 2. 工数実績csvの既存の実績最終行に対する処理
-    _update_last_worklog_row_if_overlap(willdo_date, start_time)
-
-    # 3. 入力されたタスク情報を取得
-    task_info = _get_task_info_for_worklog(task_id, subtask_id)
-
-    # 4. 工数実績csvに新しい行を追加
-    _add_worklog_row(
-        willdo_date=willdo_date,
-        order_number=task_info["order_number"],
-        order_abbr=task_info["order_abbr"],
-        project_abbr=task_info["project_abbr"],
-        task_id=task_id,
-        subtask_id=subtask_id,
-        task_name=task_info["task_name"],
-        subtask_name=task_info["subtask_name"],
-        start_time=start_time,
-        end_time=end_time
-    )
-
-    # 5. タスクcsvにサブタスク実績時間を更新して保存
-    _update_subtask_actual_time(
-        task_id=task_id,
-        subtask_id=subtask_id,
-        additional_minutes=int(timer_minutes)
-    )
+    # 以下の読み込み・書き込みを1つのトランザクションで実行し、他セッションと交互に実行させない
+    with Output_I.transaction(fsync=WORKLOG_FSYNC):
+        # 2. 工数実績csvの既存の実績最終行に対する処理
+        _update_last_worklog_row_if_overlap(willdo_date, start_time)
+
+        # 3. 入力されたタスク情報を取得
+        task_info = _get_task_info_for_worklog(task_id, subtask_id)
+
+        # 4. 工数実績csvに新しい行を追加
+        _add_worklog_row(
+            willdo_date=willdo_date,
+            order_number=task_info["order_number"],
+            order_abbr=task_info["order_abbr"],
+            project_abbr=task_info["project_abbr"],
+            task_id=task_id,
+            subtask_id=subtask_id,
+            task_name=task_info["task_name"],
+            subtask_name=task_info["subtask_name"],
+            start_time=start_time,
+            end_time=end_time
+        )
+
+        # 5. タスクcsvにサブタスク実績時間を更新して保存
+        _update_subtask_actual_time(
+            task_id=task_id,
+            subtask_id=subtask_id,
+            additional_minutes=int(timer_minutes)
+        )
 
     # 6. タイマー設定関数を呼び出し
     # ※実環境だとブロックされて送信できなかったためコメントアウト
     # Output_D.send_timer_boot_email(timer_minutes)
 
+    # 7. プロセス内のタイマーに終了時刻を登録
+    _schedule_timer_notification(
+        willdo_date, end_time, f"{task_info['task_name']} / {task_info['subtask_name']}")
+
     return
 
 
@@ -95,41 +107,47 @@ def continuously_start_and_record_WorkLog(
     # 1. 開始時刻（現在時刻）を取得
     current_time = datetime.now()
 
-    # 2. 既存の最終行の終了時刻（更新前）を取得
-    # ※check_WorkLog_latest_end_datetime内で存在確認・空チェックも行われる
-    last_end_time = check_WorkLog_latest_end_datetime(willdo_date)
-
-    # 3. 工数実績csvの既存の実績最終行に対する処理（overlapがあれば更新）
-    _update_last_worklog_row_if_overlap(willdo_date, current_time)
-
-    # 3. 入力されたタスク情報を取得
-    task_info = _get_task_info_for_worklog(task_id, subtask_id)
-
-    # 4. 工数実績csvに新しい行を追加
-    # 終了時刻は既存の実績最終行の終了時刻（更新前の値）を引き継ぐ
-    start_time = current_time
-    end_time = last_end_time
-
-    _add_worklog_row(
-        willdo_date=willdo_date,
-        order_number=task_info["order_number"],
-        order_abbr=task_info["order_abbr"],
-        project_abbr=task_info["project_abbr"],
-        task_id=task_id,
-        subtask_id=subtask_id,
-        task_name=task_info["task_name"],
-        subtask_name=task_info["subtask_name"],
-        start_time=start_time,
-        end_time=end_time
-    )
-
-    # 5. 入力されたタスクのタスクcsvにサブタスク実績時間を更新して保存
-    duration_minutes = int((end_time - start_time).total_seconds() / 60)
-    _update_subtask_actual_time(
-        task_id=task_id,
-        subtask_id=subtask_id,
-        additional_minutes=duration_minutes
-    )
+    # 以下の読み込み・書き込みを1つのトランザクションで実行し、他セッションと交互に実行させない
+    with Output_I.transaction(fsync=WORKLOG_FSYNC):
+        # 2. 既存の最終行の終了時刻（更新前）を取得
+        # ※check_WorkLog_latest_end_datetime内で存在確認・空チェックも行われる
+        last_end_time = check_WorkLog_latest_end_datetime(willdo_date)
+
+        # 3. 工数実績csvの既存の実績最終行に対する処理（overlapがあれば更新）
+        _update_last_worklog_row_if_overlap(willdo_date, current_time)
+
+        # 3. 入力されたタスク情報を取得
+        task_info = _get_task_info_for_worklog(task_id, subtask_id)
+
+        # 4. 工数実績csvに新しい行を追加
+        # 終了時刻は既存の実績最終行の終了時刻（更新前の値）を引き継ぐ
+        start_time = current_time
+        end_time = last_end_time
+
+        _add_worklog_row(
+            willdo_date=willdo_date,
+            order_number=task_info["order_number"],
+            order_abbr=task_info["order_abbr"],
+            project_abbr=task_info["project_abbr"],
+            task_id=task_id,
+            subtask_id=subtask_id,
+            task_name=task_info["task_name"],
+            subtask_name=task_info["subtask_name"],
+            start_time=start_time,
+            end_time=end_time
+        )
+
+        # 5. 入力されたタスクのタスクcsvにサブタスク実績時間を更新して保存
+        duration_minutes = int((end_time - start_time).total_seconds() / 60)
+        _update_subtask_actual_time(
+            task_id=task_id,
+            subtask_id=subtask_id,
+            additional_minutes=duration_minutes
+        )
+
+    # 6. プロセス内のタイマーの終了時刻を新しい行に引き継ぐ
+    _schedule_timer_notification(
+        willdo_date, end_time, f"{task_info['task_name']} / {task_info['subtask_name']}")
 
     return
 
@@ -159,30 +177,35 @@ def record_completed_meeting_WorkLog(
     else:
         task_id = f"DSC-{start_time.strftime('%H%M')}"
 
-    # 3. 工数実績csvの既存の実績最終行に対する処理
-    _update_last_worklog_row_if_overlap(willdo_date, start_time)
-
-    # 4. オーダ情報を取得
-    order_info = Task_def.OrderInformation()
-    order_abbr = order_info.get_order_abbr(order_number)
-    project_abbr = order_info.get_project_abbr(order_number)
-
-    # 5. 工数実績csvに新しい行を追加
-    _add_worklog_row(
-        willdo_date=willdo_date,
-        order_number=order_number,
-        order_abbr=order_abbr,
-        project_abbr=project_abbr,
-        task_id=task_id,
-        subtask_id="#000",
-        task_name=meeting_name,
-        subtask_name="",
-        start_time=start_time,
-        end_time=end_time
-    )
+    # 以下の読み込み・書き込みを1つのトランザクションで実行し、他セッションと交互に実行させない
+    with Output_I.transaction(fsync=WORKLOG_FSYNC):
+        # 3. 工数実績csvの既存の実績最終行に対する処理
+        _update_last_worklog_row_if_overlap(willdo_date, start_time)
+
+        # 4. オーダ情報を取得
+        order_info = Task_def.OrderInformation()
+        order_abbr = order_info.get_order_abbr(order_number)
+        project_abbr = order_info.get_project_abbr(order_number)
+
+        # 5. 工数実績csvに新しい行を追加
+        _add_worklog_row(
+            willdo_date=willdo_date,
+            order_number=order_number,
+            order_abbr=order_abbr,
+            project_abbr=project_abbr,
+            task_id=task_id,
+            subtask_id="#000",
+            task_name=meeting_name,
+            subtask_name="",
+            start_time=start_time,
+            end_time=end_time
+        )
 
     # ※打合せはタスクcsvが存在しないため、サブタスク実績時間の更新は不要
 
+    # 6. 記録した行が最終行となるため、実行中のタイマーを取り消す
+    _schedule_timer_notification(willdo_date, end_time, meeting_name)
+
     return
 
 
@@ -203,32 +226,38 @@ def record_completed_task_WorkLog(
     end_time = datetime.now() - timedelta(minutes=int(wraptime_minutes))
     start_time = end_time - timedelta(minutes=int(achievement_minutes))
 
-    # 2. 工数実績csvの既存の実績最終行に対する処理
-    _update_last_worklog_row_if_overlap(willdo_date, start_time)
-
-    # 3. 入力されたタスク情報を取得
-    task_info = _get_task_info_for_worklog(task_id, subtask_id)
-
-    # 4. 工数実績csvに新しい行を追加
-    _add_worklog_row(
-        willdo_date=willdo_date,
-        order_number=task_info["order_number"],
-        order_abbr=task_info["order_abbr"],
-        project_abbr=task_info["project_abbr"],
-        task_id=task_id,
-        subtask_id=subtask_id,
-        task_name=task_info["task_name"],
-        subtask_name=task_info["subtask_name"],
-        start_time=start_time,
-        end_time=end_time
-    )
-
-    # 5. 入力されたタスクのタスクcsvにサブタスク実績時間を更新して保存
-    _update_subtask_actual_time(
-        task_id=task_id,
-        subtask_id=subtask_id,
-        additional_minutes=int(achievement_minutes)
-    )
+    # 以下の読み込み・書き込みを1つのトランザクションで実行し、他セッションと交互に実行させない
+    with Output_I.transaction(fsync=WORKLOG_FSYNC):
+        # 2. 工数実績csvの既存の実績最終行に対する処理
+        _update_last_worklog_row_if_overlap(willdo_date, start_time)
+
+        # 3. 入力されたタスク情報を取得
+        task_info = _get_task_info_for_worklog(task_id, subtask_id)
+
+        # 4. 工数実績csvに新しい行を追加
+        _add_worklog_row(
+            willdo_date=willdo_date,
+            order_number=task_info["order_number"],
+            order_abbr=task_info["order_abbr"],
+            project_abbr=task_info["project_abbr"],
+            task_id=task_id,
+            subtask_id=subtask_id,
+            task_name=task_info["task_name"],
+            subtask_name=task_info["subtask_name"],
+            start_time=start_time,
+            end_time=end_time
+        )
+
+        # 5. 入力されたタスクのタスクcsvにサブタスク実績時間を更新して保存
+        _update_subtask_actual_time(
+            task_id=task_id,
+            subtask_id=subtask_id,
+            additional_minutes=int(achievement_minutes)
+        )
+
+    # 6. 記録した行が最終行となるため、実行中のタイマーを取り消す
+    _schedule_timer_notification(
+        willdo_date, end_time, f"{task_info['task_name']} / {task_info['subtask_name']}")
 
     return
 
@@ -252,11 +281,11 @@ def check_WorkLog_latest_end_datetime(willdo_date: str) -> datetime:
     if not os.path.exists(worklog_csv_path):
         raise ValueError(f"工数実績csv '{worklog_csv_path}' が存在しません")
 
-    worklog_df = pd.read_csv(worklog_csv_path, encoding="utf-8")
-    if worklog_df.empty:
+    # ファイル末尾から最終行のみを読み込む
+    last_row = _read_last_worklog_row(worklog_csv_path)
+    if last_row is None:
         raise ValueError(f"工数実績csv '{worklog_csv_path}' に実績行がありません")
 
-    last_row = worklog_df.iloc[-1]
     last_end_time_str = last_row[WORKLOG_COLUMNS[8]]
     last_end_time = datetime.strptime(last_end_time_str, "%Y-%m-%d %H:%M:%S")
 
@@ -284,14 +313,13 @@ def get_WorkLog_conflict_last_start_time(
         return None
 
     try:
-        worklog_df = pd.read_csv(worklog_csv_path, encoding="utf-8")
+        last_row = _read_last_worklog_row(worklog_csv_path)
     except Exception:
         return None
 
-    if worklog_df.empty:
+    if last_row is None:
         return None
 
-    last_row = worklog_df.iloc[-1]
     last_start_time_str = last_row[WORKLOG_COLUMNS[7]]
     last_start_time = datetime.strptime(last_start_time_str, "%Y-%m-%d %H:%M:%S")
 
@@ -324,9 +352,9 @@ def _get_task_info_for_worklog(task_id: str, subtask_id: str) -> dict:
     Raises:
         ValueError: サブタスクIDがタスクに存在しない場合
     """
-    # タスクcsvを読み込み
-    task_csv_path = _get_task_csv_path(task_id)
-    task = Task_def.read_task_csv(task_csv_path)
+    # タスクcsvを読み込み（トランザクション内で更新済みの場合は更新後の内容）
+    with Output_I.transaction(fsync=WORKLOG_FSYNC) as tx:
+        task = _read_task_in_transaction(tx, _get_task_csv_path(task_id))
 
     # タスク情報を取得
     order_number = task.order_number
@@ -354,10 +382,10 @@ def _get_task_info_for_worklog(task_id: str, subtask_id: str) -> dict:
 
 def _update_last_worklog_row_if_overlap(
         willdo_date: str, new_start_time: datetime) -> None:
-    """新タスクの開始時刻が既存最終行の終了時刻より前の場合、工数実績csv既存最終行とその行に対応するタスクcsvを更新する。
+    """新タスクの開始時刻が工数実績csvの最終行の終了時刻より前の場合、既存最終行を更新する。
 
-    新タスクの開始時刻が既存最終行の終了時刻以降の場合は何もしない。
-    工数実績csvが存在しない、または空の場合も何もしない。
+    - 既存最終行のタスクcsvのサブタスク実績時間を補正
+    - 既存最終行の終了時刻を新タスク開始時刻に更新
 
     Args:
         willdo_date (str): WillDo日付（YYMMDD形式）
@@ -365,47 +393,48 @@ def _update_last_worklog_row_if_overlap(
     """
     worklog_csv_path = _get_worklog_csv_path(willdo_date)
 
-    # 工数実績csvが存在しない、または空の場合は何もしない
-    try:
-        last_end_time = check_WorkLog_latest_end_datetime(willdo_date)
-    except ValueError:
-        return
-
-    # 開始時刻が最終行の終了時刻以降の場合は何もしない
-    if new_start_time >= last_end_time:
-        return
-
-    # 開始時刻が最終行の終了時刻より前の場合、既存最終行を更新
-    worklog_df = pd.read_csv(worklog_csv_path, encoding="utf-8")
-    last_row = worklog_df.iloc[-1]
-    last_task_id = last_row[WORKLOG_COLUMNS[3]]
-    last_subtask_id = last_row[WORKLOG_COLUMNS[4]]
-    last_start_time_str = last_row[WORKLOG_COLUMNS[7]]
-    last_start_time = datetime.strptime(last_start_time_str, "%Y-%m-%d %H:%M:%S")
-
-    # 既存の実績最終行のタスクcsvを更新
-    last_task_csv_path = _get_task_csv_path(last_task_id)
-    if os.path.exists(last_task_csv_path):
-        last_task = Task_def.read_task_csv(last_task_csv_path)
-        last_subtask_row = last_task.sub_tasks[last_task.sub_tasks["subtask_id"] == last_subtask_id]
-
-        if not last_subtask_row.empty:
-            last_subtask_actual_time = int(last_subtask_row.iloc[0]["actual_time"])
-
-            # サブタスク実績時間を更新
-            # ※更新後の実績時間 = 既存の実績時間 - (既存の終了時刻 - 既存の開始時刻) + (新タスク開始時刻 - 既存の開始時刻)
-            old_duration_minutes = int((last_end_time - last_start_time).total_seconds() / 60)
-            new_duration_minutes = int((new_start_time - last_start_time).total_seconds() / 60)
-            last_subtask_new_actual_time = last_subtask_actual_time - old_duration_minutes + new_duration_minutes
-
-            last_subtask_index = last_task.sub_tasks[last_task.sub_tasks["subtask_id"] == last_subtask_id].index[0]
-            last_task.sub_tasks.at[last_subtask_index, "actual_time"] = last_subtask_new_actual_time
-            last_task.save_to_csv()
-
-    # 工数実績csvの既存の実績最終行の終了時刻を新タスク開始時刻に更新して保存
-    new_start_time_str = new_start_time.strftime("%Y-%m-%d %H:%M:%S")
-    worklog_df.at[worklog_df.index[-1], WORKLOG_COLUMNS[8]] = new_start_time_str
-    worklog_df.to_csv(worklog_csv_path, index=False, encoding="utf-8")
+    with Output_I.transaction(fsync=WORKLOG_FSYNC) as tx:
+        # 工数実績csvが存在しない、または空の場合は何もしない
+        if not tx.exists(worklog_csv_path):
+            return
+        last_row = _read_last_worklog_row(worklog_csv_path, tx)
+        if last_row is None:
+            return
+        last_end_time = datetime.strptime(last_row[WORKLOG_COLUMNS[8]], "%Y-%m-%d %H:%M:%S")
+
+        # 開始時刻が最終行の終了時刻以降の場合は何もしない
+        if new_start_time >= last_end_time:
+            return
+
+        # 開始時刻が最終行の終了時刻より前の場合、既存最終行を更新
+        last_task_id = last_row[WORKLOG_COLUMNS[3]]
+        last_subtask_id = last_row[WORKLOG_COLUMNS[4]]
+        last_start_time_str = last_row[WORKLOG_COLUMNS[7]]
+        last_start_time = datetime.strptime(last_start_time_str, "%Y-%m-%d %H:%M:%S")
+
+        # 既存の実績最終行のタスクcsvを更新
+        last_task_csv_path = _get_task_csv_path(last_task_id)
+        if tx.exists(last_task_csv_path):
+            last_task = _read_task_in_transaction(tx, last_task_csv_path)
+            last_subtask_row = last_task.sub_tasks[last_task.sub_tasks["subtask_id"] == last_subtask_id]
+
+            if not last_subtask_row.empty:
+                last_subtask_actual_time = int(last_subtask_row.iloc[0]["actual_time"])
+
+                # サブタスク実績時間を更新
+                # ※更新後の実績時間 = 既存の実績時間 - (既存の終了時刻 - 既存の開始時刻) + (新タスク開始時刻 - 既存の開始時刻)
+                old_duration_minutes = int((last_end_time - last_start_time).total_seconds() / 60)
+                new_duration_minutes = int((new_start_time - last_start_time).total_seconds() / 60)
+                last_subtask_new_actual_time = last_subtask_actual_time - old_duration_minutes + new_duration_minutes
+
+                last_subtask_index = last_task.sub_tasks[last_task.sub_tasks["subtask_id"] == last_subtask_id].index[0]
+                last_task.sub_tasks.at[last_subtask_index, "actual_time"] = last_subtask_new_actual_time
+                _stage_task_csv(tx, last_task)
+
+        # 工数実績csvの既存の実績最終行の終了時刻を新タスク開始時刻に更新して保存
+        # ※最終行のみを切り詰めて書き直す
+        new_start_time_str = new_start_time.strftime("%Y-%m-%d %H:%M:%S")
+        _rewrite_last_worklog_row(worklog_csv_path, {WORKLOG_COLUMNS[8]: new_start_time_str})
 
 
 def _add_worklog_row(
@@ -432,31 +461,157 @@ def _add_worklog_row(
     """
     worklog_csv_path = _get_worklog_csv_path(willdo_date)
 
-    # 存在しない場合は新規作成
-    if not os.path.exists(worklog_csv_path):
-        _create_worklog_csv(worklog_csv_path)
-        # 新規作成したものと一つ前の最新以外をoldフォルダに移動
-        _archive_old_worklog_csvs(keep_latest_n=2)
-
-    # 時刻を 'YYYY-MM-DD HH:MM:SS' 形式の文字列に変換
-    start_time_str = start_time.strftime("%Y-%m-%d %H:%M:%S")
-    end_time_str = end_time.strftime("%Y-%m-%d %H:%M:%S")
-
-    # 工数実績csvに新しい行を追加
-    worklog_df = pd.read_csv(worklog_csv_path, encoding="utf-8")
-    new_row = pd.DataFrame([{
-        WORKLOG_COLUMNS[0]: order_number,
-        WORKLOG_COLUMNS[1]: order_abbr,
-        WORKLOG_COLUMNS[2]: project_abbr,
-        WORKLOG_COLUMNS[3]: task_id,
-        WORKLOG_COLUMNS[4]: subtask_id,
-        WORKLOG_COLUMNS[5]: task_name,
-        WORKLOG_COLUMNS[6]: subtask_name,
-        WORKLOG_COLUMNS[7]: start_time_str,
-        WORKLOG_COLUMNS[8]: end_time_str
-    }])
-    worklog_df = pd.concat([worklog_df, new_row], ignore_index=True)
-    worklog_df.to_csv(worklog_csv_path, index=False, encoding="utf-8")
+    with Output_I.transaction(fsync=WORKLOG_FSYNC) as tx:
+        # 存在しない場合は新規作成
+        if not tx.exists(worklog_csv_path):
+            _create_worklog_csv(worklog_csv_path)
+            # 新規作成したものと一つ前の最新以外をoldフォルダに移動
+            # ※新規作成分はトランザクション確定前でフォルダにはまだないため、一つ前の最新のみを残す
+            _archive_old_worklog_csvs(keep_latest_n=1)
+
+        # 時刻を 'YYYY-MM-DD HH:MM:SS' 形式の文字列に変換
+        start_time_str = start_time.strftime("%Y-%m-%d %H:%M:%S")
+        end_time_str = end_time.strftime("%Y-%m-%d %H:%M:%S")
+
+        # 工数実績csvの末尾に新しい行を追記（既存行は読み込まず書き換えない）
+        _append_worklog_row(worklog_csv_path, [
+            order_number, order_abbr, project_abbr,
+            task_id, subtask_id, task_name, subtask_name,
+            start_time_str, end_time_str
+        ])
+
+
+def _append_worklog_row(worklog_csv_path: str, row_values: list) -> None:
+    """工数実績csvの末尾に1行を追記する。
+
+    ファイル全体を読み書きせず、csvモジュールで1行分だけを書き込むため、
+    追記コストは既存行数によらず一定で、書き込み中に異常終了しても既存行は失われない。
+
+    Args:
+        worklog_csv_path (str): 工数実績csvのパス
+        row_values (list): WORKLOG_COLUMNSの順に並べた値のリスト
+    """
+    # 1行分をcsv形式の文字列に変換（改行コードはpandasで新規作成した行に合わせる）
+    data = _format_worklog_line(["" if v is None else v for v in row_values])
+
+    with Output_I.transaction(fsync=WORKLOG_FSYNC) as tx:
+        # 手編集等で最終行に改行がない場合は改行を補う
+        end = tx.size(worklog_csv_path)
+        if end > 0 and tx.read_bytes(worklog_csv_path, end - 1, end) not in (b"\n", b"\r"):
+            data = os.linesep.encode("utf-8") + data
+        tx.append_bytes(worklog_csv_path, data)
+
+
+def _read_last_worklog_row(
+        worklog_csv_path: str, tx: "Output_I.Transaction | None" = None) -> "dict | None":
+    """工数実績csvの最終行のみを、ファイル末尾から逆方向に読み込んで返す。
+
+    ファイル全体を読み込まないため、読み込みコストは既存行数によらず一定。
+    ※タスク名等にセル内改行を含む行は想定しない
+
+    Args:
+        worklog_csv_path (str): 工数実績csvのパス
+        tx (Output_I.Transaction | None): 指定した場合、トランザクション内でステージング済みの書き込みを反映して読み込む
+
+    Returns:
+        dict | None: ヘッダの列名をキー、最終行の値（文字列）を値とする辞書。実績行がない場合はNone
+    """
+    located = _locate_last_worklog_line(worklog_csv_path, tx=tx)
+    if located is None:
+        return None
+    header, _, last_line = located
+    values = next(csv.reader([last_line]))
+    return dict(zip(header, values))
+
+
+def _rewrite_last_worklog_row(worklog_csv_path: str, updates: dict) -> None:
+    """工数実績csvの最終行の指定列を書き換える。
+
+    最終行の先頭位置でファイルを切り詰め、書き換えた最終行を書き込む。
+
+    Args:
+        worklog_csv_path (str): 工数実績csvのパス
+        updates (dict): 列名をキー、更新後の値を値とする辞書
+
+    Raises:
+        ValueError: 工数実績csvに実績行がない場合
+    """
+    with Output_I.transaction(fsync=WORKLOG_FSYNC) as tx:
+        located = _locate_last_worklog_line(worklog_csv_path, tx=tx)
+        if located is None:
+            raise ValueError(f"工数実績csv '{worklog_csv_path}' に実績行がありません")
+        header, offset, last_line = located
+
+        row = dict(zip(header, next(csv.reader([last_line]))))
+        row.update(updates)
+        tx.truncate_write(worklog_csv_path, offset, _format_worklog_line([row.get(col, "") for col in header]))
+
+
+def _locate_last_worklog_line(
+        worklog_csv_path: str, chunk_size: int = 4096,
+        tx: "Output_I.Transaction | None" = None) -> "tuple[list[str], int, str] | None":
+    """工数実績csvのヘッダと、最終行の先頭位置（バイト）・最終行の文字列を返す。
+
+    Args:
+        worklog_csv_path (str): 工数実績csvのパス
+        chunk_size (int): 末尾から逆方向に読み込む単位（バイト）
+        tx (Output_I.Transaction | None): 指定した場合、トランザクション内でステージング済みの書き込みを反映して読み込む
+
+    Returns:
+        tuple[list[str], int, str] | None: (ヘッダの列名リスト, 最終行の先頭位置, 最終行の文字列)。
+            実績行がない場合はNone
+    """
+    if tx is not None and tx.is_staged(worklog_csv_path):
+        size = tx.size(worklog_csv_path)
+        def read_range(start, end):
+            return tx.read_bytes(worklog_csv_path, start, end)
+        f = None
+    else:
+        f = open(worklog_csv_path, "rb")
+        size = f.seek(0, os.SEEK_END)
+        def read_range(start, end):
+            f.seek(start)
+            return f.read(end - start)
+
+    try:
+        # ヘッダ行を読み込む
+        header_line = b""
+        header_end = 0
+        while header_end < size and b"\n" not in header_line:
+            header_line += read_range(header_end, min(size, header_end + chunk_size))
+            header_end = min(size, header_end + chunk_size)
+        if b"\n" in header_line:
+            header_end = header_line.index(b"\n") + 1
+            header_line = header_line[:header_end]
+        header = next(csv.reader([header_line.decode("utf-8-sig").rstrip("\r\n")]), [])
+
+        # 末尾の改行・空行を除いた位置から逆方向に読み込む
+        tail = b""
+        pos = size
+        while pos > header_end:
+            read_size = min(chunk_size, pos - header_end)
+            pos -= read_size
+            tail = read_range(pos, pos + read_size) + tail
+            # 最終行の手前の改行が見つかれば読み込み終了
+            if b"\n" in tail.rstrip(b"\r\n"):
+                break
+    finally:
+        if f is not None:
+            f.close()
+
+    stripped = tail.rstrip(b"\r\n")
+    if not stripped:
+        return None
+    line_start = stripped.rfind(b"\n") + 1
+    offset = pos + line_start
+    return header, offset, stripped[line_start:].decode("utf-8")
+
+
+def _format_worklog_line(values: list) -> bytes:
+    """工数実績csvの1行分をcsv形式のバイト列に変換する（改行コードはOSの既定）"""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator=os.linesep).writerow(values)
+    return buffer.getvalue().encode("utf-8")
 
 
 def _update_subtask_actual_time(
@@ -472,18 +627,69 @@ def _update_subtask_actual_time(
         ValueError: サブタスクIDがタスクに存在しない場合
     """
     task_csv_path = _get_task_csv_path(task_id)
-    task = Task_def.read_task_csv(task_csv_path)
 
-    subtask_row = task.sub_tasks[task.sub_tasks["subtask_id"] == subtask_id]
-    if subtask_row.empty:
-        raise ValueError(f"サブタスクID '{subtask_id}' がタスク '{task_id}' に見つかりません")
+    with Output_I.transaction(fsync=WORKLOG_FSYNC) as tx:
+        task = _read_task_in_transaction(tx, task_csv_path)
 
-    subtask_actual_time = int(subtask_row.iloc[0]["actual_time"])
-    new_actual_time = subtask_actual_time + additional_minutes
+        subtask_row = task.sub_tasks[task.sub_tasks["subtask_id"] == subtask_id]
+        if subtask_row.empty:
+            raise ValueError(f"サブタスクID '{subtask_id}' がタスク '{task_id}' に見つかりません")
 
-    subtask_index = task.sub_tasks[task.sub_tasks["subtask_id"] == subtask_id].index[0]
-    task.sub_tasks.at[subtask_index, "actual_time"] = new_actual_time
-    task.save_to_csv()
+        subtask_actual_time = int(subtask_row.iloc[0]["actual_time"])
+        new_actual_time = subtask_actual_time + additional_minutes
+
+        subtask_index = task.sub_tasks[task.sub_tasks["subtask_id"] == subtask_id].index[0]
+        task.sub_tasks.at[subtask_index, "actual_time"] = new_actual_time
+        _stage_task_csv(tx, task)
+
+
+def _read_task_in_transaction(tx: Output_I.Transaction, task_csv_path: str) -> Task_def.Task:
+    """タスクcsvを読み込む。同じトランザクション内で更新済みの場合は更新後のTaskオブジェクトを返す。
+
+    Args:
+        tx (Output_I.Transaction): 実行中のトランザクション
+        task_csv_path (str): タスクcsvのパス
+
+    Returns:
+        Task_def.Task: Taskオブジェクト
+    """
+    task = tx.cache.get(task_csv_path)
+    if task is None:
+        task = Task_def.read_task_csv(task_csv_path)
+        tx.cache[task_csv_path] = task
+    return task
+
+
+def _stage_task_csv(tx: Output_I.Transaction, task: Task_def.Task) -> None:
+    """Taskオブジェクトの内容をタスクcsvへの書き込みとしてトランザクションにステージングする。
+
+    Args:
+        tx (Output_I.Transaction): 実行中のトランザクション
+        task (Task_def.Task): 保存するTaskオブジェクト
+    """
+    task_csv_path = task.get_csv_path()
+    tx.cache[task_csv_path] = task
+    # Task.save_to_csv（テキストモード書き込み）と同じくOSの既定の改行コードにする
+    tx.write_text(task_csv_path, task.to_csv_text().replace("\n", os.linesep))
+
+
+def _schedule_timer_notification(willdo_date: str, end_time: datetime, label: str) -> None:
+    """工数実績csvの最終行（実行中の行）の終了時刻をプロセス内のタイマーに登録する。
+
+    タイマーは工数実績csvごとに1つ（実行中の行は最終行のみ）で、登録済みの場合は置き換える。
+    終了時刻が過去の場合（終了済みの実績を記録した場合）は登録済みのタイマーを取り消す。
+
+    Args:
+        willdo_date (str): WillDo日付（YYMMDD形式）
+        end_time (datetime): 最終行の終了時刻
+        label (str): 通知に表示する名前
+    """
+    timer_id = f"工数実績{willdo_date}"
+    scheduler = Output_N.get_scheduler()
+    if end_time > datetime.now():
+        scheduler.schedule(timer_id, end_time, {"willdo_date": willdo_date, "label": label})
+    else:
+        scheduler.cancel(timer_id)
 
 
 def _get_task_csv_path(task_id: str) -> str:
@@ -520,8 +726,8 @@ def _create_worklog_csv(file_path: str) -> None:
     Args:
         file_path (str): 作成するファイルのパス
     """
-    df = pd.DataFrame(columns=WORKLOG_COLUMNS)
-    df.to_csv(file_path, index=False, encoding="utf-8")
+    with Output_I.transaction(fsync=WORKLOG_FSYNC) as tx:
+        tx.write_bytes(file_path, _format_worklog_line(WORKLOG_COLUMNS))
 
 
 def _archive_old_worklog_csvs(keep_latest_n: int = 2) -> None:
@@ -544,6 +750,9 @@ def _archive_old_worklog_csvs(keep_latest_n: int = 2) -> None:
         dst = os.path.join(old_dir, f)
         shutil.move(src, dst)
 
+    # 締まった月の分は月次バンドルにまとめる
+    Output_H.compact_closed_months("WorkLog")
+
 
 if __name__ == "__main__":
     pass
\ No newline at end of file
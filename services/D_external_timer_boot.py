@@ -1,28 +1,22 @@
 # %%
-import importlib.util
 import os
-import smtplib
-import ssl
 import sys
+import threading
 from email.mime.text import MIMEText
 from email.utils import formatdate
-from typing import Any
-
-# data/smtp_account/my_gmail_account.py を型安全にインポート
-my_gmail_account: Any
-try:
-    spec = importlib.util.spec_from_file_location(
-        "my_gmail_account",
-        os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'smtp_account', 'my_gmail_account.py'))
-    )
-    if spec and spec.loader:
-        my_gmail_account = importlib.util.module_from_spec(spec)
-        sys.modules["my_gmail_account"] = my_gmail_account
-        spec.loader.exec_module(my_gmail_account)
-    else:
-        raise ImportError("Could not load my_gmail_account module")
-except Exception as e:
-    raise ImportError(f"my_gmail_accountのインポートに失敗しました: {e}")
+from typing import Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import services.L_smtp_sender as Output_L
+import services.M_local_config as Output_M
+
+# タイマー起動メールの送信先SMTPサーバー
+SMTP_SERVER = "smtp.gmail.com"
+SMTP_PORT = 465
+
+# バックグラウンド送信用のインスタンス（初回送信時に作成）
+_sender: Optional[Output_L.BackgroundSMTPSender] = None
+_sender_guard = threading.Lock()
 
 
 # -------------------------------------------------------------
@@ -30,13 +24,20 @@ except Exception as e:
 # -------------------------------------------------------------
 
 
-def send_timer_boot_email(timer_minute: int) -> None:
+def send_timer_boot_email(timer_minute: int) -> bool:
     """外部タイマーを起動するためのメールを送信する
 
+    送信はバックグラウンドの送信用スレッドで行い、本関数は送信完了を待たずに戻る。
+
     Args:
         timer_minute (int): タイマーの分数
+
+    Returns:
+        bool: 送信待ちキューに積めた場合True、キューが満杯で破棄した場合False
     """
 
+    # data/smtp_account/my_gmail_account.py は初回送信時に読み込む
+    my_gmail_account = Output_M.get_config("smtp_account")
     from_addr = my_gmail_account.from_account
     to_addr = my_gmail_account.to_account
     subject = "Timer_boot"
@@ -44,12 +45,24 @@ def send_timer_boot_email(timer_minute: int) -> None:
 
     msg = _crateMIMEtext(from_addr, to_addr, subject, body)
 
-    smtp_server = "smtp.gmail.com"
-    smtp_port = 465
+    return _get_sender().submit(msg)
+
 
-    _send_email(
-        smtp_server, smtp_port, my_gmail_account.from_account, my_gmail_account.password, msg)
-    return
+def send_timer_end_email(label: str) -> bool:
+    """タイマー終了を通知するメールを送信する（N_timer_schedulerのメール通知先から呼び出す）
+
+    送信はバックグラウンドの送信用スレッドで行い、本関数は送信完了を待たずに戻る。
+
+    Args:
+        label (str): 終了したタイマーの表示名（本文に記載）
+
+    Returns:
+        bool: 送信待ちキューに積めた場合True、キューが満杯で破棄した場合False
+    """
+    my_gmail_account = Output_M.get_config("smtp_account")
+    msg = _crateMIMEtext(
+        my_gmail_account.from_account, my_gmail_account.to_account, "Timer_end", label)
+    return _get_sender().submit(msg)
 
 
 # -------------------------------------------------------------
@@ -67,23 +80,18 @@ def _crateMIMEtext(from_addr, to_addr, subject, body):
     msg['Reply-To'] = from_addr
     return msg
 
-def _send_email(smtp_server, smtp_port, account, password, msg):
-    # SMTPサーバーに接続してメールを送信
-    server = smtplib.SMTP_SSL(
-        smtp_server,
-        smtp_port,
-        context=ssl.create_default_context()
-    )
-    server.set_debuglevel(False)  # デバッグ情報を表示しない
-
-    # ログインしてメールを送信
-    server.login(account, password)
-    server.send_message(msg)
-
-    server.quit()
-    return True
+def _get_sender() -> Output_L.BackgroundSMTPSender:
+    # ログイン済みの接続を使い回すため、送信用インスタンスはプロセスで1つだけ作成する
+    global _sender
+    with _sender_guard:
+        if _sender is None:
+            my_gmail_account = Output_M.get_config("smtp_account")
+            _sender = Output_L.BackgroundSMTPSender(
+                SMTP_SERVER, SMTP_PORT, my_gmail_account.from_account, my_gmail_account.password)
+        return _sender
 
 if __name__ == "__main__":
     send_timer_boot_email(5)
+    _get_sender().stop(timeout=60)
 
 # %%
@@ -1,15 +1,246 @@
 # %%
+import colorsys
+import io
 import os
 import sys
+from collections import OrderedDict
 from datetime import datetime, timedelta
+from functools import cached_property
+from typing import TYPE_CHECKING, Optional
 
-import matplotlib
-import matplotlib.dates as mdates
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import models.Task_definition as Task_def
+import services.H_monthly_archive as Output_H
+import services.K_worklog_store as Output_K
+
+# matplotlib・plotlyはグラフを作成するときに読み込む（グラフを使わないページで読み込まないようにする）
+if TYPE_CHECKING:
+    import matplotlib.figure
+    import plotly.graph_objects
+
+# load_WorkLog_day() で保持する日数（日付を切り替えて戻ったときに読み込み直さないようにする）
+DAY_CACHE_SIZE = 31
+
+# 1日の分数と、0時からの経過分数ごとの"%H:%M"形式の文字列（休憩時間の一括書式化に使う）
+MINUTES_PER_DAY = 24 * 60
+_HHMM_LABELS = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in range(MINUTES_PER_DAY)], dtype=object)
+
+# オーダ管理csvの並び順のオーダ情報 {絶対パス: (更新時刻, オーダ情報)}
+_order_table_cache: dict[str, tuple[int, pd.DataFrame]] = {}
+
+# 読み込み済みの日 {絶対パス: (ファイルの版, WorkLogDay)}（古く使った順）
+_day_cache: "OrderedDict[str, tuple[str, WorkLogDay]]" = OrderedDict()
+
+# -------------------------------------------------------------
+# 1日分の工数実績
+# -------------------------------------------------------------
+
+
+class WorkLogDay:
+    """1日分の工数実績CSVを1回だけ読み込み、各種集計結果をキャッシュして返すクラス
+
+    各プロパティ・メソッドの返すDataFrame / Figureはキャッシュしたものなので、呼び出し側で変更しないこと。
+
+    Attributes:
+        csv_filepath (str): 工数実績CSVファイルのパス（バンドル内の仮想パスを含む）
+    """
+
+    def __init__(self, csv_filepath: str):
+        """
+        Args:
+            csv_filepath (str): 工数実績CSVファイルのパス（バンドル内の仮想パスを含む）
+        """
+        self.csv_filepath = csv_filepath
+        self._sum_subtask: dict[bool, pd.DataFrame] = {}
+        self._sum_order: dict[bool, pd.DataFrame] = {}
+        self._summary: dict[bool, pd.DataFrame] = {}
+        self._barchart_png: dict[int, bytes] = {}
+
+    @cached_property
+    def raw_df(self) -> pd.DataFrame:
+        """読み込んだままの工数実績（生データ表示用）"""
+        return read_WorkLog_df(self.csv_filepath)
+
+    @cached_property
+    def df(self) -> pd.DataFrame:
+        """開始時刻・終了時刻の秒数を切り捨てて分単位に統一した工数実績"""
+        df = self.raw_df.copy()
+        df['開始時刻'] = df['開始時刻'].dt.floor('min')
+        df['終了時刻'] = df['終了時刻'].dt.floor('min')
+        return df
+
+    @cached_property
+    def rest_df(self) -> pd.DataFrame:
+        """休憩時間のDataFrame（extract_rest_time_from_WorkLog と同じ）"""
+        return extract_rest_time_from_df(self.df)
+
+    @cached_property
+    def barchart(self) -> "matplotlib.figure.Figure":
+        """3分割ガントチャート（make_WorkLog_barchart と同じ）"""
+        return make_WorkLog_barchart_from_df(self.df)
+
+    @cached_property
+    def barchart_plotly(self) -> "plotly.graph_objects.Figure":
+        """操作可能な3分割ガントチャート（matplotlibを読み込まない）"""
+        return make_WorkLog_barchart_plotly_from_df(self.df)
+
+    def barchart_png(self, dpi: int = 200) -> bytes:
+        """3分割ガントチャートのPNG画像（再描画しないよう解像度ごとにキャッシュする）
+
+        Args:
+            dpi (int): 画像の解像度
+
+        Returns:
+            bytes: PNG画像
+        """
+        if dpi not in self._barchart_png:
+            self._barchart_png[dpi] = render_WorkLog_barchart_png(self.df, dpi)
+        return self._barchart_png[dpi]
+
+    def sum_each_subtask(self, include_MTG: bool) -> pd.DataFrame:
+        """サブタスクごとの集計（sum_df_each_subtask と同じ）
+
+        Args:
+            include_MTG (bool): MTG行を含めるかどうか
+
+        Returns:
+            pd.DataFrame: サブタスクごとの集計
+        """
+        if include_MTG not in self._sum_subtask:
+            self._sum_subtask[include_MTG] = sum_df_each_subtask_from_df(self.df, include_MTG)
+        return self._sum_subtask[include_MTG]
+
+    def sum_each_order(self, include_MTG: bool) -> pd.DataFrame:
+        """オーダ番号ごとの集計（sum_df_each_order と同じ）
+
+        Args:
+            include_MTG (bool): MTG行を含めるかどうか
+
+        Returns:
+            pd.DataFrame: オーダ番号ごとの集計
+        """
+        if include_MTG not in self._sum_order:
+            self._sum_order[include_MTG] = sum_df_each_order(self.sum_each_subtask(include_MTG))
+        return self._sum_order[include_MTG]
+
+    def summary(self, add_daytime_break: bool) -> pd.DataFrame:
+        """ESS登録用の集計（MTGを含むオーダ番号ごとの集計を使った calc_WorkLog_summary と同じ）
+
+        Args:
+            add_daytime_break (bool): 昼休憩（60分）を考慮するかどうか
+
+        Returns:
+            pd.DataFrame: ESS登録用の集計
+        """
+        if add_daytime_break not in self._summary:
+            self._summary[add_daytime_break] = calc_WorkLog_summary_from_df(
+                self.df, self.sum_each_order(include_MTG=True), add_daytime_break)
+        return self._summary[add_daytime_break]
+
+
+def load_WorkLog_day(csv_filepath: str) -> WorkLogDay:
+    """工数実績CSVファイルの WorkLogDay を返す
+
+    ファイル（バンドル内の仮想パスの場合はバンドル）の更新時刻とサイズが変わっていなければ、
+    前回作成した WorkLogDay を集計結果ごと使い回す。
+
+    Args:
+        csv_filepath (str): 工数実績CSVファイルのパス（バンドル内の仮想パスを含む）
+
+    Returns:
+        WorkLogDay: 1日分の工数実績
+    """
+    key = os.path.abspath(csv_filepath)
+    signature = _file_signature(csv_filepath)
+    cached = _day_cache.get(key)
+    if cached is not None and cached[0] == signature:
+        _day_cache.move_to_end(key)
+        return cached[1]
+
+    day = WorkLogDay(csv_filepath)
+    _day_cache[key] = (signature, day)
+    _day_cache.move_to_end(key)
+    while len(_day_cache) > DAY_CACHE_SIZE:
+        _day_cache.popitem(last=False)
+    return day
+
+# -------------------------------------------------------------
+# オーダ番号の並び順（オーダ管理csvの順）
+# -------------------------------------------------------------
+
+
+def get_order_table(csv_path: str = os.path.join("data", "オーダ管理.csv")) -> pd.DataFrame:
+    """オーダ管理csvのオーダ番号を並び順のまま索引にしたオーダ情報を返す
+
+    オーダ管理csvの更新時刻が変わらない限り、読み込み済みのものを返す（呼び出し側で変更しないこと）。
+    同じオーダ番号が複数行ある場合は最初の行を使う（OrderInformation.get_project_abbr などと同じ）。
+
+    Args:
+        csv_path (str): オーダ管理CSVファイルのパス
+
+    Returns:
+        pd.DataFrame: オーダ番号を索引とし、project_abbr / order_abbr / order_fullname 列を持つDataFrame
+    """
+    key = os.path.abspath(csv_path)
+    mtime_ns = os.stat(csv_path).st_mtime_ns
+    cached = _order_table_cache.get(key)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    df = Task_def.OrderInformation(csv_path=csv_path).df
+    order_table = df.drop_duplicates(subset="order_number", keep="first").set_index("order_number")
+    _order_table_cache[key] = (mtime_ns, order_table)
+    return order_table
+
+
+def to_order_categorical(order_numbers: pd.Series) -> tuple[pd.Series, np.ndarray]:
+    """オーダ番号列を、オーダ管理csvの並び順の順序付きカテゴリ型に変換する
+
+    オーダ管理csvにないオーダ番号は、csvのオーダ番号の後ろに文字列順で並べる。
+    並べ替え・グループ化はカテゴリのコード（整数）で行われ、PJ略はコードを添字にして引ける。
+
+    Args:
+        order_numbers (pd.Series): オーダ番号列
+
+    Returns:
+        tuple[pd.Series, np.ndarray]: カテゴリ型のオーダ番号列と、コード順のPJ略の配列
+            （csvにないオーダ番号は空文字。末尾に欠損値（コード-1）用の空文字を持つ）
+    """
+    order_table = get_order_table()
+    known = order_table.index
+    extra = pd.Index(order_numbers.dropna().unique()).difference(known)
+    dtype = pd.CategoricalDtype(known.append(extra), ordered=True)
+    project_abbrs = np.concatenate([
+        order_table["project_abbr"].fillna('').to_numpy(dtype=object),
+        np.full(len(extra) + 1, '', dtype=object),
+    ])
+    return order_numbers.astype(dtype), project_abbrs
+
+# -------------------------------------------------------------
+# ファイルパスを受け取る集計関数（WorkLogDay の薄いラッパー）
+# -------------------------------------------------------------
+
+
+def read_WorkLog_df(csv_filepath: str) -> pd.DataFrame:
+    """
+    工数実績CSVファイルを、開始時刻列・終了時刻列をdatetime型として読み込む。
+
+    工数実績ストア（Output_K）に最新の状態で取り込み済みの日はストアから読み込み、
+    それ以外（当日分・未取り込み・pyarrow未インストール）はCSVファイルを読み込む。
+
+    Args:
+        csv_filepath (str): 工数実績CSVファイルのパス（バンドル内の仮想パスを含む）
+
+    Returns:
+        pd.DataFrame: 工数実績のDataFrame
+    """
+    df = Output_K.read_day(csv_filepath)
+    if df is not None:
+        return df
+    return Output_H.read_csv(csv_filepath, parse_dates=['開始時刻', '終了時刻'])
 
 
 def extract_rest_time_from_WorkLog(
@@ -23,74 +254,91 @@ def extract_rest_time_from_WorkLog(
     Returns:
         pd.DataFrame: 休憩時間のDataFrame
     """
-    # 1. 工数実績CSVファイルの全ての行・列をdataframeとして読み込む
-    # ※開始時刻列、終了時刻列はdatetime型として読み込む
-    df = pd.read_csv(csv_filepath, parse_dates=['開始時刻', '終了時刻'])
-    # 秒数を切り捨てて分単位に統一
-    df['開始時刻'] = df['開始時刻'].dt.floor('min')
-    df['終了時刻'] = df['終了時刻'].dt.floor('min')
+    return WorkLogDay(csv_filepath).rest_df
+
+
+def extract_rest_time_from_df(df: pd.DataFrame, day_column: Optional[str] = None) -> pd.DataFrame:
+    """
+    分単位に統一済みの工数実績DataFrameから休憩時間を抽出し、登録用の休憩時間推奨値を計算する。
+
+    複数日分を連結した工数実績（G_dashboard_aggregation.load_worklogs_in_period の結果など）の場合は
+    day_column に日付列を指定すると、日ごとに休憩時間を抽出して先頭列に日付を付けて返す。
+
+    Args:
+        df (pd.DataFrame): 開始時刻・終了時刻の秒数を切り捨てた工数実績
+        day_column (Optional[str]): 日付列の列名。Noneの場合はdf全体を1日分として扱う
 
-    # 2. 休憩時間のみのdfを新規作成
-    rest_records = []
+    Returns:
+        pd.DataFrame: 休憩時間のDataFrame
+    """
+    if day_column is not None:
+        df_breaks = []
+        for day, df_day in df.groupby(day_column, sort=False):
+            df_break = extract_rest_time_from_df(df_day)
+            if not df_break.empty:
+                df_break.insert(0, day_column, day)
+                df_breaks.append(df_break)
+        if not df_breaks:
+            return pd.DataFrame()
+        return pd.concat(df_breaks, ignore_index=True)
+
+    # 2. 各行の終了時刻と次の行の開始時刻の差分を休憩時間として抽出
+    # ※同じ場合（休憩なし）の行は除く
+    current_end = df['終了時刻'].to_numpy()[:-1]
+    next_start = df['開始時刻'].to_numpy()[1:]
+    has_rest = current_end != next_start
+    current_end = current_end[has_rest]
+    next_start = next_start[has_rest]
+    if len(current_end) == 0:
+        return pd.DataFrame()
+    rest_minutes = (next_start - current_end) / np.timedelta64(1, 'm')
+
+    # 3. 指定の分数未満の休憩時間は実績のみ記録し、スキップした休憩時間として蓄積する
+    # 指定の分数以上の休憩時間では、蓄積した休憩時間から最大4分を推奨の休憩時間に加える
+    # （開始側・終了側に1分ずつ交互に移動し、各最大2分）
+    is_short = rest_minutes < 4
+    skipped_cumsum = np.cumsum(np.where(is_short, rest_minutes, 0))
+    adjust_minutes = np.zeros(len(rest_minutes), dtype=int)
     skipped_rest_minutes = 0
-    for i in range(len(df) - 1):
-        current_end = df.iloc[i]['終了時刻']
-        next_start = df.iloc[i + 1]['開始時刻']
-        # 工数実績csvのある行の終了時刻と次の行の開始時刻が同じ場合は、スキップ
-        if current_end == next_start:
-            continue
-        # 工数実績csvのある行の終了時刻と次の行の開始時刻が異なる場合、その差分を休憩時間として抽出
-        rest_minutes = (next_start - current_end).total_seconds() / 60
-
-        # 推奨の休憩記録は指定した分数以上の場合のみ追加
-        if rest_minutes < 4:
-            # 休憩時間が指定の分数未満の場合、実績のみ記録
-            rest_records.append({
-                '休憩(推奨)': None,
-                '休憩開始(推奨)': None,
-                '休憩終了(推奨)': None,
-                '休憩(実績)': int(rest_minutes),
-                '休憩開始(実績)': current_end.strftime("%H:%M"),
-                '休憩終了(実績)': next_start.strftime("%H:%M"),
-            })
-            # 指定の分数未満の休憩時間はスキップし、スキップされた休憩時間を蓄積
-            skipped_rest_minutes += rest_minutes
-
-        else:
-            # 開始側・終了側に1分ずつ移動し、残りがあればさらに1分ずつ移動する（各最大2分）
-            start_adjust = 0
-            end_adjust = 0
-            for _ in range(2):  # 最大2回繰り返して最大合計4分の調整を行う
-                if skipped_rest_minutes >= 1:
-                    skipped_rest_minutes -= 1
-                    start_adjust += 1
-                if skipped_rest_minutes >= 1:
-                    skipped_rest_minutes -= 1
-                    end_adjust += 1
-            current_end_adjusted = current_end - timedelta(minutes=start_adjust)
-            next_start_adjusted = next_start + timedelta(minutes=end_adjust)
-
-
-            rest_minutes_adjusted = (next_start_adjusted - current_end_adjusted).total_seconds() / 60
-
-            rest_records.append({
-                '休憩(推奨)': int(rest_minutes_adjusted),
-                '休憩開始(推奨)': current_end_adjusted.strftime("%H:%M"),
-                '休憩終了(推奨)': next_start_adjusted.strftime("%H:%M"),
-                '休憩(実績)': int(rest_minutes),
-                '休憩開始(実績)': current_end.strftime("%H:%M"),
-                '休憩終了(実績)': next_start.strftime("%H:%M"),
-            })
-
-    df_break = pd.DataFrame(rest_records)
+    consumed_cumsum = 0
+    # 状態を持つのは蓄積分の持ち越しのみのため、ループは推奨記録を作る行（長い休憩）だけで回す
+    for i in np.flatnonzero(~is_short):
+        skipped_rest_minutes += skipped_cumsum[i] - consumed_cumsum
+        consumed_cumsum = skipped_cumsum[i]
+        if skipped_rest_minutes >= 1:
+            adjust_minutes[i] = min(4, int(skipped_rest_minutes))
+            skipped_rest_minutes -= adjust_minutes[i]
+    start_adjust = (adjust_minutes + 1) // 2
+    end_adjust = adjust_minutes // 2
+
+    # 4. 休憩時間のみのdfを作成（推奨値は指定の分数以上の休憩のみ）
+    current_end_minutes = _minute_of_day(current_end)
+    next_start_minutes = _minute_of_day(next_start)
+    rest_minutes_adjusted = rest_minutes + adjust_minutes
+
+    def _only_long(values: np.ndarray) -> list:
+        return np.where(is_short, None, values.astype(object)).tolist()
+
+    df_break = pd.DataFrame({
+        '休憩(推奨)': _only_long(rest_minutes_adjusted.astype(int)),
+        '休憩開始(推奨)': _only_long(_format_minute_of_day(current_end_minutes - start_adjust)),
+        '休憩終了(推奨)': _only_long(_format_minute_of_day(next_start_minutes + end_adjust)),
+        '休憩(実績)': rest_minutes.astype(int).tolist(),
+        '休憩開始(実績)': _format_minute_of_day(current_end_minutes).tolist(),
+        '休憩終了(実績)': _format_minute_of_day(next_start_minutes).tolist(),
+    })
     return df_break
 
 
 def sum_df_each_subtask(csv_filepath: str, include_MTG: bool) -> pd.DataFrame:
 
-    # 1. CSVファイルの全ての行・列をdataframeとして読み込む
-    # ※開始時刻列、終了時刻列はdatetime型として読み込む
-    df = pd.read_csv(csv_filepath, parse_dates=['開始時刻', '終了時刻'])
+    # 1. CSVファイルを読み込み、サブタスクごとに集計する
+    return WorkLogDay(csv_filepath).sum_each_subtask(include_MTG)
+
+
+def sum_df_each_subtask_from_df(df: pd.DataFrame, include_MTG: bool) -> pd.DataFrame:
+    """読み込み済みの工数実績DataFrameから、sum_df_each_subtaskと同じ集計を行う（引数のdfは変更しない）"""
+    df = df.copy()
     # 秒数を切り捨てて分単位に統一
     df['開始時刻'] = df['開始時刻'].dt.floor('min')
     df['終了時刻'] = df['終了時刻'].dt.floor('min')
@@ -130,25 +378,18 @@ def sum_df_each_subtask(csv_filepath: str, include_MTG: bool) -> pd.DataFrame:
 def sum_df_each_order(
         df_sum_subtask: pd.DataFrame) -> pd.DataFrame:
 
-    # 1. 時間列で降順ソート
+    # 1. オーダ番号列をオーダ管理csvの並び順のカテゴリ型に変換し、時間列で降順ソート
     df = df_sum_subtask.copy()
-    df = df.sort_values(by='実時間', ascending=False)
-
-    # 2. df全体をオーダ番号列でソート
-    # ※ソート順は、OrderInformation().df["order_number"]の順番に従う
-    order_info = Task_def.OrderInformation()
-    order_number_index = {num: i for i, num in enumerate(order_info.df["order_number"]) }
-    df_sum_subtask_sorted = df.sort_values(
-        by=['実時間'],
-        ascending=[False],
-    )
+    df['オーダ番号'], _ = to_order_categorical(df['オーダ番号'])
+    df_sum_subtask_sorted = df.sort_values(by='実時間', ascending=False)
 
-    # 3. オーダ番号列が同じ行をグループ化し、時間列を合計する
+    # 3. オーダ番号列が同じ行をグループ化し、時間列を合計する（グループはオーダ管理csvの並び順）
     # ※ 時間列は集計、名前列は結合、他の列は最初の行の値を使用する
-    df_sum_order = df_sum_subtask_sorted.groupby('オーダ番号', as_index=False).agg({
+    df_sum_order = df_sum_subtask_sorted.groupby('オーダ番号', as_index=False, observed=True).agg({
         '実時間': 'sum',
         '名前': lambda x: '  \n'.join(x),
     })
+    df_sum_order['オーダ番号'] = df_sum_order['オーダ番号'].astype(object)
 
     # 4. 時間列を15分単位で切り捨てた「工数」列を作成
     df_truncated = df_sum_order.copy()
@@ -186,12 +427,13 @@ def sum_df_each_order(
     df_truncated['実時間'] = df_truncated['実時間'].astype(int)
     df_truncated['工数'] = df_truncated['工数'].astype(int)
 
-    # 8. オーダ番号列で再度ソート
-    # ※ソート順は、OrderInformation().df["order_number"]の順番に従う
+    # 8. オーダ番号列で再度ソート（追加したZZZ-1050の行を並び順の位置に移す）
+    # ※ソート順は、オーダ管理csvの並び順（カテゴリのコード順）に従う
     df_truncated_sorted = df_truncated.sort_values(
         by=['オーダ番号'],
         ascending=[True],
-        key=lambda col: col.map(order_number_index) if col.name == 'オーダ番号' else col
+        key=lambda col: to_order_categorical(col)[0],
+        kind='stable',
     )
     return df_truncated_sorted
 
@@ -220,12 +462,14 @@ def calc_WorkLog_summary(
         df_truncated: pd.DataFrame,
         add_daytime_break: bool) -> pd.DataFrame:
     # 1. CSVファイルの全ての行・列をdataframeとして読み込む
-    # ※開始時刻列、終了時刻列はdatetime型として読み込む
-    df = pd.read_csv(csv_filepath, parse_dates=['開始時刻', '終了時刻'])
-    # 秒数を切り捨てて分単位に統一
-    df['開始時刻'] = df['開始時刻'].dt.floor('min')
-    df['終了時刻'] = df['終了時刻'].dt.floor('min')
+    return calc_WorkLog_summary_from_df(WorkLogDay(csv_filepath).df, df_truncated, add_daytime_break)
+
 
+def calc_WorkLog_summary_from_df(
+        df: pd.DataFrame,
+        df_truncated: pd.DataFrame,
+        add_daytime_break: bool) -> pd.DataFrame:
+    """分単位に統一済みの工数実績DataFrameから、calc_WorkLog_summaryと同じ集計を行う"""
     # 2. 開始時刻で最も早い行のdatetimeと、終了時刻で最も遅い行のdatetimeを取得
     earliest_start = df['開始時刻'].min()
     latest_end = df['終了時刻'].max()
@@ -266,7 +510,122 @@ def calc_WorkLog_summary(
     return df_output
 
 
-def make_WorkLog_barchart(csv_filepath: str) -> matplotlib.figure.Figure:
+def build_registration_tables_from_df(
+        df: pd.DataFrame,
+        add_daytime_break: bool,
+        day_column: str = 'ファイル日付') -> dict[str, pd.DataFrame]:
+    """
+    複数日分を連結した工数実績から、日ごとのESS・BJP登録用の出力をまとめて作成する。
+
+    各日の結果は、1日分の calc_WorkLog_summary / sum_df_each_order（MTGを含む） /
+    extract_rest_time_from_WorkLog と同じ値になる（15分切り捨て・ZZZ-1050の調整は日ごとに行う）。
+
+    Args:
+        df (pd.DataFrame): 開始時刻・終了時刻の秒数を切り捨てた、複数日分の工数実績
+        add_daytime_break (bool): 昼休憩（60分）を考慮するかどうか
+        day_column (str): 日付列の列名
+
+    Returns:
+        dict[str, pd.DataFrame]: 先頭列に「日付」列を持つ以下の3つのDataFrame
+            "ESS": 日ごとのESS登録用の集計
+            "BJP": 日 × オーダ番号ごとの工数（オーダ番号の並びは sum_df_each_order と同じ）
+            "休憩": 日ごとの休憩時間の推奨値
+    """
+    if df.empty:
+        return {"ESS": pd.DataFrame(), "BJP": pd.DataFrame(), "休憩": pd.DataFrame()}
+
+    other = "ZZZ-1050"
+    days = df[day_column]
+
+    # 1. サブタスクごとの実時間を日ごとに集計する（sum_df_each_subtask と同じ）
+    df_work = pd.DataFrame({
+        day_column: days,
+        'ID': df['タスクID'].astype(str) + df['サブタスクID'].astype(str),
+        '名前': df['タスク名'].astype(str) + " / " + df['サブタスク名'].astype(str),
+        '実時間': (df['終了時刻'] - df['開始時刻']).dt.total_seconds() / 60,
+        'オーダ番号': df['オーダ番号'],
+    })
+    df_subtask = df_work.groupby([day_column, 'ID'], as_index=False).agg({
+        '名前': 'first',
+        '実時間': 'sum',
+        'オーダ番号': 'first',
+    })
+
+    # 2. オーダ番号ごとの実時間を日ごとに集計し、15分単位で切り捨てた工数を計算する
+    # ※名前は実時間の降順に結合する（sum_df_each_order と同じ）
+    df_subtask = df_subtask.sort_values(by=[day_column, '実時間'], ascending=[True, False], kind='stable')
+    df_order = df_subtask.groupby([day_column, 'オーダ番号'], as_index=False, sort=False).agg({
+        '実時間': 'sum',
+        '名前': '  \n'.join,
+    })
+    df_order['工数'] = (df_order['実時間'] // 15) * 15
+
+    # 3. 日ごとに、ZZZ-1050に実時間合計の15分切り捨てとオーダごとの工数合計との差分を割り当てる
+    all_days = pd.Index(days.drop_duplicates().sort_values(), name=day_column)
+    is_other = df_order['オーダ番号'] == other
+    total_real_time = df_order.groupby(day_column)['実時間'].sum().reindex(all_days, fill_value=0)
+    df_non_other = df_order[~is_other].groupby(day_column)[['実時間', '工数']].sum().reindex(all_days, fill_value=0)
+    other_real_time = total_real_time - df_non_other['実時間']
+    other_work_time = (total_real_time // 15 * 15) - df_non_other['工数']
+
+    other_days = df_order.loc[is_other, day_column]
+    df_order.loc[is_other, '実時間'] = other_real_time.reindex(other_days).to_numpy()
+    df_order.loc[is_other, '工数'] = other_work_time.reindex(other_days).to_numpy()
+    df_order.loc[is_other, '名前'] = 'その他'
+    missing_days = all_days.difference(pd.Index(other_days))
+    df_bjp = pd.concat([
+        df_order,
+        pd.DataFrame({
+            day_column: missing_days,
+            'オーダ番号': other,
+            '名前': '工数15分切り捨て分',
+            '実時間': other_real_time.reindex(missing_days).to_numpy(),
+            '工数': other_work_time.reindex(missing_days).to_numpy(),
+        }),
+    ], ignore_index=True)
+    df_bjp['実時間'] = df_bjp['実時間'].astype(int)
+    df_bjp['工数'] = df_bjp['工数'].astype(int)
+
+    # 4. 日付 → オーダ管理csvの順で並べる（オーダ管理csvにないオーダ番号は各日の最後）
+    order_codes, project_abbrs = to_order_categorical(df_bjp['オーダ番号'])
+    df_bjp['_順'] = order_codes.cat.codes
+    df_bjp['PJ略'] = project_abbrs[df_bjp['_順'].to_numpy()]
+    df_bjp = df_bjp.sort_values(by=[day_column, '_順'], kind='stable').reset_index(drop=True)
+
+    # 5. 日ごとのESS登録用の集計（calc_WorkLog_summary と同じ）
+    df_day = df.groupby(day_column).agg(始業=('開始時刻', 'min'), 終業=('終了時刻', 'max')).reindex(all_days)
+    total_stay_minutes = ((df_day['終業'] - df_day['始業']).dt.total_seconds() / 60).astype(int)
+    total_real_minutes = df_bjp.groupby(day_column)['実時間'].sum().reindex(all_days, fill_value=0)
+    daytime_break_minutes = 60 if add_daytime_break else 0
+    total_break_minutes = total_stay_minutes - total_real_minutes - daytime_break_minutes
+
+    is_direct = df_bjp['PJ略'] != '間接'
+    total_work_time = df_bjp.groupby(day_column)['工数'].sum().reindex(all_days, fill_value=0)
+    direct_work_time = df_bjp[is_direct].groupby(day_column)['工数'].sum().reindex(all_days, fill_value=0)
+    direct_indirect_ratio = (direct_work_time / total_work_time.where(total_work_time != 0)).fillna(0.0) * 100
+
+    df_ess = pd.DataFrame({
+        "直間比率": direct_indirect_ratio.map(lambda r: f"{r:.1f} %"),
+        "ESS始業": df_day['始業'].dt.strftime("%H:%M"),
+        "ESS終業": df_day['終業'].dt.strftime("%H:%M"),
+        "ESS滞在": total_stay_minutes.map(_format_minutes_to_hours_minutes),
+        "ESS休憩": total_break_minutes.map(_format_minutes_to_hours_minutes),
+        "ESS実働": total_real_minutes.map(_format_minutes_to_hours_minutes),
+        "BJP合計": (total_real_minutes // 15 * 15).map(_format_minutes_to_hours_minutes),
+    }).reset_index()
+
+    df_bjp = df_bjp[[day_column, 'オーダ番号', '工数', '実時間', '名前']]
+
+    # 6. 日ごとの休憩時間の推奨値
+    df_rest = extract_rest_time_from_df(df, day_column=day_column)
+
+    return {
+        name: table.rename(columns={day_column: '日付'})
+        for name, table in {"ESS": df_ess, "BJP": df_bjp, "休憩": df_rest}.items()
+    }
+
+
+def make_WorkLog_barchart(csv_filepath: str) -> "matplotlib.figure.Figure":
     """
     工数実績CSVファイルから、1日を3つの時間帯（5:00～13:00、13:00～21:00、21:00～翌5:00）に分割した横棒グラフ（ガントチャート風）を作成して返す。
 
@@ -278,57 +637,30 @@ def make_WorkLog_barchart(csv_filepath: str) -> matplotlib.figure.Figure:
     Returns:
         matplotlib.figure.Figure: 作成した3分割ガントチャートのFigureオブジェクト。
     """
-    # 1. CSVファイルの全ての行・列をdataframeとして読み込む
-    # ※開始時刻列、終了時刻列はdatetime型として読み込む
-
-    df = pd.read_csv(csv_filepath, parse_dates=['開始時刻', '終了時刻'])
-    # 秒数を切り捨てて分単位に統一
-    df['開始時刻'] = df['開始時刻'].dt.floor('min')
-    df['終了時刻'] = df['終了時刻'].dt.floor('min')
+    return WorkLogDay(csv_filepath).barchart
 
-    # 2. 全タスクを1本の横棒（同じy位置）にbroken_barhで描画
-    df['タスク表示名'] = df['タスク名'].astype(str) + ' / ' + df['サブタスク名'].astype(str)
 
-    # 5時～13時、13時～21時、21時～翌5時の3分割
-    def _get_time_range3(dt):
-        t = dt.time()
-        if t >= datetime.strptime('05:00', '%H:%M').time() and t < datetime.strptime('13:00', '%H:%M').time():
-            return 'morning'
-        elif t >= datetime.strptime('13:00', '%H:%M').time() and t < datetime.strptime('21:00', '%H:%M').time():
-            return 'afternoon'
-        else:
-            return 'night'
+def make_WorkLog_barchart_from_df(df: pd.DataFrame) -> "matplotlib.figure.Figure":
+    """分単位に統一済みの工数実績DataFrameから、make_WorkLog_barchartと同じグラフを作成する"""
+    import matplotlib.dates as mdates
+    import matplotlib.pyplot as plt
 
-    df['時間帯'] = df['開始時刻'].apply(_get_time_range3)
-    df_morning = df[df['時間帯'] == 'morning']
-    df_afternoon = df[df['時間帯'] == 'afternoon']
-    df_night = df[df['時間帯'] == 'night']
+    # 1. 各行の横棒の位置（時間帯・開始・幅）と色を計算
+    bars = _calc_WorkLog_bars(df)
+    bars['開始'] = mdates.date2num(bars['開始時刻'].to_numpy())
+    bars['幅'] = (bars['終了時刻'] - bars['開始時刻']).dt.total_seconds().to_numpy() / 86400
+    # 黄金比で分散させた色相をカラーマップの色に変換
+    colors = plt.cm.hsv(bars['色相'].to_numpy())
 
+    # 2. 時間帯ごとに、全タスクを1本の横棒（同じy位置）にbroken_barhで描画
     fig, axes = plt.subplots(3, 1, figsize=(15, 2), sharex=False)
-
-    # fig全体で色を一意に割り当てる
-    # 黄金比を使って色相を分散させ、隣接する行でも色が区別しやすいようにする
-    all_indices = df.index.tolist()
-    golden_ratio = 0.618033988749895
-    index_to_color = {}
-    for i, idx in enumerate(all_indices):
-        hue = (i * golden_ratio) % 1.0
-        index_to_color[idx] = plt.cm.hsv(hue)
-
-    def _draw_timeband(ax, df_band, start_time, end_time):
-        barh_data = []
-        color_list = []
-        text_data = []
-        for _, row in df_band.iterrows():
-            start = mdates.date2num(row['開始時刻'])
-            duration = (row['終了時刻'] - row['開始時刻']).total_seconds() / 86400
-            barh_data.append((start, duration))
-            # 全体dfのindexを使って色を割り当て（黄金比で分散）
-            color_list.append(index_to_color[row.name])
-            text_data.append((start + duration / 2, str(row.name)))
-        if barh_data:
-            ax.broken_barh(barh_data, (0.7, 0.4), facecolors=color_list)
-            for x_center, label in text_data:
+    for band, (ax, (start_time, end_time)) in enumerate(zip(axes, _calc_WorkLog_band_ranges(df))):
+        in_band = (bars['時間帯'] == band).to_numpy()
+        df_band = bars[in_band]
+        if not df_band.empty:
+            ax.broken_barh(
+                list(zip(df_band['開始'], df_band['幅'])), (0.7, 0.4), facecolors=colors[in_band])
+            for x_center, label in zip(df_band['開始'] + df_band['幅'] / 2, df_band['ラベル']):
                 ax.text(
                     x_center, 0.9, label, ha='center', va='center',
                     fontsize=12, clip_on=True, color='black', fontweight='extra bold')
@@ -341,26 +673,131 @@ def make_WorkLog_barchart(csv_filepath: str) -> matplotlib.figure.Figure:
         ax.xaxis.grid(True, which='minor', linestyle='dotted', color='gray', linewidth=0.8)
         ax.set_xlim(mdates.date2num(start_time), mdates.date2num(end_time))
 
-    # 5:00～13:00
-    morning_start = datetime.combine(df['開始時刻'].min().date(), datetime.strptime('05:00', '%H:%M').time())
-    morning_end = datetime.combine(df['開始時刻'].min().date(), datetime.strptime('13:00', '%H:%M').time())
-    _draw_timeband(axes[0], df_morning, morning_start, morning_end)
+    fig.tight_layout()
+    return fig
 
-    # 13:00～21:00
-    afternoon_start = datetime.combine(df['開始時刻'].min().date(), datetime.strptime('13:00', '%H:%M').time())
-    afternoon_end = datetime.combine(df['開始時刻'].min().date(), datetime.strptime('21:00', '%H:%M').time())
-    _draw_timeband(axes[1], df_afternoon, afternoon_start, afternoon_end)
 
-    # 21:00～翌5:00
-    night_start = datetime.combine(df['開始時刻'].min().date(), datetime.strptime('21:00', '%H:%M').time())
-    next_day = df['開始時刻'].min().date() + timedelta(days=1)
-    night_end = datetime.combine(next_day, datetime.strptime('05:00', '%H:%M').time())
-    _draw_timeband(axes[2], df_night, night_start, night_end)
+def render_WorkLog_barchart_png(df: pd.DataFrame, dpi: int = 200) -> bytes:
+    """make_WorkLog_barchart_from_df と同じグラフをPNG画像のバイト列にして返す（描画後のFigureは閉じる）
 
-    fig.tight_layout()
+    Args:
+        df (pd.DataFrame): 分単位に統一済みの工数実績
+        dpi (int): 画像の解像度
+
+    Returns:
+        bytes: PNG画像
+    """
+    import matplotlib.pyplot as plt
+
+    fig = make_WorkLog_barchart_from_df(df)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def make_WorkLog_barchart_plotly_from_df(df: pd.DataFrame) -> "plotly.graph_objects.Figure":
+    """
+    分単位に統一済みの工数実績DataFrameから、make_WorkLog_barchartと同じ3分割のガントチャートを
+    操作可能な（拡大・ホバー表示できる）plotlyのFigureとして作成する。matplotlibは読み込まない。
+
+    Args:
+        df (pd.DataFrame): 分単位に統一済みの工数実績
+
+    Returns:
+        plotly.graph_objects.Figure: 作成した3分割ガントチャート
+    """
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    bars = _calc_WorkLog_bars(df)
+    bars['色'] = [_hue_to_hex(hue) for hue in bars['色相']]
+    bars['名前'] = df['タスク名'].astype(str).to_numpy() + ' / ' + df['サブタスク名'].astype(str).to_numpy()
+    bars['幅'] = (bars['終了時刻'] - bars['開始時刻']).dt.total_seconds() * 1000
+
+    fig = make_subplots(rows=3, cols=1, vertical_spacing=0.12)
+    for band, (start_time, end_time) in enumerate(_calc_WorkLog_band_ranges(df)):
+        df_band = bars[bars['時間帯'] == band]
+        fig.add_trace(go.Bar(
+            base=df_band['開始時刻'],
+            x=df_band['幅'],
+            y=[''] * len(df_band),
+            orientation='h',
+            marker_color=df_band['色'],
+            text=df_band['ラベル'],
+            textposition='inside',
+            insidetextanchor='middle',
+            customdata=df_band[['名前', '開始時刻', '終了時刻']].astype(str).to_numpy(),
+            hovertemplate='%{customdata[0]}<br>%{customdata[1]} ～ %{customdata[2]}<extra></extra>',
+            showlegend=False,
+        ), row=band + 1, col=1)
+        fig.update_xaxes(
+            type='date', range=[start_time, end_time], dtick=30 * 60 * 1000, tickformat='%H:%M',
+            row=band + 1, col=1)
+    fig.update_yaxes(showticklabels=False)
+    fig.update_layout(height=300, margin=dict(l=10, r=10, t=10, b=10), barmode='overlay')
     return fig
 
 
+def _calc_WorkLog_bars(df: pd.DataFrame) -> pd.DataFrame:
+    """ガントチャートの各行の横棒の情報（時間帯・開始時刻・終了時刻・ラベル・色相）を計算する
+
+    時間帯は開始時刻で決める（0: 5時～13時、1: 13時～21時、2: 21時～翌5時）。
+    色相は全行を通して黄金比で分散させ、隣接する行でも色が区別しやすいようにする。
+    """
+    start_minutes = _minute_of_day(df['開始時刻'].to_numpy())
+    band = np.select(
+        [(start_minutes >= 5 * 60) & (start_minutes < 13 * 60),
+         (start_minutes >= 13 * 60) & (start_minutes < 21 * 60)],
+        [0, 1], default=2)
+    golden_ratio = 0.618033988749895
+    return pd.DataFrame({
+        '時間帯': band,
+        '開始時刻': df['開始時刻'].to_numpy(),
+        '終了時刻': df['終了時刻'].to_numpy(),
+        'ラベル': df.index.astype(str),
+        '色相': (np.arange(len(df)) * golden_ratio) % 1.0,
+    })
+
+
+def _calc_WorkLog_band_ranges(df: pd.DataFrame) -> list[tuple[datetime, datetime]]:
+    """最初の開始時刻の日付を基準に、3つの時間帯（5時～13時、13時～21時、21時～翌5時）の範囲を返す"""
+    base = datetime.combine(df['開始時刻'].min().date(), datetime.min.time())
+    return [
+        (base + timedelta(hours=5), base + timedelta(hours=13)),
+        (base + timedelta(hours=13), base + timedelta(hours=21)),
+        (base + timedelta(hours=21), base + timedelta(days=1, hours=5)),
+    ]
+
+
+def _hue_to_hex(hue: float) -> str:
+    """色相を16進数カラーコードに変換する（彩度・明度は最大）"""
+    r, g, b = colorsys.hsv_to_rgb(hue, 1.0, 1.0)
+    return f"#{int(r * 255):02x}{int(g * 255):02x}{int(b * 255):02x}"
+
+
+def _file_signature(path: str) -> str:
+    """ファイル（バンドル内の仮想パスの場合はバンドル）の更新時刻とサイズを表す文字列を返す"""
+    target = path if os.path.exists(path) else os.path.dirname(path)
+    try:
+        stat = os.stat(target)
+    except FileNotFoundError:
+        return ""
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _minute_of_day(values: np.ndarray) -> np.ndarray:
+    """datetime64の配列を、0時からの経過分数（0～1439）の配列に変換する"""
+    return (values.astype('datetime64[m]').astype(np.int64)) % MINUTES_PER_DAY
+
+
+def _format_minute_of_day(minutes: np.ndarray) -> np.ndarray:
+    """0時からの経過分数の配列を"%H:%M"形式の文字列の配列に変換する（日をまたぐ分数は24時間で折り返す）"""
+    return _HHMM_LABELS[minutes % MINUTES_PER_DAY]
+
+
 def _format_minutes_to_hours_minutes(minutes: int) -> str:
     hours = minutes // 60
     mins = minutes % 60
@@ -377,13 +814,12 @@ def _calc_direct_indirect_ratio(df_sum_order: pd.DataFrame) -> float:
     Returns:
         float: 直接工数と間接工数の比率（直接工数 / 総工数）
     """
-    # 1. dfのオーダ番号列をキーにしてOrderInformation()から各行のPJ略を取得する
-    order_info = Task_def.OrderInformation()
-    order_abbr_map = order_info.df.set_index("order_number")["project_abbr"]
+    # 1. dfのオーダ番号列をオーダ管理csvの並び順のカテゴリ型に変換する
+    order_codes, project_abbrs = to_order_categorical(df_sum_order['オーダ番号'])
 
-    # 2. dfにPJ略列を追加する
+    # 2. カテゴリのコードを添字にしてPJ略を引き、dfにPJ略列を追加する
     df = df_sum_order.copy()
-    df['PJ略'] = df['オーダ番号'].map(order_abbr_map).fillna('')
+    df['PJ略'] = project_abbrs[order_codes.cat.codes.to_numpy()]
 
     # 3. PJ略列が"間接"以外行の工数を合計する
     direct_work_time = df[df['PJ略'] != '間接']['工数'].sum()
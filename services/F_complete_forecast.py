@@ -1,91 +1,570 @@
-import importlib.util
+import hashlib
+import json
 import os
 import sys
-from datetime import datetime, timedelta
-from typing import Any, Optional
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import BinaryIO, Iterator, Optional, Union
 
+import jpholiday
+import numpy as np
 import pandas as pd
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import models.Task_definition as Task_def
+import services.M_local_config as Output_M
 
-# data/upload_path/my_upload_folder.py を型安全にインポート
-my_upload_folder: Any
-try:
-    spec = importlib.util.spec_from_file_location(
-        "my_upload_folder",
-        os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'upload_path', 'my_upload_folder.py'))
-    )
-    if spec and spec.loader:
-        my_upload_folder = importlib.util.module_from_spec(spec)
-        sys.modules["my_upload_folder"] = my_upload_folder
-        spec.loader.exec_module(my_upload_folder)
-    else:
-        raise ImportError("Could not load my_upload_folder module")
-except Exception as e:
-    raise ImportError(f"my_upload_folderのインポートに失敗しました: {e}")
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 完了済タスクcsvの保存先フォルダ
+COMPLETE_FOLDER = os.path.join(BASE_DIR, "data", "Project", "Complete")
+
+# 完了予測の対象とするActiveタスクcsvの保存先フォルダ
+ACTIVE_FOLDER = os.path.join(BASE_DIR, "data", "Project", "Active")
+
+# オーダ管理csv（オーダ管理.csvを優先、見つからない場合のみold参照）
+ORDER_CSV_PATH = os.path.join(BASE_DIR, "data", "オーダ管理.csv")
+ORDER_OLD_CSV_PATH = os.path.join(BASE_DIR, "data", "オーダ管理_old.csv")
+
+# 出力ファイル名
+OUTPUT_FILENAME = "完了済タスク一覧.csv"
+
+# 出力済みタスクのマニフェスト（出力先フォルダではなくローカルのdataフォルダに置く）
+MANIFEST_PATH = os.path.join(BASE_DIR, "data", "完了済タスク一覧_manifest.json")
+
+# 書き出し中の一時ファイルの拡張子（出力先フォルダ内に作成し、完了後に置き換える）
+TMP_SUFFIX = ".tmp"
+
+# 前回の出力からバイト列をコピーするときの読み込み単位
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# 完了済タスク一覧.csvの列
+COMPLETED_TASK_COLUMNS = [
+    "タスクID+サブID", "PJ略", "オーダ番号", "オーダ略称", "タスク名", "サブ名",
+    "見込み", "実績", "当初作業", "ノミナル", "サブ順序", "削除フラグ",
+]
+
+# 完了予測: 見込み時間の区分の境界（分）。30分未満, 30-60分, 60-120分, 120-240分, 240分以上の5区分
+ESTIMATE_SIZE_BINS = [30, 60, 120, 240]
+
+# 完了予測: 区分の実績/見込み比率がこの件数未満の場合、より粗い区分の比率を使う
+MIN_SEGMENT_SAMPLES = 5
+
+# 完了予測: 1タスクあたりの試行回数
+DEFAULT_DRAWS = 2000
 
+# 完了予測: 1タスクに1営業日あたり充てられる作業時間（分）
+DEFAULT_DAILY_MINUTES = 120
 
-def output_completed_tasks() -> None:
+# 完了予測: 出力する完了日のパーセンタイル
+FORECAST_PERCENTILES = [50, 80, 95]
+
+# 完了予測: 一度に試行する (試行回数 × サブタスク数) の要素数の上限（タスク単位に区切り、メモリ使用量を一定に抑える）
+FORECAST_BLOCK_ELEMENTS = 1_000_000
+
+# 完了済サブタスクの履歴のキャッシュ（完了済タスクcsvの更新時刻・サイズが変わったら読み込み直す）
+_history_cache: dict = {}
+
+
+def output_completed_tasks(full: bool = False) -> list[str]:
     """Project/Complete フォルダに存在するタスクcsvを全て結合したcsvを作成する
 
+    前回の出力時のマニフェスト（タスクごとのcsvの内容のハッシュと出力ファイル内の位置）と比べ、
+    追加・変更・削除されたタスクのみを読み込み、変更のないタスクは前回の出力の行をそのまま使う。
+    出力は一時ファイルに1タスクずつ書き出してから置き換えるため、途中で失敗しても前回の出力は壊れず、
+    メモリ使用量は完了済タスクの件数によらない。
+    出力ファイル・オーダ管理csvが前回の出力後に変更されている場合は全て出力し直す。
+
+    Args:
+        full (bool): Trueの場合、マニフェストを使わずに全て出力し直す
+
     Returns:
-        None: 返り値なし。出力先フォルダに完了済タスク一覧.csvを作成する
+        list[str]: 読み込み直して出力したタスクID（変更がない場合は空）
+    """
+    # data/upload_path/my_upload_folder.py は出力時に読み込む
+    my_upload_folder = Output_M.get_config("upload_path")
+    output_path = os.path.abspath(os.path.join(my_upload_folder.my_upload_folder_path, OUTPUT_FILENAME))
+
+    # 1. 前回の出力が使えるか確認する（使えない場合は全て出力し直す）
+    manifest = {} if full else _read_manifest()
+    order_signature = [_file_signature(ORDER_CSV_PATH), _file_signature(ORDER_OLD_CSV_PATH)]
+    if (manifest.get("output_path") != output_path
+            or manifest.get("output_signature") != _file_signature(output_path)
+            or manifest.get("order_signature") != order_signature):
+        manifest = {"tasks": []}
+    exported = manifest["tasks"]
+
+    # 2. completeフォルダのタスクcsvと前回の出力を比べ、追加・変更・削除されたタスクを判定する
+    current = _scan_task_csvs(COMPLETE_FOLDER)
+    hashes = {}
+    changed_ids = set()
+    for entry in exported:
+        path = current.get(entry["task_id"])
+        if path is None:
+            changed_ids.add(entry["task_id"])  # 削除されたタスク
+            continue
+        signature = _file_signature(path)
+        if signature == entry["signature"]:
+            continue
+        # 更新時刻・サイズが変わった場合のみ内容のハッシュを比べる
+        hashes[entry["task_id"]] = _file_hash(path)
+        if hashes[entry["task_id"]] != entry["hash"]:
+            changed_ids.add(entry["task_id"])
+        entry["signature"] = signature
+    exported_ids = {entry["task_id"] for entry in exported}
+    new_ids = [task_id for task_id in current if task_id not in exported_ids]
+
+    if not changed_ids and not new_ids and exported:
+        _write_manifest(manifest)  # 更新時刻のみ変わったタスクの記録を更新する
+        return []
+
+    # 3. 一時ファイルに、変更のないタスクは前回の出力からバイト列をそのままコピーし、
+    # 追加・変更されたタスクは1件ずつ読み込んで書き出す（全タスクの行をメモリに溜めない）
+    order_info = Task_def.OrderInformation(ORDER_CSV_PATH)
+    order_info_old = Task_def.OrderInformation(ORDER_OLD_CSV_PATH)
+    parsed_ids = []
+    new_entries = []
+    tmp_path = output_path + TMP_SUFFIX
+    try:
+        with open(tmp_path, "wb") as out, _open_or_none(output_path if exported else None) as old:
+            out.write(_header_bytes())
+            for entry in exported:
+                task_id = entry["task_id"]
+                if task_id not in current:
+                    continue  # 削除されたタスクは出力しない
+                if task_id in changed_ids:
+                    new_entries.append(_write_task_rows(out, task_id, current[task_id], hashes, order_info, order_info_old))
+                    parsed_ids.append(task_id)
+                else:
+                    offset = out.tell()
+                    _copy_range(old, out, entry["offset"], entry["length"])
+                    new_entries.append(dict(entry, offset=offset))
+            for task_id in new_ids:
+                new_entries.append(_write_task_rows(out, task_id, current[task_id], hashes, order_info, order_info_old))
+                parsed_ids.append(task_id)
+            offset = out.tell()
+
+        # 4. 一時ファイルを出力ファイルに置き換え、マニフェストを更新する
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    _write_manifest({
+        "output_path": output_path,
+        "output_signature": _file_signature(output_path),
+        "output_size": offset,
+        "order_signature": order_signature,
+        "tasks": new_entries,
+    })
+    return parsed_ids
+
+# -------------------------------------------------------------
+# 完了予測（完了済サブタスクの実績/見込み比率によるモンテカルロ法）
+# -------------------------------------------------------------
+
+class CompletionForecaster:
+    """完了済サブタスクの実績/見込み比率の分布から、Activeタスクの完了日をモンテカルロ法で予測するクラス
+
+    比率はオーダ番号・当初作業・ノミナル・見込み時間の区分ごとに集め、件数が少ない区分は
+    (当初作業, ノミナル, 見込み区分) → (見込み区分) → 全体 の順に粗い区分の比率で代用する。
+
+    Attributes:
+        pool (np.ndarray): 全区分の比率を区分ごとに連結した配列
+        segments (dict[tuple, tuple[int, int]]): 区分のキーから pool 内の (開始位置, 件数) への辞書
     """
 
-    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    def __init__(self, history: pd.DataFrame):
+        """
+        Args:
+            history (pd.DataFrame): 完了済サブタスクの履歴（load_completed_subtask_history() の戻り値）
+        """
+        history = history[(history["estimated_time"] > 0) & (history["actual_time"] > 0)]
+        history = history.assign(
+            ratio=history["actual_time"] / history["estimated_time"],
+            size=_estimate_size(history["estimated_time"]),
+        )
+
+        chunks = []
+        self.segments: dict[tuple, tuple[int, int]] = {}
+        offset = 0
+        for level, keys in enumerate(_SEGMENT_LEVELS):
+            groups = history.groupby(list(keys), sort=False)["ratio"] if keys else [((), history["ratio"])]
+            for key, ratios in groups:
+                if len(ratios) < MIN_SEGMENT_SAMPLES and keys:
+                    continue
+                if len(ratios) == 0:
+                    continue
+                key = key if isinstance(key, tuple) else (key,)
+                self.segments[(level,) + key] = (offset, len(ratios))
+                chunks.append(ratios.to_numpy(dtype=float))
+                offset += len(ratios)
+
+        # 履歴がない場合は見込み通り（比率1）とする
+        if not chunks:
+            chunks.append(np.ones(1))
+            self.segments[(len(_SEGMENT_LEVELS) - 1,)] = (0, 1)
+        self.pool = np.concatenate(chunks)
+
+    def forecast(
+            self,
+            tasks: dict[str, Task_def.Task],
+            start_date: Optional[date] = None,
+            n_draws: int = DEFAULT_DRAWS,
+            daily_minutes: Union[float, dict[str, float]] = DEFAULT_DAILY_MINUTES,
+            seed: Optional[int] = None) -> pd.DataFrame:
+        """各タスクの未完了サブタスクの残り時間を比率の分布から試行し、完了日のパーセンタイルを返す
+
+        全タスクの未完了サブタスクを1つの配列にまとめ、(試行回数, サブタスク数) の配列演算で試行する。
+        配列はタスク単位のブロック（要素数 FORECAST_BLOCK_ELEMENTS まで）に区切り、ブロックごとに
+        パーセンタイルまで求めるため、タスク数が多くてもメモリ使用量は一定に抑えられる。
+        着手済の未完了サブタスクは、試行した所要時間から実績時間を差し引いた時間を残り時間とする。
+
+        Args:
+            tasks (dict[str, Task_def.Task]): タスクIDをキー、Taskオブジェクトを値とする辞書
+            start_date (Optional[date]): 作業を始める日。指定しない場合はESS基準の今日
+            n_draws (int): 1タスクあたりの試行回数
+            daily_minutes (Union[float, dict[str, float]]): 1営業日あたりの作業時間（分）。タスクIDごとの辞書も可
+            seed (Optional[int]): 乱数のシード
+
+        Raises:
+            ValueError: 1営業日あたりの作業時間が0以下のタスクがある場合
 
-    # completeフォルダに存在するtask csvを全てTaskオブジェクトとして取得
-    complete_folder = os.path.join(base_dir, "data", "Project", "Complete")
-    tasks = Task_def.read_all_task_csvs(complete_folder)
+        Returns:
+            pd.DataFrame: タスクID, 残り時間P50/P80/P95（分）, 完了予測P50/P80/P95（YYYY-MM-DD）のDataFrame
+        """
+        if start_date is None:
+            start_date = Task_def.get_ESS_dt().date()
+        task_ids = list(tasks)
 
-    # OrderInformationを2インスタンス作成（オーダ管理.csvを優先、見つからない場合のみold参照）
-    order_info = Task_def.OrderInformation(os.path.join(base_dir, "data", "オーダ管理.csv"))
-    order_info_old = Task_def.OrderInformation(os.path.join(base_dir, "data", "オーダ管理_old.csv"))
+        if isinstance(daily_minutes, dict):
+            capacity = np.array([daily_minutes.get(task_id, DEFAULT_DAILY_MINUTES) for task_id in task_ids], dtype=float)
+        else:
+            capacity = np.full(len(task_ids), float(daily_minutes))
+        invalid = ~(capacity > 0)
+        if invalid.any():
+            raise ValueError(
+                f"1営業日あたりの作業時間は0より大きい値を指定してください: {np.array(task_ids)[invalid].tolist()}")
+
+        # 1. 全タスクの未完了サブタスクを連結し、サブタスクごとに比率を引く区分を決める
+        estimates, spent, offsets, lengths = [], [], [], []
+        task_sizes = np.zeros(len(task_ids), dtype=np.int64)
+        for i, task_id in enumerate(task_ids):
+            estimated, actual, initial, nominal = _remaining_subtask_arrays(tasks[task_id])
+            task_sizes[i] = len(estimated)
+            if len(estimated) == 0:
+                continue
+            order_number = tasks[task_id].order_number or ""
+            for flags in zip(initial, nominal, _estimate_size(estimated)):
+                offset, length = self._find_segment(order_number, bool(flags[0]), bool(flags[1]), int(flags[2]))
+                offsets.append(offset)
+                lengths.append(length)
+            estimates.append(estimated)
+            spent.append(actual)
+
+        remaining_minutes = np.zeros((len(FORECAST_PERCENTILES), len(task_ids)))
+        if estimates:
+            estimates = np.concatenate(estimates)
+            spent = np.concatenate(spent)
+            offsets = np.array(offsets, dtype=np.int64)
+            lengths = np.array(lengths, dtype=np.float64)
+            task_starts = np.r_[0, np.cumsum(task_sizes)]
+            rng = np.random.default_rng(seed)
+
+            for first, last in _split_task_blocks(task_sizes, max(FORECAST_BLOCK_ELEMENTS // n_draws, 1)):
+                lo, hi = task_starts[first], task_starts[last]
+                if lo == hi:
+                    continue  # 未完了サブタスクのないタスクのみのブロックは残り時間0
+                # 2. (試行回数, ブロックのサブタスク数) の一様乱数から、サブタスクごとの区分の比率を一括で引く
+                draws = (rng.random((n_draws, hi - lo)) * lengths[lo:hi]).astype(np.int64)
+                draws += offsets[lo:hi]
+                minutes = self.pool[draws]
+                minutes *= estimates[lo:hi]
+                minutes -= spent[lo:hi]
+                np.maximum(minutes, 0, out=minutes)
+                del draws
+
+                # 3. タスクごとに残り時間を合計し、パーセンタイルを求める（サブタスクはタスク順に連結済み）
+                totals = np.zeros((n_draws, last - first))
+                has_subtasks = np.flatnonzero(task_sizes[first:last] > 0)
+                totals[:, has_subtasks] = np.add.reduceat(
+                    minutes, task_starts[first:last][has_subtasks] - lo, axis=1)
+                remaining_minutes[:, first:last] = np.percentile(totals, FORECAST_PERCENTILES, axis=0)
+
+        # 4. 残り時間のパーセンタイルを営業日数に換算し、祝日を除いた完了日を求める
+        days = np.maximum(np.ceil(remaining_minutes / capacity) - 1, 0).astype(np.int64)
+        completion = _add_business_days(start_date, days)
+
+        result = pd.DataFrame({"タスクID": task_ids})
+        for k, percentile in enumerate(FORECAST_PERCENTILES):
+            result[f"残り時間P{percentile}"] = np.round(remaining_minutes[k]).astype(int)
+        for k, percentile in enumerate(FORECAST_PERCENTILES):
+            result[f"完了予測P{percentile}"] = pd.to_datetime(completion[k]).strftime("%Y-%m-%d")
+        return result
+
+    def _find_segment(self, order_number: str, is_initial: bool, is_nominal: bool, size: int) -> tuple[int, int]:
+        """サブタスクの比率を引く区分の (開始位置, 件数) を、細かい区分から順に探して返す"""
+        values = {"order_number": order_number, "is_initial": is_initial, "is_nominal": is_nominal, "size": size}
+        for level, keys in enumerate(_SEGMENT_LEVELS):
+            segment = self.segments.get((level,) + tuple(values[k] for k in keys))
+            if segment is not None:
+                return segment
+        raise KeyError("比率の区分が見つかりません")
+
+
+def load_completed_subtask_history(folder_path: Optional[str] = None) -> pd.DataFrame:
+    """完了済タスクcsvのサブタスクを1つのDataFrameにまとめて返す（csvが変わらない間はキャッシュを返す）
+
+    Args:
+        folder_path (Optional[str]): 完了済タスクcsvの保存先フォルダ。指定しない場合はCOMPLETE_FOLDER
+
+    Returns:
+        pd.DataFrame: order_number, is_initial, is_nominal, estimated_time, actual_time のDataFrame
+    """
+    folder_path = folder_path or COMPLETE_FOLDER
+    paths = _scan_task_csvs(folder_path)
+    key = (folder_path, tuple(sorted((path, _file_signature(path)) for path in paths.values())))
+    if _history_cache.get("key") == key:
+        return _history_cache["df"]
 
-    # サブタスク行にタスクID情報を付加する
-    all_rows = []
-    for task_id, task in tasks.items():
+    frames = []
+    for path in paths.values():
+        task = Task_def.read_task_csv(path)
         if task.sub_tasks.empty:
             continue
+        frames.append(task.sub_tasks[list(_HISTORY_COLUMNS[1:])].assign(order_number=task.order_number or ""))
+    if frames:
+        df = pd.concat(frames, ignore_index=True)[list(_HISTORY_COLUMNS)]
+    else:
+        df = pd.DataFrame(columns=list(_HISTORY_COLUMNS))
+    _history_cache.update(key=key, df=df)
+    return df
+
+
+def forecast_active_tasks(
+        n_draws: int = DEFAULT_DRAWS,
+        daily_minutes: Union[float, dict[str, float]] = DEFAULT_DAILY_MINUTES,
+        seed: Optional[int] = None) -> pd.DataFrame:
+    """Project/Activeの全タスクの完了日を、Project/Completeの履歴から予測する
+
+    Args:
+        n_draws (int): 1タスクあたりの試行回数
+        daily_minutes (Union[float, dict[str, float]]): 1営業日あたりの作業時間（分）。タスクIDごとの辞書も可
+        seed (Optional[int]): 乱数のシード
+
+    Returns:
+        pd.DataFrame: CompletionForecaster.forecast() の戻り値
+    """
+    tasks = Task_def.read_all_task_csvs(ACTIVE_FOLDER) if os.path.exists(ACTIVE_FOLDER) else {}
+    forecaster = CompletionForecaster(load_completed_subtask_history())
+    return forecaster.forecast(tasks, n_draws=n_draws, daily_minutes=daily_minutes, seed=seed)
+
+# -------------------------------------------------------------
+# 上記の関数で使用する補助関数群
+# -------------------------------------------------------------
+
+def _build_task_rows(
+        task: Task_def.Task,
+        order_info: Task_def.OrderInformation,
+        order_info_old: Task_def.OrderInformation) -> pd.DataFrame:
+    """1タスク分のサブタスク行にタスクID情報を付加したDataFrameを作成する"""
+    order_number = task.order_number or ""
+
+    pj_abbr = order_info.get_project_abbr(order_number)
+    if not pj_abbr:
+        pj_abbr = order_info_old.get_project_abbr(order_number)
+
+    order_abbr = order_info.get_order_abbr(order_number)
+    if not order_abbr:
+        order_abbr = order_info_old.get_order_abbr(order_number)
+
+    sub_tasks = task.sub_tasks.sort_values("sort_index")
+    return pd.DataFrame({
+        "タスクID+サブID": task.task_id + sub_tasks["subtask_id"].astype(str),
+        "PJ略": pj_abbr,
+        "オーダ番号": order_number,
+        "オーダ略称": order_abbr,
+        "タスク名": task.name,
+        "サブ名": sub_tasks["name"],
+        "見込み": sub_tasks["estimated_time"],
+        "実績": sub_tasks["actual_time"],
+        "当初作業": sub_tasks["is_initial"],
+        "ノミナル": sub_tasks["is_nominal"],
+        "サブ順序": sub_tasks["sort_index"],
+        # 削除フラグ: 実績時間が0ならTrue、それ以外はFalse
+        "削除フラグ": sub_tasks["actual_time"].astype(int) == 0,
+    }, columns=COMPLETED_TASK_COLUMNS)
+
+
+def _write_task_rows(
+        out: BinaryIO,
+        task_id: str,
+        path: str,
+        hashes: dict[str, str],
+        order_info: Task_def.OrderInformation,
+        order_info_old: Task_def.OrderInformation) -> dict:
+    """1タスク分のcsvを読み込んで出力行を書き出し、マニフェストの記録を返す"""
+    offset = out.tell()
+    data = _build_task_rows_bytes(Task_def.read_task_csv(path), order_info, order_info_old)
+    out.write(data)
+    return {
+        "task_id": task_id,
+        "signature": _file_signature(path),
+        "hash": hashes[task_id] if task_id in hashes else _file_hash(path),
+        "offset": offset,
+        "length": len(data),
+    }
+
+
+def _build_task_rows_bytes(
+        task: Task_def.Task,
+        order_info: Task_def.OrderInformation,
+        order_info_old: Task_def.OrderInformation) -> bytes:
+    """1タスク分の出力行（ヘッダーなし）をバイト列で返す。サブタスクがない場合は空"""
+    if task.sub_tasks.empty:
+        return b""
+    rows = _build_task_rows(task, order_info, order_info_old)
+    return rows.to_csv(index=False, header=False).encode("utf-8")
+
+
+def _header_bytes() -> bytes:
+    """出力ファイルの先頭（BOM付きのヘッダー行）をバイト列で返す"""
+    header = pd.DataFrame(columns=COMPLETED_TASK_COLUMNS).to_csv(index=False)
+    return header.encode("utf-8-sig")
+
+
+def _scan_task_csvs(folder_path: str) -> dict[str, str]:
+    """フォルダ内のタスクcsvを {タスクID: パス} で返す（並びはフォルダの列挙順）"""
+    if not os.path.exists(folder_path):
+        return {}
+    return {
+        os.path.splitext(filename)[0]: os.path.join(folder_path, filename)
+        for filename in os.listdir(folder_path)
+        if filename.endswith(".csv")
+    }
+
+
+def _file_signature(path: str) -> Optional[str]:
+    """ファイルの更新時刻とサイズを表す文字列を返す（ファイルがない場合はNone）"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _file_hash(path: str) -> str:
+    """ファイル内容のsha256を返す"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _open_or_none(path: Optional[str]) -> Iterator[Optional[BinaryIO]]:
+    """パスがNoneでなければバイナリ読み込みで開き、NoneならNoneを渡す"""
+    if path is None:
+        yield None
+        return
+    with open(path, "rb") as f:
+        yield f
+
+
+def _copy_range(src: BinaryIO, dst: BinaryIO, offset: int, length: int) -> None:
+    """srcのoffsetからlengthバイトを、読み込み単位ごとにdstにコピーする"""
+    src.seek(offset)
+    while length > 0:
+        chunk = src.read(min(COPY_CHUNK_SIZE, length))
+        if not chunk:
+            raise IOError("前回の出力ファイルがマニフェストより短くなっています")
+        dst.write(chunk)
+        length -= len(chunk)
+
+
+# 完了予測の履歴の列
+_HISTORY_COLUMNS = ("order_number", "is_initial", "is_nominal", "estimated_time", "actual_time")
+
+# 完了予測の比率の区分（細かい順）
+_SEGMENT_LEVELS = (
+    ("order_number", "is_initial", "is_nominal", "size"),
+    ("is_initial", "is_nominal", "size"),
+    ("size",),
+    (),
+)
+
+
+def _estimate_size(estimated_time) -> np.ndarray:
+    """見込み時間をESTIMATE_SIZE_BINSの区分番号に変換する"""
+    return np.searchsorted(ESTIMATE_SIZE_BINS, np.asarray(estimated_time, dtype=float), side="right")
+
+
+def _remaining_subtask_arrays(task: Task_def.Task) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """完了予測の対象とする未完了サブタスクの (見込み, 実績, 当初作業, ノミナル) を配列で返す
+
+    #000を除いた未完了サブタスクを対象とし、#000のみのタスクは#000を対象とする。
+    """
+    sub_tasks = task.sub_tasks
+    if sub_tasks.empty:
+        return (np.empty(0),) * 4
+    is_000 = sub_tasks["subtask_id"].to_numpy() == "#000"
+    target = np.ones(len(sub_tasks), dtype=bool) if is_000.all() else ~is_000
+    target &= sub_tasks["is_incomplete"].to_numpy() == True
+    return (
+        sub_tasks["estimated_time"].to_numpy(dtype=float)[target],
+        sub_tasks["actual_time"].to_numpy(dtype=float)[target],
+        sub_tasks["is_initial"].to_numpy()[target],
+        sub_tasks["is_nominal"].to_numpy()[target],
+    )
+
+
+def _split_task_blocks(task_sizes: np.ndarray, max_subtasks: int) -> list[tuple[int, int]]:
+    """タスクを、サブタスク数の合計が max_subtasks 以下の連続したブロック（開始, 終了）に区切る
+
+    1タスクのサブタスク数が max_subtasks を超える場合は、そのタスクのみのブロックとする。
+    """
+    blocks = []
+    first, count = 0, 0
+    for i, size in enumerate(task_sizes):
+        if i > first and count + size > max_subtasks:
+            blocks.append((first, i))
+            first, count = i, 0
+        count += size
+    blocks.append((first, len(task_sizes)))
+    return blocks
+
+
+def _add_business_days(start_date: date, days: np.ndarray) -> np.ndarray:
+    """start_date（休日なら翌営業日）から、土日・祝日を除いてdays営業日後の日付を返す"""
+    # 必要な期間の祝日のみ取得する（暦日は営業日の1.5倍に余裕を見る）
+    last_year = (start_date + timedelta(days=int(days.max(initial=0) * 1.5) + 30)).year
+    holidays = [d for year in range(start_date.year, last_year + 1) for d in _holidays_in_year(year)]
+    return np.busday_offset(np.datetime64(start_date, "D"), days, roll="forward", holidays=holidays)
+
+
+@lru_cache(maxsize=None)
+def _holidays_in_year(year: int) -> tuple:
+    """指定年の日本の祝日をnumpyの日付で返す"""
+    return tuple(np.datetime64(d, "D") for d, _ in jpholiday.year_holidays(year))
+
+
+def _read_manifest() -> dict:
+    """マニフェストを読み込む（ない・壊れている場合は空の辞書）"""
+    try:
+        with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
 
-        order_number = task.order_number or ""
-
-        pj_abbr = order_info.get_project_abbr(order_number)
-        if not pj_abbr:
-            pj_abbr = order_info_old.get_project_abbr(order_number)
-
-        order_abbr = order_info.get_order_abbr(order_number)
-        if not order_abbr:
-            order_abbr = order_info_old.get_order_abbr(order_number)
-
-        for _, row in task.sub_tasks.sort_values("sort_index").iterrows():
-            # 削除フラグ: 実績時間が0ならTrue、それ以外はFalse
-            delete_flag = True if int(row["actual_time"]) == 0 else False
-
-            combined_row = {
-                "タスクID+サブID": f"{task_id}{row['subtask_id']}",
-                "PJ略": pj_abbr,
-                "オーダ番号": order_number,
-                "オーダ略称": order_abbr,
-                "タスク名": task.name,
-                "サブ名": row["name"],
-                "見込み": row["estimated_time"],
-                "実績": row["actual_time"],
-                "当初作業": row["is_initial"],
-                "ノミナル": row["is_nominal"],
-                "サブ順序": row["sort_index"],
-                "削除フラグ": delete_flag,
-            }
-            all_rows.append(combined_row)
-
-    # タスクID情報を付加したサブタスク全てを一つのDataFrameに結合する
-    result_df = pd.DataFrame(all_rows)
-
-    # 結合したDataFrameをcsvとして出力する
-    output_path = os.path.join(my_upload_folder.my_upload_folder_path, "完了済タスク一覧.csv")
-    result_df.to_csv(output_path, index=False, encoding="utf-8-sig")
-    return None
+def _write_manifest(manifest: dict) -> None:
+    """マニフェストを保存する（一時ファイルからの置き換え）"""
+    tmp_path = MANIFEST_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, MANIFEST_PATH)
 
 if __name__ == "__main__":
-    output_completed_tasks()
\ No newline at end of file
+    output_completed_tasks()
@@ -3,17 +3,42 @@
 既存のE_WorkLog_formatting.py（1日単位の集計）と役割分担し、
 本モジュールは「複数日の結合」「全Activeタスク横断」を担当する
 """
-import glob
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
 from typing import Optional
 
+import numpy as np
 import pandas as pd
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import models.Task_definition as Task_def
 import services.E_WorkLog_formatting as Output_E
+import services.H_monthly_archive as Output_H
+import services.K_worklog_store as Output_K
+import services.O_worklog_day_cache as Output_O
+
+# 〆切迫ると判定する〆切日までの日数
+URGENT_DAYS = 2
+
+# 完了間近と判定する補正後残り時間の閾値（分）
+COMPLETION_NEAR_MINUTES = 45
+
+# 工数実績の日ごとの読み込み・集計に使うプロセス数の上限
+MAX_LOAD_WORKERS = 8
+
+# プロセスプールで読み込む最小の日数（これより少ない場合はプロセスの起動の方が遅いため同じプロセスで行う）
+PARALLEL_MIN_DAYS = 20
+
+# 作業区分（区分列のカテゴリの並び）と、会議・議論と判定するタスクIDの先頭文字列
+WORK_KINDS = ["作業", "会議", "議論"]
+WORK_KIND_PREFIXES = {"会議": "MTG", "議論": "DSC"}
+
+# 集計粒度ごとの区間の列と、表示用の区間の書式
+CALENDAR_COLUMNS = {"daily": "年月日", "weekly": "年週", "monthly": "年月のみ"}
+CALENDAR_LABEL_FORMATS = {"daily": "%Y-%m-%d", "weekly": "%Y-%m-%d～", "monthly": "%Y-%m"}
 
 # -------------------------------------------------------------
 # 期間フィルタ
@@ -57,80 +82,117 @@ def get_period_range(
 def build_active_task_summary_df() -> pd.DataFrame:
     """全Activeタスクの横断集計を行い、DataFrameとして返す
 
+    全タスクのサブタスクを1つのDataFrameに連結し、タスクごとの集計・状態の分類を一括で行う。
+    各列の値は calculate_remaining_estimated_time_from_task() / _classify_task_status() と同じ
+
     Returns:
         pd.DataFrame: タスクID, タスク名, 状態, 総見込み時間, 総実績時間, サブタスク数, 未完了サブタスク数を含むDataFrame
     """
     tasks = _collect_all_active_tasks()
+    if not tasks:
+        return pd.DataFrame()
     today = Task_def.get_ESS_dt().date()
     order_info = Task_def.OrderInformation()
 
-    summary_data = []
-    for task_id, task in tasks.items():
-        # #000を除いたサブタスクを基準に処理する
-        non_000_df = task.sub_tasks[task.sub_tasks["subtask_id"] != "#000"]
-        is_000_only = non_000_df.empty
-
-        incomplete_df = non_000_df[non_000_df["is_incomplete"] == True]
+    task_list = list(tasks.values())
+    n_tasks = len(task_list)
+    sub_df = _concat_subtasks(task_list)
+    task_index = sub_df["task_index"].to_numpy(dtype=np.int64)
+
+    def per_task(mask: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """maskに該当するサブタスクの値をタスクごとに合計する"""
+        return np.bincount(task_index[mask], weights=values[mask].astype(float), minlength=n_tasks)
+
+    def count_per_task(mask: np.ndarray) -> np.ndarray:
+        """maskに該当するサブタスクの数をタスクごとに数える"""
+        return np.bincount(task_index[mask], minlength=n_tasks)
+
+    estimated = sub_df["estimated_time"].to_numpy(dtype=float)
+    actual = sub_df["actual_time"].to_numpy(dtype=float)
+    is_000 = sub_df["subtask_id"].to_numpy() == "#000"
+    is_incomplete = sub_df["is_incomplete"].to_numpy() == True
+    non_000 = ~is_000
+    incomplete = non_000 & is_incomplete
+    complete = non_000 & ~is_incomplete
+    execute_complete = complete & (actual > 0)
+
+    # #000を除いたサブタスクがないタスク
+    is_000_only = count_per_task(non_000) == 0
+
+    # #000を除いた見込み時間合計・完了済実績合計・残時間（未完了サブタスクの見込み時間合計）
+    estimated_total = per_task(non_000, estimated)
+    actual_completed_total = per_task(complete, actual)
+    estimated_remaining = per_task(incomplete, estimated)
+
+    # 補正後残り時間算出（calculate_remaining_estimated_time_from_task() と同じ計算順序）
+    estimated_complete = per_task(complete, estimated)
+    estimated_execute_complete = per_task(execute_complete, estimated)
+    actual_execute_complete = per_task(execute_complete, actual)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio_complete_weight = estimated_complete / estimated_total
+        ratio_pace = (actual_execute_complete / estimated_execute_complete) - 1
+        corrected = estimated_remaining * (1 + ratio_complete_weight * ratio_pace)
+    # 着手済の完了済サブタスクがない（見込み時間が0のみの場合も含む）場合は補正しない
+    corrected = np.where(estimated_execute_complete > 0, corrected, estimated_remaining)
+    corrected = np.where(is_000_only, per_task(is_000, estimated), corrected)
+    corrected = np.trunc(corrected).astype(np.int64)
+
+    # 進捗率算出
+    with np.errstate(divide="ignore", invalid="ignore"):
+        progress = np.where(
+            estimated_total > 0, (estimated_total - corrected) / estimated_total * 100, 0)
+
+    # 直近〆切算出（未完了サブタスクのうち、〆切日を持つ最初のサブタスク（サブタスク順序）の〆切日）
+    deadline = pd.to_datetime(sub_df["deadline_date"], format="%Y-%m-%d", errors="coerce")
+    has_deadline = incomplete & deadline.notna().to_numpy()
+    next_deadline = (
+        sub_df.assign(deadline=deadline)[has_deadline]
+        .sort_values(["task_index", "sort_index"], kind="stable")
+        .groupby("task_index")["deadline"].first()
+        .reindex(range(n_tasks))
+    )
 
-        # #000を除いた見込み時間合計
-        estimated_total = non_000_df["estimated_time"].sum()
+    # 未完了サブタスク数: #000のみの場合は#000も計上する
+    incomplete_count = np.where(is_000_only, count_per_task(is_incomplete), count_per_task(incomplete))
+
+    # 状態の分類（_classify_task_status() と同じ優先順）
+    days_left = (deadline.dt.normalize() - pd.Timestamp(today)).dt.days.to_numpy()
+    status = np.select(
+        [
+            is_000_only & (count_per_task(is_incomplete) > 0),
+            count_per_task(has_deadline) == 0,
+            count_per_task(has_deadline & (days_left < 0)) > 0,
+            corrected <= COMPLETION_NEAR_MINUTES,
+            count_per_task(has_deadline & (days_left >= 0) & (days_left <= URGENT_DAYS)) > 0,
+            per_task(non_000, actual) == 0,
+        ],
+        ["段取り中", "〆切未定", "〆切超過", "完了間近", "〆切迫る", "未着手"],
+        default="着手済",
+    )
 
-        # 完了済実績合計: #000のみの場合は完了済サブタスクなしとして扱う
-        if is_000_only:
-            actual_completed_total = 0
-        else:
-            actual_completed_total = non_000_df[non_000_df["is_incomplete"] == False]["actual_time"].sum()
-
-        # 残時間算出（未完了サブタスクの見込み時間合計）
-        estimated_remaining = incomplete_df["estimated_time"].sum()
-
-        # 補正後残り時間算出（完了済サブタスクの実績と見込みの乖離に応じて補正）
-        estimated_remaining_corrected = calculate_remaining_estimated_time(task_id)
-
-        # 補正後合計時間算出
-        estimated_total_corrected = actual_completed_total + estimated_remaining_corrected
-
-        # 進捗率算出
-        progress = (estimated_total - estimated_remaining_corrected) / estimated_total * 100 if estimated_total > 0 else 0
-
-        # 直近〆切算出（未完了サブタスクをサブタスク順序でソートし、最初の〆切日を取得）
-        incomplete_df_sorted = incomplete_df.sort_values(by="sort_index")
-        next_deadline = None
-        for d in incomplete_df_sorted["deadline_date"]:
-            d_date = _parse_date_str(d)
-            if d_date is not None:
-                next_deadline = d_date
-                break
-
-        # 未完了サブタスク数: #000のみの場合は#000も計上する
-        incomplete_count = (
-            len(task.sub_tasks[task.sub_tasks["is_incomplete"] == True])
-            if is_000_only
-            else len(incomplete_df)
-        )
-
-        summary_data.append({
-            "タスクID": task_id,
-            "タスク名": task.name,
-            "PJ略": order_info.get_project_abbr(task.order_number),
-            "オーダ略": order_info.get_order_abbr(task.order_number),
-            "状態": _classify_task_status(task, today),
-            "見込み残り": estimated_remaining,
-            "補正後残り": estimated_remaining_corrected,
-            "完了済実績合計": actual_completed_total,
-            "見込み合計": estimated_total,
-            "補正後合計": estimated_total_corrected,
-            "進捗率(%)": round(progress, 0),
-            "未完了サブタスク数": incomplete_count,
-            "直近〆切": next_deadline.strftime("%Y-%m-%d") if next_deadline is not None else None,
-            "待機日": task.waiting_date if task.waiting_date is not None else None,
-        })
-    return pd.DataFrame(summary_data)
+    project_abbrs = _first_value_by_order(order_info.df, "project_abbr")
+    order_abbrs = _first_value_by_order(order_info.df, "order_abbr")
+    return pd.DataFrame({
+        "タスクID": list(tasks),
+        "タスク名": [task.name for task in task_list],
+        "PJ略": [project_abbrs.get(task.order_number, "") for task in task_list],
+        "オーダ略": [order_abbrs.get(task.order_number, "") for task in task_list],
+        "状態": status,
+        "見込み残り": estimated_remaining.astype(np.int64),
+        "補正後残り": corrected,
+        "完了済実績合計": actual_completed_total.astype(np.int64),
+        "見込み合計": estimated_total.astype(np.int64),
+        "補正後合計": (actual_completed_total + corrected).astype(np.int64),
+        "進捗率(%)": np.round(progress, 0),
+        "未完了サブタスク数": incomplete_count.astype(np.int64),
+        "直近〆切": [d.strftime("%Y-%m-%d") if pd.notna(d) else None for d in next_deadline],
+        "待機日": [task.waiting_date for task in task_list],
+    })
 
 
 def calculate_remaining_estimated_time(task_ID: str) -> int:
-    """タスクオブジェクト内の残見込み時間の合計を、完了済サブタスクの実績と見込みの乖離を考慮して計算する
-    サブID "#000" は除外して計算するが、サブID #000 しかない場合は、#000 の見込み時間を残見込み時間として返す
+    """タスクIDのタスクcsvを読み込み、残見込み時間の合計を計算する
+    計算内容は calculate_remaining_estimated_time_from_task() を参照
 
     Args:
         task_ID (str): アクティブ状態のプロジェクトタスクまたはデイリータスクのタスクID
@@ -149,7 +211,19 @@ def calculate_remaining_estimated_time(task_ID: str) -> int:
     task = Task_def.read_task_csv(os.path.join(folder_path, f"{task_ID}.csv"))
     if task is None:
         raise ValueError(f"タスクID '{task_ID}' が見つかりません")
+    return calculate_remaining_estimated_time_from_task(task)
+
+
+def calculate_remaining_estimated_time_from_task(task: Task_def.Task) -> int:
+    """タスクオブジェクト内の残見込み時間の合計を、完了済サブタスクの実績と見込みの乖離を考慮して計算する
+    サブID "#000" は除外して計算するが、サブID #000 しかない場合は、#000 の見込み時間を残見込み時間として返す
 
+    Args:
+        task (Task_def.Task): 読み込み済みのTaskオブジェクト
+
+    Returns:
+        int: 残見込み時間の合計（分単位）
+    """
     # サブタスクID "#000" は除外して処理する
     sub_tasks = task.sub_tasks[task.sub_tasks["subtask_id"] != "#000"]
 
@@ -169,19 +243,20 @@ def calculate_remaining_estimated_time(task_ID: str) -> int:
     complete_df = sub_tasks[sub_tasks["is_incomplete"] == False]
     estimated_complete = complete_df["estimated_time"].sum()
 
-    # 完了済サブタスクの見込み時間 / タスク全体の見込み時間 の比率を算出する
-    ratio_complete_weight = estimated_complete / estimated_total
-
     # 着手済かつ完了済のサブタスクのみを抽出
     execute_complete_df = complete_df[complete_df["actual_time"] > 0]
 
-    # もし着手済の完了済サブタスクが存在しない場合は、補正値算出のための情報が無いので補正計算のしようが無い
+    # 着手済かつ完了済サブタスクの見込み時間合計を算出する
+    estimated_execute_complete = execute_complete_df["estimated_time"].sum()
+
+    # もし着手済の完了済サブタスクが存在しない（または見込み時間が全て0の）場合は、
+    # 補正値算出のための情報が無いので補正計算のしようが無い
     # 補正は行わずに未完了サブタスクの見込み時間合計をそのまま返す
-    if execute_complete_df.empty:
+    if execute_complete_df.empty or estimated_execute_complete == 0:
         return int(estimated_incomplete)
 
-    # 着手済かつ完了済サブタスクの見込み時間合計を算出する
-    estimated_execute_complete = execute_complete_df["estimated_time"].sum()
+    # 完了済サブタスクの見込み時間 / タスク全体の見込み時間 の比率を算出する
+    ratio_complete_weight = estimated_complete / estimated_total
 
     # 完了済サブタスクの実績時間合計を算出する
     actual_complete = execute_complete_df["actual_time"].sum()
@@ -215,6 +290,25 @@ def _collect_all_active_tasks() -> dict[str, Task_def.Task]:
     return tasks
 
 
+def _concat_subtasks(tasks: list[Task_def.Task]) -> pd.DataFrame:
+    """全タスクのサブタスクを連結し、タスクの並び順を表すtask_index列を付けて返す"""
+    # 小さなDataFrameのpd.concatは遅いため、列ごとにnumpy配列を連結する
+    columns = ["subtask_id", "estimated_time", "actual_time", "deadline_date", "sort_index", "is_incomplete"]
+    frames = [task.sub_tasks for task in tasks if not task.sub_tasks.empty]
+    sub_df = pd.DataFrame({
+        column: np.concatenate([df[column].to_numpy() for df in frames]) if frames else []
+        for column in columns
+    })
+    sub_df["task_index"] = np.repeat(np.arange(len(tasks)), [len(task.sub_tasks) for task in tasks])
+    return sub_df
+
+
+def _first_value_by_order(order_df: pd.DataFrame, column: str) -> dict:
+    """オーダ管理のDataFrameから {オーダ番号: 最初に現れた行の値} の辞書を作成する"""
+    first_rows = order_df.drop_duplicates("order_number", keep="first")
+    return dict(zip(first_rows["order_number"], first_rows[column]))
+
+
 def _parse_date_str(s) -> Optional[datetime.date]:
     """Task csvの日付文字列をdatetime.dateに変換する。変換できない場合はNoneを返す
 
@@ -235,13 +329,15 @@ def _parse_date_str(s) -> Optional[datetime.date]:
 def _classify_task_status(
         task: Task_def.Task,
         today: datetime.date,
-        urgent_days: int = 2) -> str:
+        urgent_days: int = URGENT_DAYS,
+        estimated_remaining_corrected: Optional[int] = None) -> str:
     """タスクの状態を[段取り中,〆切未定,〆切超過,完了間近,〆切迫る,未着手,着手済]に分類する
 
     Args:
         task (Task_def.Task): Taskオブジェクト
         today (datetime.date): 今日の日付
         urgent_days (int, optional): 緊急とみなす日数。デフォルトは2日。
+        estimated_remaining_corrected (Optional[int], optional): 計算済みの補正後残り時間。指定しない場合はtaskから計算する
 
     Returns:
         str: タスクの状態を表す文字列
@@ -265,8 +361,9 @@ def _classify_task_status(
             return "〆切超過"
 
     # 完了間近（未完了サブタスクの補正込み見込み時間合計が一定時間以内）
-    threshold_minute = 45  # 完了間近とみなす見込み時間の閾値（時間）
-    estimated_remaining_corrected = calculate_remaining_estimated_time(task.task_id)
+    threshold_minute = COMPLETION_NEAR_MINUTES  # 完了間近とみなす見込み時間の閾値（分）
+    if estimated_remaining_corrected is None:
+        estimated_remaining_corrected = calculate_remaining_estimated_time_from_task(task)
     if estimated_remaining_corrected <= threshold_minute:
         return "完了間近"
 
@@ -287,94 +384,110 @@ def _classify_task_status(
 # 工数実績集約(ダッシュボード3-A用)
 # -------------------------------------------------------------
 
-def load_worklogs_in_period(start_date: datetime, end_date: datetime) -> pd.DataFrame:
+def load_worklogs_in_period(
+        start_date: datetime, end_date: datetime, max_workers: Optional[int] = None) -> pd.DataFrame:
     """指定期間の全工数実績csvを結合し、作業区分の列を追加
 
     Args:
         start_date (datetime): 開始日
         end_date (datetime): 終了日
+        max_workers (Optional[int], optional): 日ごとの読み込み・集計に使うプロセス数。指定しない場合はCPU数に応じて決める
 
     Returns:
         pd.DataFrame: 指定期間の工数実績csvを結合したDataFrame
     """
+    return load_worklogs_in_period_with_errors(start_date, end_date, max_workers)[0]
 
-    all_files = []
-    for folder in ["data/WorkLogs", "data/WorkLogs/old"]:
-        if os.path.exists(folder):
-            all_files.extend(glob.glob(os.path.join(folder, "工数実績*.csv")))
 
-    dfs = []
-    for path in all_files:
-        fname = os.path.basename(path)
-        try:
-            date_str = fname.replace("工数実績", "").replace(".csv", "")
-            file_date = datetime.strptime(date_str, "%y%m%d").date()
+def load_worklogs_in_period_with_errors(
+        start_date: datetime, end_date: datetime, max_workers: Optional[int] = None,
+        ) -> tuple[pd.DataFrame, dict[str, str]]:
+    """load_worklogs_in_period と同じ処理を行い、読み込み・集計に失敗した日のエラー内容もあわせて返す
 
-        except ValueError:
-            continue  # ファイル名が想定外の形式の場合はスキップ
+    日ごとの集計済みフレームはキャッシュから読み込み、キャッシュのない日・更新された日のみ
+    プロセスプールで並列に読み込み・集計する（日数が少ない場合は同じプロセスで行う）。
+
+    Args:
+        start_date (datetime): 開始日
+        end_date (datetime): 終了日
+        max_workers (Optional[int], optional): 日ごとの読み込み・集計に使うプロセス数。指定しない場合はCPU数に応じて決める
 
-        if not (start_date.date() <= file_date <= end_date.date()):
-            continue  # 指定期間外のファイルはスキップ
+    Returns:
+        tuple[pd.DataFrame, dict[str, str]]: (結合した工数実績, {失敗した日付(yymmdd): エラー内容})
+    """
 
-        try:
-            # ZZZ-1050（工数切り捨て分調整）の算出処理
-            # オーダ番号列がZZZ-1050の行が存在する場合は工数を取得し、存在しない場合は0を設定
-            other = "ZZZ-1050"
-
-            df_sum_by_order = Output_E.sum_df_each_order(
-                Output_E.sum_df_each_subtask(
-                    path, include_MTG=True))
-            other_work_time = df_sum_by_order.loc[df_sum_by_order["オーダ番号"] == other, "工数"].sum()
-
-            # 結合用の工数実績csvの読み込み
-            df = pd.read_csv(path, parse_dates=["開始時刻", "終了時刻"])
-            df["ファイル日付"] = file_date
-
-            # dfの先頭行に工数切り捨て分調整の行を追加する
-            if other_work_time > 0:
-                # 開始時刻は5:00、終了時刻は5:00 + 工数切り捨て分調整の時間（分）を設定する
-                other_start_time = pd.Timestamp.combine(file_date, pd.Timestamp("05:00").time())
-                other_end_time = other_start_time + pd.to_timedelta(other_work_time, unit="m")
-
-                new_row = {
-                    "オーダ番号": other,
-                    "オーダ略称": Task_def.OrderInformation().get_order_abbr(other),
-                    "プロジェクト略称": Task_def.OrderInformation().get_project_abbr(other),
-                    "タスクID": "ZZZ1050",
-                    "サブタスクID": "#000",
-                    "タスク名": "工数切り捨て分調整",
-                    "サブタスク名": "",
-                    "開始時刻": other_start_time,
-                    "終了時刻": other_end_time,
-                    "ファイル日付": file_date,
-                }
-                df = pd.concat([pd.DataFrame([new_row]), df], ignore_index=True)
-
-            # dfのリストに追加する
-            dfs.append(df)
-
-        except Exception:
-            continue  # CSV読み込みに失敗した場合はスキップ
+    day_paths = _list_period_day_paths(start_date, end_date)
+    cache_keys = {date_str: Output_O.make_key(path) for date_str, path in day_paths.items()}
+    day_dfs, errors = _load_day_frames(start_date, end_date, day_paths, cache_keys, max_workers)
 
+    dfs = [day_dfs[date_str] for date_str in sorted(day_dfs)]
     if not dfs:
-        return pd.DataFrame()  # データがない場合は空のDataFrameを返す
+        return pd.DataFrame(), errors  # データがない場合は空のDataFrameを返す
 
     combined = pd.concat(dfs, ignore_index=True)
-    combined["開始時刻"] = pd.to_datetime(combined["開始時刻"].dt.floor("min"))
-    combined["終了時刻"] = pd.to_datetime(combined["終了時刻"].dt.floor("min"))
-    combined["作業時間(分)"] = (
-        (combined["終了時刻"] - combined["開始時刻"]).dt.total_seconds() / 60
-    ).astype(int)
+    # オーダ番号はオーダ管理csvの並び順のカテゴリ型にする（並べ替え・グループ化を整数のコードで行う）
+    combined["オーダ番号"], _ = Output_E.to_order_categorical(combined["オーダ番号"])
+    combined["区分"] = _classify_work_kind(combined["タスクID"])
+    _add_calendar_columns(combined)
+    return combined, errors
 
-    # 作業区分判定：タスクIDが"MTG"で始まるものを会議、"DSC"で始まるものを議論、それ以外を作業とする
-    combined["区分"] = combined["タスクID"].apply(
-        lambda x: "会議" if str(x).startswith("MTG") else ("議論" if str(x).startswith("DSC") else "作業"))
 
-    combined["年月のみ"] = pd.to_datetime(combined["ファイル日付"]).dt.strftime("%Y-%m")
-    combined["年月日"] = pd.to_datetime(combined["ファイル日付"]).dt.strftime("%Y-%m-%d")
-    _dt = pd.to_datetime(combined["ファイル日付"])
-    combined["年週"] = (_dt - pd.to_timedelta(_dt.dt.dayofweek, unit="D")).dt.strftime("%Y-%m-%d～")
+def load_daily_cube(
+        start_date: datetime, end_date: datetime, max_workers: Optional[int] = None,
+        ) -> tuple[pd.DataFrame, dict[str, str]]:
+    """指定期間の 日 × オーダ略称 × プロジェクト略称 × 区分 の作業時間の集計（日別集計キューブ）を返す
 
+    日別集計キューブは保存済みのものを使い、新しい日・更新された日のみ工数実績から集計して追加保存する。
+    aggregate_by_order() には load_worklogs_in_period() の結果の代わりにこの結果を渡せる（同じ集計結果になる）。
+
+    Args:
+        start_date (datetime): 開始日
+        end_date (datetime): 終了日
+        max_workers (Optional[int], optional): 日ごとの読み込み・集計に使うプロセス数。指定しない場合はCPU数に応じて決める
+
+    Returns:
+        tuple[pd.DataFrame, dict[str, str]]: (ファイル日付, オーダ略称, プロジェクト略称, 区分, 作業時間(分),
+            年月のみ, 年月日, 年週 の列を持つDataFrame, {失敗した日付(yymmdd): エラー内容})
+    """
+    day_paths = _list_period_day_paths(start_date, end_date)
+    cache_keys = {date_str: Output_O.make_key(path) for date_str, path in day_paths.items()}
+    cube, fresh_dates = Output_O.read_cube(cache_keys)
+
+    errors = {}
+    missing_paths = {date_str: path for date_str, path in day_paths.items() if date_str not in fresh_dates}
+    if missing_paths:
+        day_dfs, errors = _load_day_frames(start_date, end_date, missing_paths, cache_keys, max_workers)
+        if day_dfs:
+            new_rows = _build_cube_rows(pd.concat(list(day_dfs.values()), ignore_index=True))
+            Output_O.write_cube(new_rows, {date_str: cache_keys[date_str] for date_str in day_dfs})
+            cube = pd.concat([cube, new_rows], ignore_index=True) if not cube.empty else new_rows
+
+    if cube.empty:
+        return pd.DataFrame(), errors
+    cube["区分"] = pd.Categorical(cube["区分"], categories=WORK_KINDS)
+    cube = cube.sort_values(
+        Output_O.CUBE_COLUMNS[:-1], kind="stable", na_position="last").reset_index(drop=True)
+    _add_calendar_columns(cube)
+    return cube, errors
+
+
+def load_worklog_days_in_period(start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    """指定期間の全工数実績csvを、工数切り捨て分調整の行を加えずにそのまま結合する
+
+    Args:
+        start_date (datetime): 開始日
+        end_date (datetime): 終了日
+
+    Returns:
+        pd.DataFrame: 開始時刻・終了時刻の秒数を切り捨て、ファイル日付列を追加した工数実績（日付の昇順）
+    """
+    dfs = [df.assign(ファイル日付=file_date) for file_date, df in _read_worklog_days(start_date, end_date)]
+    if not dfs:
+        return pd.DataFrame()
+
+    combined = pd.concat(dfs, ignore_index=True)
+    combined["開始時刻"] = pd.to_datetime(combined["開始時刻"]).dt.floor("min")
+    combined["終了時刻"] = pd.to_datetime(combined["終了時刻"]).dt.floor("min")
     return combined
 
 
@@ -396,26 +509,24 @@ def aggregate_by_order(
     if worklog_df.empty:
         return pd.DataFrame()
 
-    df = worklog_df.copy()
+    df = worklog_df
     if not include_mtg:
         df = df[df["区分"] != "会議"]
     if not include_dsc:
         df = df[df["区分"] != "議論"]
 
-    if granularity == "monthly":
-        grouped = df.groupby(["年月のみ", "オーダ略称", "区分"])["作業時間(分)"].sum().reset_index()
-        grouped["作業時間(h)"] = (grouped["作業時間(分)"] / 60).round(1)
-        grouped = grouped.rename(columns={"年月のみ": "区間"})
-    elif granularity == "weekly":
-        grouped = df.groupby(["年週", "オーダ略称", "区分"])["作業時間(分)"].sum().reset_index()
-        grouped["作業時間(h)"] = (grouped["作業時間(分)"] / 60).round(1)
-        grouped = grouped.rename(columns={"年週": "区間"})
-    else:  # daily
-        grouped = df.groupby(["年月日", "オーダ略称", "区分"])["作業時間(分)"].sum().reset_index()
-        grouped["作業時間(h)"] = (grouped["作業時間(分)"] / 60).round(1)
-        grouped = grouped.rename(columns={"年月日": "区間"})
+    key_col = CALENDAR_COLUMNS.get(granularity, "年月日")  # 未知の粒度は日次として扱う
+    grouped = (
+        df.groupby([key_col, "オーダ略称", "区分"], observed=True)["作業時間(分)"]
+        .sum().reset_index()
+    )
+    grouped["作業時間(h)"] = (grouped["作業時間(分)"] / 60).round(1)
+    grouped = grouped.rename(columns={key_col: "区間"})
 
-    return grouped
+    # 区間・区分は集計後の行のみ表示用の文字列にし、文字列の昇順（文字列で集計していた時と同じ行順）に並べる
+    grouped["区間"] = _format_calendar_labels(grouped["区間"], granularity)
+    grouped["区分"] = grouped["区分"].astype(str)
+    return grouped.sort_values(["区間", "オーダ略称", "区分"], kind="stable").reset_index(drop=True)
 
 
 def get_order_sort_df() -> pd.DataFrame:
@@ -454,4 +565,284 @@ def get_order_abbr_sort_order() -> list[str]:
     Returns:
         list[str]: オーダ略称の順序リスト
     """
-    return get_order_sort_df()["オーダ略称"].tolist()
\ No newline at end of file
+    return get_order_sort_df()["オーダ略称"].tolist()
+
+
+# -------------------------------------------------------------
+# 期間まとめてのESS・BJP登録用出力
+# -------------------------------------------------------------
+
+def build_registration_tables(
+        start_date: datetime, end_date: datetime, add_daytime_break: bool = True,
+        ) -> dict[str, pd.DataFrame]:
+    """指定期間の工数実績を1回で読み込み、日ごとのESS・BJP登録用の出力をまとめて作成する
+
+    Args:
+        start_date (datetime): 開始日
+        end_date (datetime): 終了日
+        add_daytime_break (bool, optional): 昼休憩（60分）を考慮するかどうか。デフォルトはTrue。
+
+    Returns:
+        dict[str, pd.DataFrame]: "ESS" / "BJP" / "休憩" の各DataFrame（Output_E.build_registration_tables_from_df を参照）
+    """
+    return Output_E.build_registration_tables_from_df(
+        load_worklog_days_in_period(start_date, end_date), add_daytime_break)
+
+
+def export_registration_tables(
+        tables: dict[str, pd.DataFrame], start_date: datetime, end_date: datetime,
+        output_dir: str = os.path.join("data", "Registration"),
+        ) -> list[str]:
+    """build_registration_tables の結果を、出力ごとにcsvファイル（utf-8-sig）として保存する
+
+    Args:
+        tables (dict[str, pd.DataFrame]): build_registration_tables の結果
+        start_date (datetime): 開始日（ファイル名に使用）
+        end_date (datetime): 終了日（ファイル名に使用）
+        output_dir (str, optional): 保存先フォルダ
+
+    Returns:
+        list[str]: 保存したcsvファイルのパス
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    period = f"{start_date.strftime('%y%m%d')}-{end_date.strftime('%y%m%d')}"
+    paths = []
+    for name, table in tables.items():
+        path = os.path.join(output_dir, f"{name}登録用{period}.csv")
+        table.to_csv(path, index=False, encoding="utf-8-sig")
+        paths.append(path)
+    return paths
+
+# -------------------------------------------------------------
+# 上記の関数で使用する補助関数群
+# -------------------------------------------------------------
+
+def _load_day_frames(
+        start_date: datetime, end_date: datetime, day_paths: dict[str, str], cache_keys: dict[str, str],
+        max_workers: Optional[int]) -> tuple[dict[str, pd.DataFrame], dict[str, str]]:
+    """day_paths の日ごとの集計済みフレームを、キャッシュから読み込むか作成して返す
+
+    キャッシュのない日・更新された日はプロセスプールで読み込み・集計し、キャッシュに保存する。
+
+    Returns:
+        tuple[dict[str, pd.DataFrame], dict[str, str]]: ({日付(yymmdd): 集計済みフレーム}, {失敗した日付: エラー内容})
+    """
+    day_dfs = {}
+    for date_str in day_paths:
+        df = Output_O.read_day(date_str, cache_keys[date_str])
+        if df is not None:
+            day_dfs[date_str] = df
+
+    errors = {}
+    missing = sorted(set(day_paths) - set(day_dfs))
+    if missing:
+        # 工数切り捨て分調整の行に設定するオーダ略称・プロジェクト略称（オーダ管理csvにない場合は空文字）
+        order_table = Output_E.get_order_table()
+        other_abbrs = {"order_abbr": "", "project_abbr": ""}
+        if "ZZZ-1050" in order_table.index:
+            other_abbrs = order_table.loc["ZZZ-1050", ["order_abbr", "project_abbr"]].fillna("").to_dict()
+
+        # ストアに取り込み済みの日はまとめて読み込んでから渡し、それ以外は各プロセスでcsvを読み込む
+        stored_dfs = _read_stored_days(start_date, end_date)
+        jobs = [(date_str, day_paths[date_str], stored_dfs.get(date_str), other_abbrs) for date_str in missing]
+        for date_str, day_df, error in _run_day_jobs(jobs, max_workers):
+            if error is not None:
+                errors[date_str] = error  # 読み込み・集計に失敗した日はスキップし、エラー内容を返す
+                continue
+            Output_O.write_day(date_str, cache_keys[date_str], day_df)
+            day_dfs[date_str] = day_df
+    return day_dfs, errors
+
+
+def _classify_work_kind(task_ids: pd.Series) -> pd.Categorical:
+    """作業区分判定：タスクIDが"MTG"で始まるものを会議、"DSC"で始まるものを議論、それ以外を作業とする
+
+    Returns:
+        pd.Categorical: WORK_KINDS をカテゴリとする区分
+    """
+    ids = task_ids.astype(str)
+    kinds = list(WORK_KIND_PREFIXES)
+    conditions = [ids.str.startswith(WORK_KIND_PREFIXES[kind]).to_numpy() for kind in kinds]
+    codes = np.select(conditions, [WORK_KINDS.index(kind) for kind in kinds], default=WORK_KINDS.index("作業"))
+    return pd.Categorical.from_codes(codes, categories=WORK_KINDS)
+
+
+def _add_calendar_columns(df: pd.DataFrame) -> None:
+    """ファイル日付列から集計粒度ごとの区間の列（年月のみ, 年月日, 年週）をカテゴリ型で追加する
+
+    日付の変換は重複を除いた日付に対してのみ行い、各行にはカテゴリのコードのみを持たせる。
+    カテゴリは 年月日 が日付（Timestamp）、年月のみ が月の Period、年週 が月曜始まりの週の Period で、
+    表示用の文字列には _format_calendar_labels() で集計後に変換する。
+    """
+    day_codes, days = pd.factorize(df["ファイル日付"], sort=True)
+    days = pd.DatetimeIndex(pd.to_datetime(days))
+    df["年月日"] = pd.Categorical.from_codes(day_codes, categories=days)
+    for col, freq in [("年月のみ", "M"), ("年週", "W-SUN")]:
+        period_codes, periods = pd.factorize(days.to_period(freq), sort=True)
+        df[col] = pd.Categorical.from_codes(period_codes[day_codes], categories=periods)
+
+
+def _format_calendar_labels(keys: pd.Series, granularity: str) -> pd.Series:
+    """区間の列（カテゴリ型）を表示用の文字列に変換する（書式の変換はカテゴリごとに1回のみ行う）"""
+    label_format = CALENDAR_LABEL_FORMATS.get(granularity, CALENDAR_LABEL_FORMATS["daily"])
+    categories = keys.cat.categories
+    if isinstance(categories, pd.PeriodIndex) and categories.freqstr.startswith("W"):
+        categories = categories.start_time  # 週は開始日（月曜日）で表す
+    labels = np.asarray(categories.strftime(label_format), dtype=object)
+    return pd.Series(labels[keys.cat.codes.to_numpy()], index=keys.index, name=keys.name)
+
+
+def _build_cube_rows(worklog_df: pd.DataFrame) -> pd.DataFrame:
+    """集計済みフレームを結合した工数実績を、日 × オーダ略称 × プロジェクト略称 × 区分 で集計する
+
+    オーダ略称・プロジェクト略称が欠損値の行も、KPIの合計に含めるため欠損値のまま集計する。
+    """
+    df = worklog_df.assign(区分=_classify_work_kind(worklog_df["タスクID"]))
+    return (
+        df.groupby(Output_O.CUBE_COLUMNS[:-1], dropna=False, observed=True)[Output_O.MINUTES_COLUMN]
+        .sum().reset_index()
+    )
+
+
+def _build_worklog_day(file_date: datetime.date, df: pd.DataFrame, other_abbrs: dict) -> pd.DataFrame:
+    """1日分の工数実績に工数切り捨て分調整の行とファイル日付・作業時間(分)列を加え、時刻を分単位に切り捨てる
+
+    Args:
+        file_date (datetime.date): ファイル日付
+        df (pd.DataFrame): 1日分の工数実績
+        other_abbrs (dict): 工数切り捨て分調整の行に設定する order_abbr / project_abbr
+
+    Returns:
+        pd.DataFrame: Output_O.COLUMNS の列を持つ工数実績（工数切り捨て分調整の行が先頭）
+    """
+    # ZZZ-1050（工数切り捨て分調整）の算出処理
+    # オーダ番号列がZZZ-1050の行が存在する場合は工数を取得し、存在しない場合は0を設定
+    other = "ZZZ-1050"
+
+    df_sum_by_order = Output_E.sum_df_each_order(
+        Output_E.sum_df_each_subtask_from_df(
+            df, include_MTG=True))
+    other_work_time = df_sum_by_order.loc[df_sum_by_order["オーダ番号"] == other, "工数"].sum()
+
+    # 結合用の工数実績
+    df = df.assign(ファイル日付=file_date)
+
+    # dfの先頭行に工数切り捨て分調整の行を追加する
+    if other_work_time > 0:
+        # 開始時刻は5:00、終了時刻は5:00 + 工数切り捨て分調整の時間（分）を設定する
+        other_start_time = pd.Timestamp.combine(file_date, pd.Timestamp("05:00").time())
+        other_end_time = other_start_time + pd.to_timedelta(other_work_time, unit="m")
+
+        new_row = {
+            "オーダ番号": other,
+            "オーダ略称": other_abbrs["order_abbr"],
+            "プロジェクト略称": other_abbrs["project_abbr"],
+            "タスクID": "ZZZ1050",
+            "サブタスクID": "#000",
+            "タスク名": "工数切り捨て分調整",
+            "サブタスク名": "",
+            "開始時刻": other_start_time,
+            "終了時刻": other_end_time,
+            "ファイル日付": file_date,
+        }
+        df = pd.concat([pd.DataFrame([new_row]), df], ignore_index=True)
+
+    # 文字列列はストアから読み込んだ日とcsvから読み込んだ日で型をそろえる（欠損値はNaNのまま）
+    df = df.reindex(columns=Output_O.STRING_COLUMNS + Output_O.DATETIME_COLUMNS + [Output_O.DATE_COLUMN])
+    for col in Output_O.STRING_COLUMNS:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    df["開始時刻"] = pd.to_datetime(df["開始時刻"]).dt.floor("min")
+    df["終了時刻"] = pd.to_datetime(df["終了時刻"]).dt.floor("min")
+    df["作業時間(分)"] = ((df["終了時刻"] - df["開始時刻"]).dt.total_seconds() / 60).astype(int)
+    return df
+
+
+def _list_period_day_paths(start_date: datetime, end_date: datetime) -> dict[str, str]:
+    """指定期間の工数実績の {日付(yymmdd): パス} を日付の昇順で返す（ファイル名が想定外の形式の日は除く）"""
+    # 保存先フォルダ・oldフォルダの日次csvと、月次バンドル内の日次csvを対象にする
+    day_paths = {}
+    for date_str, path in sorted(Output_H.list_day_paths("WorkLog").items()):
+        try:
+            file_date = datetime.strptime(date_str, "%y%m%d").date()
+        except ValueError:
+            continue  # ファイル名が想定外の形式の場合はスキップ
+        if start_date.date() <= file_date <= end_date.date():
+            day_paths[date_str] = path
+    return day_paths
+
+
+def _read_worklog_days(start_date: datetime, end_date: datetime) -> list[tuple[datetime.date, pd.DataFrame]]:
+    """指定期間の工数実績を日ごとに読み込み、（ファイル日付, 工数実績）のリストを日付の昇順で返す
+
+    工数実績ストアに取り込み済みの日はストアからまとめて読み込み、それ以外はcsvから読み込む。
+    ファイル名が想定外の形式の日・読み込みに失敗した日はスキップする。
+    """
+    day_paths = _list_period_day_paths(start_date, end_date)
+    stored_dfs = _read_stored_days(start_date, end_date)
+    days = []
+    for date_str, path in day_paths.items():
+        file_date = datetime.strptime(date_str, "%y%m%d").date()
+
+        # 工数実績の読み込み（ストアに取り込み済みの日はストアから、それ以外はcsvから）
+        df = stored_dfs.get(date_str)
+        if df is None:
+            try:
+                df = Output_H.read_csv(path, parse_dates=["開始時刻", "終了時刻"])
+            except Exception:
+                continue  # CSV読み込みに失敗した場合はスキップ
+        days.append((file_date, df))
+    return days
+
+
+def _read_stored_days(start_date: datetime, end_date: datetime) -> dict[str, pd.DataFrame]:
+    """工数実績ストアを増分更新し、指定期間のうち取り込み済みの日を {日付(yymmdd): 工数実績} で返す
+
+    ストアを使用できない場合は空の辞書を返す（呼び出し側で全日をcsvから読み込む）。
+    """
+    stored_dfs = {}
+    try:
+        Output_K.ingest_worklogs()
+        stored_df, _ = Output_K.read_period(start_date, end_date)
+        if not stored_df.empty:
+            for stored_date, group in stored_df.groupby("ファイル日付", sort=False):
+                stored_dfs[stored_date.strftime("%y%m%d")] = group.drop(columns=["ファイル日付"]).reset_index(drop=True)
+    except Exception:
+        stored_dfs = {}
+    return stored_dfs
+
+
+def _run_day_jobs(jobs: list[tuple], max_workers: Optional[int]) -> list[tuple[str, Optional[pd.DataFrame], Optional[str]]]:
+    """日ごとの読み込み・集計（_build_day_job）を、日数が多い場合はプロセスプールで並列に行う
+
+    結果は jobs と同じ（日付の）順に返す。プロセスプールを使用できない環境では同じプロセスで行う。
+    """
+    if max_workers is None:
+        max_workers = min(os.cpu_count() or 1, MAX_LOAD_WORKERS)
+    if max_workers <= 1 or len(jobs) < PARALLEL_MIN_DAYS:
+        return [_build_day_job(job) for job in jobs]
+
+    chunksize = max(1, len(jobs) // (max_workers * 4))
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_build_day_job, jobs, chunksize=chunksize))
+    except (OSError, BrokenProcessPool):
+        return [_build_day_job(job) for job in jobs]
+
+
+def _build_day_job(job: tuple) -> tuple[str, Optional[pd.DataFrame], Optional[str]]:
+    """1日分の工数実績を読み込んで集計済みフレームを作成する（プロセスプールの各プロセスで実行する）
+
+    Args:
+        job (tuple): (日付(yymmdd), 工数実績csvのパス, ストアから読み込んだ工数実績またはNone, 工数切り捨て分調整の略称)
+
+    Returns:
+        tuple[str, Optional[pd.DataFrame], Optional[str]]: (日付, 集計済みフレーム, エラー内容)。失敗した場合はフレームがNone
+    """
+    date_str, path, df, other_abbrs = job
+    try:
+        file_date = datetime.strptime(date_str, "%y%m%d").date()
+        if df is None:
+            df = Output_H.read_csv(path, parse_dates=["開始時刻", "終了時刻"])
+        return date_str, _build_worklog_day(file_date, df, other_abbrs), None
+    except Exception as e:
+        return date_str, None, f"{os.path.basename(path)}: {type(e).__name__}: {e}"
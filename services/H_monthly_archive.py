@@ -0,0 +1,286 @@
+"""
+oldフォルダに溜まるWillDo・工数実績csvの月次アーカイブモジュール
+締まった月の日次csvを1つのzipバンドルにまとめ、日別インデックス(index.json)を埋め込む。
+バンドル内の1日分は「バンドルパス/メンバ名」形式の仮想パスで扱い、
+その日のメンバだけを展開して読み込む（月全体は展開しない）
+"""
+import io
+import json
+import os
+import re
+import sys
+import zipfile
+from typing import Optional
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import models.Task_definition as Task_def
+
+# 種別ごとの（保存先フォルダ, ファイル名接頭辞）
+ARCHIVE_KINDS = {
+    "WorkLog": (os.path.join("data", "WorkLogs"), "工数実績"),
+    "WillDo": (os.path.join("data", "WillDo"), "WillDo"),
+}
+
+# バンドルに埋め込む日別インデックスのメンバ名
+INDEX_MEMBER = "index.json"
+
+# バンドルのインデックス読み込みキャッシュ {バンドルパス: (mtime_ns, インデックス)}
+_index_cache: dict[str, tuple[int, dict]] = {}
+
+# -------------------------------------------------------------
+# 圧縮（コンパクション）
+# -------------------------------------------------------------
+
+def compact_closed_months(kind: str) -> list[str]:
+    """oldフォルダ内の日次csvのうち、締まった月（ESS基準の今月より前）の分を月次zipにまとめる
+
+    同じ月のバンドルが既に存在する場合は、既存メンバに追加する形で作り直す。
+    バンドルは一時ファイルに書き出してから置き換えるため、途中で失敗しても既存バンドルは壊れない。
+
+    Args:
+        kind (str): 種別（"WorkLog" または "WillDo"）
+
+    Returns:
+        list[str]: 作成・更新したバンドルのパスのリスト
+    """
+    main_dir, prefix = ARCHIVE_KINDS[kind]
+    old_dir = os.path.join(main_dir, "old")
+    if not os.path.exists(old_dir):
+        return []
+
+    current_month = Task_def.get_ESS_dt().strftime("%y%m")
+    pattern = re.compile(rf"{re.escape(prefix)}(\d{{6}})\.csv")
+
+    # 締まった月ごとに日次csvをまとめる
+    files_by_month: dict[str, list[str]] = {}
+    for fname in os.listdir(old_dir):
+        m = pattern.fullmatch(fname)
+        if not m:
+            continue
+        month = m.group(1)[:4]
+        if month < current_month:
+            files_by_month.setdefault(month, []).append(fname)
+
+    bundle_paths = []
+    for month, fnames in sorted(files_by_month.items()):
+        bundle_path = os.path.join(old_dir, f"{prefix}{month}.zip")
+
+        # 既存バンドルのメンバを引き継ぐ
+        members: dict[str, bytes] = {}
+        if os.path.exists(bundle_path):
+            with zipfile.ZipFile(bundle_path, "r") as zf:
+                for name in zf.namelist():
+                    if name != INDEX_MEMBER:
+                        members[name] = zf.read(name)
+
+        for fname in fnames:
+            with open(os.path.join(old_dir, fname), "rb") as f:
+                members[fname] = f.read()
+
+        # 日別インデックスを作成（キーはyymmdd）
+        index = {}
+        for name, data in members.items():
+            m = pattern.fullmatch(name)
+            if m:
+                index[m.group(1)] = {"member": name, "size": len(data)}
+
+        tmp_path = bundle_path + ".tmp"
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for name in sorted(members):
+                zf.writestr(name, members[name])
+            zf.writestr(INDEX_MEMBER, json.dumps(index, ensure_ascii=False, sort_keys=True))
+        os.replace(tmp_path, bundle_path)
+
+        # バンドルに格納した日次csvを削除
+        for fname in fnames:
+            os.remove(os.path.join(old_dir, fname))
+        bundle_paths.append(bundle_path)
+
+    return bundle_paths
+
+# -------------------------------------------------------------
+# 読み込み
+# -------------------------------------------------------------
+
+def list_day_paths(kind: str) -> dict[str, str]:
+    """種別ごとに、日付（yymmdd）と読み込み用パスの対応を返す
+
+    同じ日付が複数箇所にある場合は、保存先フォルダ → oldフォルダ → バンドルの順で優先する。
+
+    Args:
+        kind (str): 種別（"WorkLog" または "WillDo"）
+
+    Returns:
+        dict[str, str]: 日付（yymmdd）をキー、ファイルパスまたはバンドル内の仮想パスを値とする辞書
+    """
+    main_dir, prefix = ARCHIVE_KINDS[kind]
+    old_dir = os.path.join(main_dir, "old")
+    pattern = re.compile(rf"{re.escape(prefix)}(\d{{6}})\.csv")
+
+    day_paths = {}
+    for bundle_path in _list_bundle_paths(kind):
+        for date_str, entry in _read_index(bundle_path).items():
+            day_paths[date_str] = os.path.join(bundle_path, entry["member"])
+
+    # 後から上書きすることで保存先フォルダ・oldフォルダのcsvを優先する
+    for folder in [old_dir, main_dir]:
+        if not os.path.exists(folder):
+            continue
+        for fname in os.listdir(folder):
+            m = pattern.fullmatch(fname)
+            if m:
+                day_paths[m.group(1)] = os.path.join(folder, fname)
+    return day_paths
+
+
+def list_bundled_dates(kind: str) -> list[str]:
+    """バンドルに格納済みの日付（yymmdd）のリストを返す
+
+    Args:
+        kind (str): 種別（"WorkLog" または "WillDo"）
+
+    Returns:
+        list[str]: 日付（yymmdd）の昇順リスト
+    """
+    dates = []
+    for bundle_path in _list_bundle_paths(kind):
+        dates.extend(_read_index(bundle_path).keys())
+    return sorted(dates)
+
+
+def resolve_day_path(kind: str, date_str: str) -> str:
+    """日付（yymmdd）から1日分のcsvの読み込み用パスを返す
+
+    保存先フォルダ → oldフォルダ → バンドルの順に探し、見つからない場合は保存先フォルダのパスを返す
+    （呼び出し側は exists() で存在確認する）。
+
+    Args:
+        kind (str): 種別（"WorkLog" または "WillDo"）
+        date_str (str): 日付（yymmdd形式）
+
+    Returns:
+        str: ファイルパスまたはバンドル内の仮想パス
+    """
+    main_dir, prefix = ARCHIVE_KINDS[kind]
+    fname = f"{prefix}{date_str}.csv"
+    main_path = os.path.join(main_dir, fname)
+    old_path = os.path.join(main_dir, "old", fname)
+    if os.path.exists(main_path):
+        return main_path
+    if os.path.exists(old_path):
+        return old_path
+
+    bundle_path = os.path.join(main_dir, "old", f"{prefix}{date_str[:4]}.zip")
+    if os.path.exists(bundle_path):
+        entry = _read_index(bundle_path).get(date_str)
+        if entry is not None:
+            return os.path.join(bundle_path, entry["member"])
+    return main_path
+
+
+def exists(path: str) -> bool:
+    """ファイルパスまたはバンドル内の仮想パスが存在するかを返す
+
+    Args:
+        path (str): ファイルパスまたはバンドル内の仮想パス
+
+    Returns:
+        bool: 存在する場合True
+    """
+    if os.path.exists(path):
+        return True
+    bundle_path, member = _split_bundle_path(path)
+    if bundle_path is None:
+        return False
+    return any(entry["member"] == member for entry in _read_index(bundle_path).values())
+
+
+def read_bytes(path: str) -> bytes:
+    """ファイルパスまたはバンドル内の仮想パスの内容をバイト列で返す
+
+    バンドルの場合は対象日のメンバのみを展開する。
+
+    Args:
+        path (str): ファイルパスまたはバンドル内の仮想パス
+
+    Raises:
+        FileNotFoundError: ファイルもバンドル内のメンバも存在しない場合
+
+    Returns:
+        bytes: ファイル内容
+    """
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+    bundle_path, member = _split_bundle_path(path)
+    if bundle_path is None:
+        raise FileNotFoundError(f"'{path}' が見つかりません")
+    with zipfile.ZipFile(bundle_path, "r") as zf:
+        try:
+            return zf.read(member)
+        except KeyError:
+            raise FileNotFoundError(f"'{path}' が見つかりません")
+
+
+def read_csv(path: str, **kwargs) -> pd.DataFrame:
+    """ファイルパスまたはバンドル内の仮想パスからcsvを読み込む
+
+    Args:
+        path (str): ファイルパスまたはバンドル内の仮想パス
+        **kwargs: pd.read_csvに渡すキーワード引数
+
+    Returns:
+        pd.DataFrame: 読み込んだDataFrame
+    """
+    if os.path.exists(path):
+        return pd.read_csv(path, **kwargs)
+    return pd.read_csv(io.BytesIO(read_bytes(path)), **kwargs)
+
+# -------------------------------------------------------------
+# 上記の関数で使用する補助関数群
+# -------------------------------------------------------------
+
+def _list_bundle_paths(kind: str) -> list[str]:
+    """oldフォルダ内の月次バンドルのパスを昇順で返す"""
+    main_dir, prefix = ARCHIVE_KINDS[kind]
+    old_dir = os.path.join(main_dir, "old")
+    if not os.path.exists(old_dir):
+        return []
+    pattern = re.compile(rf"{re.escape(prefix)}\d{{4}}\.zip")
+    return [
+        os.path.join(old_dir, fname)
+        for fname in sorted(os.listdir(old_dir))
+        if pattern.fullmatch(fname)
+    ]
+
+
+def _read_index(bundle_path: str) -> dict:
+    """バンドルの日別インデックスを読み込む（バンドルの更新時刻が変わらない限りキャッシュを返す）"""
+    try:
+        mtime_ns = os.stat(bundle_path).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+
+    cached = _index_cache.get(bundle_path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    with zipfile.ZipFile(bundle_path, "r") as zf:
+        index = json.loads(zf.read(INDEX_MEMBER).decode("utf-8"))
+    _index_cache[bundle_path] = (mtime_ns, index)
+    return index
+
+
+def _split_bundle_path(path: str) -> tuple[Optional[str], Optional[str]]:
+    """バンドル内の仮想パスを（バンドルパス, メンバ名）に分割する。仮想パスでない場合は(None, None)"""
+    bundle_path, member = os.path.split(path)
+    if bundle_path.endswith(".zip") and os.path.isfile(bundle_path):
+        return bundle_path, member
+    return None, None
+
+
+if __name__ == "__main__":
+    for _kind in ARCHIVE_KINDS:
+        print(_kind, compact_closed_months(_kind))
@@ -0,0 +1,338 @@
+"""
+dataフォルダ内の複数ファイルへの書き込みを1つの単位で確定するトランザクションモジュール
+タイマー開始時の「前タスクcsvの実績補正・工数実績csvへの追記・今回タスクcsvの実績加算」のように、
+複数ファイルにまたがる書き込みを他セッションと交互に実行させないために使用する。
+
+- 書き込み側はdataフォルダ単位のアドバイザリロック（.txlock）で排他する
+- 書き込みはトランザクション内でステージングし、確定時にジャーナル（.journal.json）を
+  書き出してから各ファイルに反映する。反映途中で異常終了した場合は、アプリ起動時（P_app_startup）と
+  次にロックを取得した時点でジャーナルを再実行して書き込みを完了させる
+- 全体を書き換えるファイルは一時ファイルからの置き換え、工数実績csvのような追記ファイルは
+  「指定位置で切り詰めて書き込む」操作で反映するため、いずれも再実行しても結果が変わらない
+- 読み込み側はロックを取得しないため、ダッシュボード等の長い読み込みは書き込みと並行して実行できる
+"""
+import base64
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+try:
+    import fcntl  # Linux/macOS
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt  # Windows
+except ImportError:
+    msvcrt = None
+
+# トランザクションの対象とするデータフォルダ
+DATA_ROOT = "data"
+
+# ロックファイル・ジャーナルファイルの名前（データフォルダ直下に作成）
+LOCK_NAME = ".txlock"
+JOURNAL_NAME = ".journal.json"
+
+# 全体を書き換えるファイルの一時ファイルの接尾辞
+TMP_SUFFIX = ".txtmp"
+
+# 確定時にfsyncしてディスクへの書き込みを保証するかどうか（transactionのfsync引数の既定値）
+FSYNC = False
+
+# 同一プロセス内（Streamlitの複数セッション）での排他に使うロック {データフォルダの絶対パス: ロック}
+_thread_locks: dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+# スレッドごとの実行中トランザクション {データフォルダの絶対パス: Transaction}
+_local = threading.local()
+
+# -------------------------------------------------------------
+# トランザクション
+# -------------------------------------------------------------
+
+
+class Transaction:
+    """ステージングした書き込みを確定時にまとめて反映するトランザクション
+
+    transaction() から取得して使用する。書き込みは commit() まで実ファイルに反映されない。
+    size() / read_bytes() はステージング済みの書き込みを反映した内容を返す。
+
+    Attributes:
+        data_root (str): 対象のデータフォルダ
+        fsync (bool): 確定時にfsyncするかどうか
+        cache (dict): 呼び出し側がトランザクション内で読み込んだオブジェクトを保持するための辞書
+    """
+
+    def __init__(self, data_root: str, fsync: bool):
+        self.data_root = data_root
+        self.fsync = fsync
+        self.cache: dict = {}
+        # ファイルパスごとのステージング済み操作のリスト（書き込み順）
+        self._ops: dict[str, list[dict]] = {}
+
+    def write_text(self, path: str, text: str, encoding: str = "utf-8") -> None:
+        """ファイル全体を指定の文字列で書き換える操作をステージングする
+
+        Args:
+            path (str): 書き込み先のファイルパス
+            text (str): 書き込む文字列
+            encoding (str): 文字コード
+        """
+        self.write_bytes(path, text.encode(encoding))
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        """ファイル全体を指定のバイト列で書き換える操作をステージングする
+
+        同じファイルに対するそれまでのステージング済み操作は破棄される。
+
+        Args:
+            path (str): 書き込み先のファイルパス
+            data (bytes): 書き込むバイト列
+        """
+        self._ops[path] = [{"op": "replace", "data": data}]
+
+    def truncate_write(self, path: str, offset: int, data: bytes) -> None:
+        """ファイルを指定位置で切り詰め、その位置からバイト列を書き込む操作をステージングする
+
+        Args:
+            path (str): 書き込み先のファイルパス
+            offset (int): 切り詰める位置（バイト）
+            data (bytes): 書き込むバイト列
+
+        Raises:
+            ValueError: 切り詰める位置がステージング後のファイルサイズを超える場合
+        """
+        size = self.size(path)
+        if offset > size:
+            raise ValueError(f"'{path}' の切り詰め位置 {offset} がファイルサイズ {size} を超えています")
+        self._ops.setdefault(path, []).append({"op": "truncate_write", "offset": offset, "data": data})
+
+    def append_bytes(self, path: str, data: bytes) -> None:
+        """ファイル末尾にバイト列を追記する操作をステージングする
+
+        Args:
+            path (str): 書き込み先のファイルパス
+            data (bytes): 追記するバイト列
+        """
+        self.truncate_write(path, self.size(path), data)
+
+    def is_staged(self, path: str) -> bool:
+        """ファイルに対するステージング済みの操作があるかを返す"""
+        return bool(self._ops.get(path))
+
+    def exists(self, path: str) -> bool:
+        """ステージング済みの操作を反映した上で、ファイルが存在するかを返す"""
+        return self.is_staged(path) or os.path.exists(path)
+
+    def size(self, path: str) -> int:
+        """ステージング済みの操作を反映したファイルサイズ（バイト）を返す"""
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        for op in self._ops.get(path, []):
+            if op["op"] == "replace":
+                size = len(op["data"])
+            else:
+                size = op["offset"] + len(op["data"])
+        return size
+
+    def read_bytes(self, path: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        """ステージング済みの操作を反映したファイル内容のうち、指定範囲を返す
+
+        Args:
+            path (str): ファイルパス
+            start (int): 読み込み開始位置（バイト）
+            end (Optional[int]): 読み込み終了位置（バイト、この位置は含まない）。Noneの場合はファイル末尾
+
+        Returns:
+            bytes: 指定範囲の内容
+        """
+        if end is None:
+            end = self.size(path)
+        buf = b""
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                f.seek(start)
+                buf = f.read(max(0, end - start))
+
+        # 操作を順に適用し、指定範囲の内容だけを追跡する
+        for op in self._ops.get(path, []):
+            if op["op"] == "replace":
+                buf = op["data"][start:end]
+            else:
+                offset, data = op["offset"], op["data"]
+                buf = buf[:max(0, offset - start)] + data[max(0, start - offset):max(0, end - offset)]
+        return buf
+
+    def commit(self) -> None:
+        """ステージング済みの操作をジャーナルに書き出してから各ファイルに反映する"""
+        if not self._ops:
+            return
+
+        # 1. 全体を書き換えるファイルは一時ファイルに書き出し、ジャーナルの操作に変換
+        entries = []
+        for path, ops in self._ops.items():
+            for op in ops:
+                if op["op"] == "replace":
+                    tmp_path = path + TMP_SUFFIX
+                    with open(tmp_path, "wb") as f:
+                        f.write(op["data"])
+                        _flush(f, self.fsync)
+                    entries.append({"op": "replace", "path": path, "tmp": tmp_path})
+                else:
+                    entries.append({
+                        "op": "truncate_write", "path": path, "offset": op["offset"],
+                        "data": base64.b64encode(op["data"]).decode("ascii")})
+
+        # 2. ジャーナルを一時ファイル経由で書き出す（書き出し途中のジャーナルは存在しない扱い）
+        journal_path = os.path.join(self.data_root, JOURNAL_NAME)
+        with open(journal_path + TMP_SUFFIX, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+            _flush(f, self.fsync)
+        os.replace(journal_path + TMP_SUFFIX, journal_path)
+
+        # 3. 各ファイルに反映し、ジャーナルを削除
+        _apply_entries(entries, self.fsync)
+        os.remove(journal_path)
+        self._ops.clear()
+
+    def discard(self) -> None:
+        """ステージング済みの操作を破棄する"""
+        self._ops.clear()
+        self.cache.clear()
+
+
+@contextmanager
+def transaction(data_root: str = DATA_ROOT, fsync: Optional[bool] = None) -> Iterator[Transaction]:
+    """データフォルダのロックを取得してトランザクションを開始する
+
+    ブロックを正常に抜けた場合は確定し、例外が発生した場合はステージング済みの書き込みを破棄する。
+    同じスレッドで既に同じデータフォルダのトランザクションを実行中の場合は、そのトランザクションを返す
+    （確定は一番外側のトランザクションで行う）。
+
+    Args:
+        data_root (str): 対象のデータフォルダ
+        fsync (Optional[bool]): 確定時にfsyncするかどうか。Noneの場合はFSYNCの設定に従う
+
+    Yields:
+        Transaction: トランザクション
+    """
+    key = os.path.abspath(data_root)
+    active = getattr(_local, "active", None)
+    if active is None:
+        active = _local.active = {}
+    if key in active:
+        yield active[key]
+        return
+
+    with _get_thread_lock(key), _data_root_lock(data_root):
+        # 前回の確定が途中で中断されていれば、先に完了させる
+        recover(data_root)
+
+        tx = Transaction(data_root, FSYNC if fsync is None else fsync)
+        active[key] = tx
+        try:
+            yield tx
+            tx.commit()
+        except BaseException:
+            tx.discard()
+            raise
+        finally:
+            del active[key]
+
+
+def recover(data_root: str = DATA_ROOT) -> bool:
+    """中断されたトランザクションのジャーナルがあれば再実行して確定させる
+
+    ロックを取得した状態で呼び出すこと（transaction() の開始時に自動で呼び出される）。
+    ロックを取得していない場合は recover_on_startup() を使う。
+
+    Args:
+        data_root (str): 対象のデータフォルダ
+
+    Returns:
+        bool: ジャーナルを再実行した場合True
+    """
+    journal_path = os.path.join(data_root, JOURNAL_NAME)
+    if not os.path.exists(journal_path):
+        return False
+
+    with open(journal_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    _apply_entries(entries, True)
+    os.remove(journal_path)
+    return True
+
+def recover_on_startup(data_root: str = DATA_ROOT) -> bool:
+    """ロックを取得して、中断されたトランザクションのジャーナルがあれば再実行する（アプリ起動時に呼び出す）
+
+    読み込み側はロックを取得しないため、起動時に再実行しておかないと、次の書き込みまで
+    反映途中のファイルを読み込むことになる。
+
+    Args:
+        data_root (str): 対象のデータフォルダ
+
+    Returns:
+        bool: ジャーナルを再実行した場合True
+    """
+    if not os.path.isdir(data_root):
+        return False
+    with _get_thread_lock(os.path.abspath(data_root)), _data_root_lock(data_root):
+        return recover(data_root)
+
+# -------------------------------------------------------------
+# 上記の関数で使用する補助関数群
+# -------------------------------------------------------------
+
+
+def _apply_entries(entries: list[dict], fsync: bool) -> None:
+    """ジャーナルの操作を順に実ファイルへ反映する（再実行しても結果が変わらない）"""
+    for entry in entries:
+        path = entry["path"]
+        if entry["op"] == "replace":
+            # 一時ファイルがない場合は反映済み
+            if os.path.exists(entry["tmp"]):
+                os.replace(entry["tmp"], path)
+        else:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o666)
+            with os.fdopen(fd, "r+b") as f:
+                f.truncate(entry["offset"])
+                f.seek(entry["offset"])
+                f.write(base64.b64decode(entry["data"]))
+                _flush(f, fsync)
+
+
+def _flush(f, fsync: bool) -> None:
+    """ファイルをフラッシュし、指定された場合はfsyncする"""
+    f.flush()
+    if fsync:
+        os.fsync(f.fileno())
+
+
+def _get_thread_lock(key: str) -> threading.Lock:
+    """データフォルダごとのプロセス内ロックを返す"""
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(key, threading.Lock())
+
+
+@contextmanager
+def _data_root_lock(data_root: str):
+    """データフォルダ直下のロックファイルへのOSのアドバイザリロック（fcntl / msvcrt）で排他する"""
+    lock_path = os.path.join(data_root, LOCK_NAME)
+    with open(lock_path, "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+if __name__ == "__main__":
+    print("recovered" if recover_on_startup() else "no pending journal")
@@ -0,0 +1,189 @@
+"""
+タスクcsvのサブタスク実績時間（actual_time）と工数実績csvの突合モジュール
+actual_timeはタイマー操作ごとの加減算で更新されるため、工数実績csvを手で修正するとずれが蓄積する。
+本モジュールは全期間の工数実績csv（保存先フォルダ・oldフォルダ・月次バンドル）を並列に読み込み、
+(タスクID, サブタスクID)ごとの実績時間を一括で集計してタスクcsvと突き合わせ、ずれを報告・一括修正する
+
+夜間の定期実行を想定し、`python services/J_actual_time_reconcile.py [--fix]` で実行できる
+"""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import models.Task_definition as Task_def
+import services.H_monthly_archive as Output_H
+import services.I_file_transaction as Output_I
+
+# 突合対象のタスクcsvフォルダ
+TASK_FOLDERS = [
+    os.path.join("data", "Project", "Active"),
+    os.path.join("data", "Project", "Complete"),
+    os.path.join("data", "Daily", "Active"),
+    os.path.join("data", "Daily", "Complete"),
+]
+
+# 工数実績csvから読み込む列
+_WORKLOG_USECOLS = ["タスクID", "サブタスクID", "開始時刻", "終了時刻"]
+
+# 突合結果の列
+RECONCILE_COLUMNS = ["タスクID", "サブタスクID", "実績(タスクcsv)", "実績(工数実績)", "差分", "タスクcsvパス"]
+
+# -------------------------------------------------------------
+# 集計
+# -------------------------------------------------------------
+
+def aggregate_worklog_minutes(max_workers: Optional[int] = None) -> pd.DataFrame:
+    """全期間の工数実績csvを並列に読み込み、(タスクID, サブタスクID)ごとの実績時間（分）を集計する
+
+    実績時間は行ごとに「(終了時刻 - 開始時刻)の分数（切り捨て）」を求めて合計する
+    （工数実績記録時にタスクcsvへ加減算する値と同じ計算）。
+    読み込みに失敗したファイルのパスは、返り値の attrs["skipped_files"] に格納する。
+
+    Args:
+        max_workers (Optional[int]): 並列読み込みのスレッド数。Noneの場合はThreadPoolExecutorの既定値
+
+    Returns:
+        pd.DataFrame: タスクID, サブタスクID, 実績(工数実績) の列を持つDataFrame
+    """
+    paths = [path for _, path in sorted(Output_H.list_day_paths("WorkLog").items())]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(_read_worklog_for_reconcile, paths))
+
+    dfs = [df for df in results if df is not None and not df.empty]
+    skipped_files = [path for path, df in zip(paths, results) if df is None]
+
+    if dfs:
+        combined = pd.concat(dfs, ignore_index=True)
+        start = pd.to_datetime(combined["開始時刻"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+        end = pd.to_datetime(combined["終了時刻"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+        combined["実績(工数実績)"] = np.trunc((end - start).dt.total_seconds() / 60)
+        combined = combined.dropna(subset=["タスクID", "サブタスクID", "実績(工数実績)"])
+        minutes_df = (
+            combined.groupby(["タスクID", "サブタスクID"], as_index=False, sort=True)["実績(工数実績)"].sum()
+        )
+        minutes_df["実績(工数実績)"] = minutes_df["実績(工数実績)"].astype(int)
+    else:
+        minutes_df = pd.DataFrame({
+            "タスクID": pd.Series(dtype=str),
+            "サブタスクID": pd.Series(dtype=str),
+            "実績(工数実績)": pd.Series(dtype=int),
+        })
+
+    minutes_df.attrs["skipped_files"] = skipped_files
+    return minutes_df
+
+
+def collect_task_actual_times() -> pd.DataFrame:
+    """全タスクcsv（Active・Complete）のサブタスク実績時間を1つのDataFrameにまとめる
+
+    Returns:
+        pd.DataFrame: タスクID, サブタスクID, 実績(タスクcsv), タスクcsvパス の列を持つDataFrame
+    """
+    rows = []
+    for folder in TASK_FOLDERS:
+        if not os.path.exists(folder):
+            continue
+        for task_id, task in Task_def.read_all_task_csvs(folder).items():
+            if task.sub_tasks.empty:
+                continue
+            rows.append(pd.DataFrame({
+                "タスクID": task_id,
+                "サブタスクID": task.sub_tasks["subtask_id"].astype(str).values,
+                "実績(タスクcsv)": task.sub_tasks["actual_time"].astype(int).values,
+                "タスクcsvパス": os.path.join(folder, f"{task_id}.csv"),
+            }))
+
+    if not rows:
+        return pd.DataFrame(columns=["タスクID", "サブタスクID", "実績(タスクcsv)", "タスクcsvパス"])
+    return pd.concat(rows, ignore_index=True)
+
+# -------------------------------------------------------------
+# 突合・修正
+# -------------------------------------------------------------
+
+def reconcile_actual_times(
+        include_unlogged: bool = False, max_workers: Optional[int] = None) -> pd.DataFrame:
+    """タスクcsvのサブタスク実績時間と工数実績csvの集計値を突き合わせ、ずれのある行を返す
+
+    工数実績csvにのみ存在するタスク（打合せ等、タスクcsvがないもの）は対象外とする。
+
+    Args:
+        include_unlogged (bool): Trueの場合、工数実績csvに1行もないサブタスク（工数実績0分扱い）も突合する。
+            工数実績csvの運用開始前に実績を入力したサブタスクが大量に報告されるのを避けるため、既定はFalse
+        max_workers (Optional[int]): 工数実績csvの並列読み込みのスレッド数
+
+    Returns:
+        pd.DataFrame: RECONCILE_COLUMNS の列を持つ、ずれのある行のDataFrame（タスクID, サブタスクID順）
+    """
+    task_df = collect_task_actual_times()
+    minutes_df = aggregate_worklog_minutes(max_workers=max_workers)
+
+    merged = task_df.merge(
+        minutes_df, on=["タスクID", "サブタスクID"], how="left", indicator=True)
+    if not include_unlogged:
+        merged = merged[merged["_merge"] == "both"]
+    merged["実績(工数実績)"] = merged["実績(工数実績)"].fillna(0).astype(int)
+    merged["差分"] = merged["実績(タスクcsv)"].astype(int) - merged["実績(工数実績)"]
+
+    mismatch_df = merged.loc[merged["差分"] != 0, RECONCILE_COLUMNS]
+    mismatch_df = mismatch_df.sort_values(["タスクID", "サブタスクID"]).reset_index(drop=True)
+    mismatch_df.attrs["skipped_files"] = minutes_df.attrs.get("skipped_files", [])
+    return mismatch_df
+
+
+def fix_actual_times(mismatch_df: pd.DataFrame) -> int:
+    """突合結果に従い、タスクcsvのサブタスク実績時間を工数実績csvの集計値に一括で書き換える
+
+    全タスクcsvの書き換えを1つのトランザクションで確定する。
+
+    Args:
+        mismatch_df (pd.DataFrame): reconcile_actual_times() の返り値
+
+    Returns:
+        int: 書き換えたサブタスクの数
+    """
+    fixed_count = 0
+    with Output_I.transaction() as tx:
+        for task_csv_path, group in mismatch_df.groupby("タスクcsvパス", sort=True):
+            if not os.path.exists(task_csv_path):
+                continue
+            # 突合後に更新されている可能性があるため、ロック取得後に読み直す
+            task = Task_def.read_task_csv(task_csv_path)
+            new_actual = dict(zip(group["サブタスクID"], group["実績(工数実績)"]))
+
+            is_target = task.sub_tasks["subtask_id"].isin(new_actual.keys())
+            if not is_target.any():
+                continue
+            task.sub_tasks.loc[is_target, "actual_time"] = (
+                task.sub_tasks.loc[is_target, "subtask_id"].map(new_actual).astype(int))
+            fixed_count += int(is_target.sum())
+
+            # Task.save_to_csv（テキストモード書き込み）と同じくOSの既定の改行コードにする
+            tx.write_text(task_csv_path, task.to_csv_text().replace("\n", os.linesep))
+    return fixed_count
+
+# -------------------------------------------------------------
+# 上記の関数で使用する補助関数群
+# -------------------------------------------------------------
+
+def _read_worklog_for_reconcile(path: str) -> Optional[pd.DataFrame]:
+    """工数実績csv（バンドル内の仮想パスを含む）から突合に必要な列だけを文字列として読み込む。失敗した場合はNone"""
+    try:
+        return Output_H.read_csv(path, usecols=_WORKLOG_USECOLS, dtype=str, encoding="utf-8")
+    except Exception:
+        return None
+
+
+if __name__ == "__main__":
+    _mismatch_df = reconcile_actual_times(include_unlogged="--include-unlogged" in sys.argv)
+    print(_mismatch_df.to_string(index=False))
+    if _mismatch_df.attrs["skipped_files"]:
+        print("読み込めなかった工数実績csv:", _mismatch_df.attrs["skipped_files"])
+    if "--fix" in sys.argv:
+        print(f"{fix_actual_times(_mismatch_df)}件のサブタスク実績時間を修正しました")
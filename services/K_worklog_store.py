@@ -0,0 +1,288 @@
+"""
+工数実績の月別列指向ストア（Parquet）モジュール
+日次の工数実績csvを月ごとのParquetファイル（開始時刻・終了時刻はタイムスタンプ型）に取り込み、
+複数日にまたがる読み込みでcsvの文字列・日時の解析を繰り返さないようにする。
+
+- 当日分の工数実績csvは従来どおりcsvに追記し、ストアには取り込まない
+- 取り込み済みの日ごとに取り込み元ファイルの版（更新時刻・サイズ等）を manifest.json に記録し、
+  版が変わった日を含む月だけを取り込み直す（増分取り込み）
+- 読み込み時は「ファイル日付」列の条件をParquetの読み込みに渡し、対象日の行だけを読み込む
+- pyarrowがインストールされていない環境では取り込み・読み込みを行わず、呼び出し側はcsvを読み込む
+"""
+import json
+import os
+import re
+import sys
+import zipfile
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import models.Task_definition as Task_def
+import services.H_monthly_archive as Output_H
+import services.I_file_transaction as Output_I
+
+# ストアの保存先フォルダとマニフェストのパス
+STORE_DIR = os.path.join("data", "WorkLogs", "store")
+MANIFEST_PATH = os.path.join(STORE_DIR, "manifest.json")
+
+# 工数実績csvの列（文字列列と日時列）
+STRING_COLUMNS = ["オーダ番号", "オーダ略称", "プロジェクト略称", "タスクID", "サブタスクID", "タスク名", "サブタスク名"]
+DATETIME_COLUMNS = ["開始時刻", "終了時刻"]
+
+# ストアに追加する日付列（パーティション内の絞り込みに使用）
+DATE_COLUMN = "ファイル日付"
+
+# マニフェスト読み込みキャッシュ (マニフェストの絶対パス, mtime_ns, マニフェスト)
+_manifest_cache: Optional[tuple[str, int, dict]] = None
+
+# バンドル内メンバのCRCキャッシュ {バンドルパス: (mtime_ns, {メンバ名: CRC})}
+_bundle_crc_cache: dict[str, tuple[int, dict]] = {}
+
+# -------------------------------------------------------------
+# 取り込み
+# -------------------------------------------------------------
+
+def is_available() -> bool:
+    """ストアが使用可能か（pyarrowがインストールされているか）を返す"""
+    return pq is not None
+
+
+def ingest_worklogs(include_today: bool = False) -> list[str]:
+    """日次の工数実績csvのうち、未取り込み・更新済みの日を含む月をストアに取り込む
+
+    Args:
+        include_today (bool): Trueの場合、ESS基準の当日分も取り込む（既定では書き込み中のため取り込まない）
+
+    Returns:
+        list[str]: 書き換えた月（yymm形式）のリスト
+    """
+    if not is_available():
+        return []
+
+    today_str = Task_def.get_ESS_dt().strftime("%y%m%d")
+    day_paths = Output_H.list_day_paths("WorkLog")
+    if not include_today:
+        day_paths.pop(today_str, None)
+
+    manifest = _read_manifest()
+    days = manifest.get("days", {})
+
+    # 取り込み元の版が変わった日（削除された日を含む）がある月を洗い出す
+    current_signatures = {date_str: _source_signature(path) for date_str, path in day_paths.items()}
+    changed_months = set()
+    for date_str, signature in current_signatures.items():
+        if days.get(date_str, {}).get("signature") != signature:
+            changed_months.add(date_str[:4])
+    for date_str in days:
+        if date_str not in current_signatures:
+            changed_months.add(date_str[:4])
+    if not changed_months:
+        return []
+
+    new_days = {d: entry for d, entry in days.items() if d[:4] not in changed_months}
+    with Output_I.transaction() as tx:
+        for month in sorted(changed_months):
+            month_dfs = []
+            for date_str in sorted(d for d in day_paths if d[:4] == month):
+                df = _read_day_csv(day_paths[date_str], date_str)
+                if df is None:
+                    continue  # 解析できない日は取り込まず、読み込み時はcsvを使用する
+                month_dfs.append(df)
+                new_days[date_str] = {"signature": current_signatures[date_str], "rows": len(df)}
+
+            partition_path = _partition_path(month)
+            if month_dfs:
+                table = pa.Table.from_pandas(
+                    pd.concat(month_dfs, ignore_index=True), schema=_schema(), preserve_index=False)
+                sink = pa.BufferOutputStream()
+                pq.write_table(table, sink)
+                os.makedirs(STORE_DIR, exist_ok=True)
+                tx.write_bytes(partition_path, sink.getvalue().to_pybytes())
+            elif os.path.exists(partition_path):
+                # 取り込み元がなくなった月は空のパーティションにする
+                sink = pa.BufferOutputStream()
+                pq.write_table(_schema().empty_table(), sink)
+                tx.write_bytes(partition_path, sink.getvalue().to_pybytes())
+
+        os.makedirs(STORE_DIR, exist_ok=True)
+        tx.write_text(MANIFEST_PATH, json.dumps(
+            {"version": 1, "days": dict(sorted(new_days.items()))}, ensure_ascii=False, indent=1))
+
+    return sorted(changed_months)
+
+# -------------------------------------------------------------
+# 読み込み
+# -------------------------------------------------------------
+
+def read_period(start_date: datetime, end_date: datetime) -> tuple[pd.DataFrame, set[str]]:
+    """指定期間のうち、ストアに最新の状態で取り込み済みの日の工数実績を読み込む
+
+    取り込み後に取り込み元csvが更新された日、未取り込みの日は含まない（呼び出し側でcsvを読み込む）。
+
+    Args:
+        start_date (datetime): 開始日
+        end_date (datetime): 終了日
+
+    Returns:
+        tuple[pd.DataFrame, set[str]]: (工数実績のDataFrame（ファイル日付列付き）, 含まれる日付（yymmdd）の集合)
+    """
+    if not is_available():
+        return pd.DataFrame(), set()
+
+    day_paths = Output_H.list_day_paths("WorkLog")
+    fresh_dates = set()
+    for date_str, entry in _read_manifest().get("days", {}).items():
+        try:
+            file_date = datetime.strptime(date_str, "%y%m%d").date()
+        except ValueError:
+            continue
+        if not (start_date.date() <= file_date <= end_date.date()):
+            continue
+        path = day_paths.get(date_str)
+        if path is not None and entry.get("signature") == _source_signature(path):
+            fresh_dates.add(date_str)
+
+    return _read_dates(fresh_dates), fresh_dates
+
+
+def read_day(csv_filepath: str) -> Optional[pd.DataFrame]:
+    """工数実績csvのパスに対応する1日分を、ストアに最新の状態で取り込み済みであれば読み込む
+
+    返り値の列・型は Output_H.read_csv(csv_filepath, parse_dates=["開始時刻", "終了時刻"]) に合わせる
+    （ただし文字列列は常に文字列として読み込む）。
+
+    Args:
+        csv_filepath (str): 工数実績csvのパス（バンドル内の仮想パスを含む）
+
+    Returns:
+        Optional[pd.DataFrame]: 1日分の工数実績。ストアを使用できない場合はNone
+    """
+    if not is_available():
+        return None
+    m = re.fullmatch(r"工数実績(\d{6})\.csv", os.path.basename(csv_filepath))
+    if not m:
+        return None
+    date_str = m.group(1)
+
+    entry = _read_manifest().get("days", {}).get(date_str)
+    if entry is None:
+        return None
+    try:
+        if entry.get("signature") != _source_signature(csv_filepath):
+            return None
+    except (FileNotFoundError, KeyError):
+        return None
+
+    df = _read_dates({date_str})
+    return df.drop(columns=[DATE_COLUMN])
+
+# -------------------------------------------------------------
+# 上記の関数で使用する補助関数群
+# -------------------------------------------------------------
+
+def _schema() -> "pa.Schema":
+    """ストアのスキーマ（文字列列・タイムスタンプ列・日付列）"""
+    return pa.schema(
+        [(col, pa.string()) for col in STRING_COLUMNS]
+        + [(col, pa.timestamp("ns")) for col in DATETIME_COLUMNS]
+        + [(DATE_COLUMN, pa.date32())]
+    )
+
+
+def _partition_path(month: str) -> str:
+    """月（yymm形式）のパーティションのパス"""
+    return os.path.join(STORE_DIR, f"工数実績{month}.parquet")
+
+
+def _read_day_csv(path: str, date_str: str) -> Optional[pd.DataFrame]:
+    """取り込み用に1日分の工数実績csvを読み込む。日時列を解析できない場合はNone"""
+    try:
+        df = Output_H.read_csv(
+            path, dtype={col: str for col in STRING_COLUMNS}, parse_dates=DATETIME_COLUMNS)
+    except Exception:
+        return None
+    if df.empty:
+        # 実績行がない日は日時列の型だけそろえる
+        for col in DATETIME_COLUMNS:
+            df[col] = pd.to_datetime(df[col])
+    if not all(pd.api.types.is_datetime64_any_dtype(df[col]) for col in DATETIME_COLUMNS):
+        return None
+    df = df.reindex(columns=STRING_COLUMNS + DATETIME_COLUMNS)
+    df[DATE_COLUMN] = datetime.strptime(date_str, "%y%m%d").date()
+    return df
+
+
+def _read_dates(date_strs: set[str]) -> pd.DataFrame:
+    """指定した日付（yymmdd）の行を、該当する月のパーティションから読み込む"""
+    months = sorted({d[:4] for d in date_strs})
+    dates = [datetime.strptime(d, "%y%m%d").date() for d in sorted(date_strs)]
+
+    tables = []
+    for month in months:
+        partition_path = _partition_path(month)
+        if not os.path.exists(partition_path):
+            continue
+        month_dates = [d for d in dates if d.strftime("%y%m") == month]
+        tables.append(pq.read_table(partition_path, filters=[(DATE_COLUMN, "in", month_dates)]))
+
+    if not tables:
+        return pd.DataFrame(columns=STRING_COLUMNS + DATETIME_COLUMNS + [DATE_COLUMN])
+
+    df = pa.concat_tables(tables).to_pandas()
+    for col in STRING_COLUMNS:
+        # 欠損値はcsv読み込み時と同じくNaNにそろえる
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    for col in DATETIME_COLUMNS:
+        df[col] = df[col].astype("datetime64[ns]")
+    return df
+
+
+def _source_signature(path: str) -> str:
+    """取り込み元（ファイルまたはバンドル内の仮想パス）の版を表す文字列を返す
+
+    ファイルは更新時刻とサイズ、バンドル内のメンバはzipに記録されたCRCとサイズで表す。
+    """
+    if os.path.exists(path):
+        stat = os.stat(path)
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    bundle_path, member = os.path.split(path)
+    mtime_ns = os.stat(bundle_path).st_mtime_ns
+    cached = _bundle_crc_cache.get(bundle_path)
+    if cached is None or cached[0] != mtime_ns:
+        with zipfile.ZipFile(bundle_path, "r") as zf:
+            crcs = {info.filename: f"zip-{info.CRC:08x}-{info.file_size}" for info in zf.infolist()}
+        cached = (mtime_ns, crcs)
+        _bundle_crc_cache[bundle_path] = cached
+    return cached[1][member]
+
+
+def _read_manifest() -> dict:
+    """マニフェストを読み込む（更新時刻が変わらない限りキャッシュを返す）"""
+    global _manifest_cache
+    try:
+        mtime_ns = os.stat(MANIFEST_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    abs_path = os.path.abspath(MANIFEST_PATH)
+    if _manifest_cache is not None and _manifest_cache[:2] == (abs_path, mtime_ns):
+        return _manifest_cache[2]
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    _manifest_cache = (abs_path, mtime_ns, manifest)
+    return manifest
+
+
+if __name__ == "__main__":
+    print(ingest_worklogs())
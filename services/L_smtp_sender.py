@@ -0,0 +1,205 @@
+"""
+バックグラウンドでメールを送信するSMTP送信モジュール
+送信要求は上限付きのキューに積んですぐに戻り、送信用スレッドが順に送信する。
+送信用スレッドはログイン済みのSMTP接続を使い回し（一定時間ごとにNOOPで接続を確認）、
+送信に失敗した場合は接続を張り直して、間隔を倍々に広げながら再送する
+"""
+import queue
+import smtplib
+import ssl
+import threading
+import time
+from email.message import Message
+from typing import Optional
+
+
+class BackgroundSMTPSender:
+    """ログイン済みの接続を使い回し、送信用スレッドでメールを送信するクラス
+
+    Attributes:
+        sent_count (int): 送信に成功したメールの数
+        failed_count (int): 再送を含めて送信に失敗したメールの数
+        dropped_count (int): キューが満杯で破棄したメールの数
+        last_error (Optional[Exception]): 最後に発生した送信エラー
+    """
+
+    def __init__(
+            self, smtp_server: str, smtp_port: int, account: str, password: str,
+            use_ssl: bool = True, queue_size: int = 16,
+            max_retries: int = 3, backoff_seconds: float = 1.0,
+            keepalive_seconds: float = 30.0, idle_timeout_seconds: float = 300.0,
+            timeout_seconds: float = 30.0):
+        """
+        Args:
+            smtp_server (str): SMTPサーバーのホスト名
+            smtp_port (int): SMTPサーバーのポート番号
+            account (str): ログインアカウント
+            password (str): ログインパスワード
+            use_ssl (bool): SMTP_SSLで接続するかどうか（Falseの場合は平文のSMTP）
+            queue_size (int): 送信待ちキューの上限
+            max_retries (int): 1通あたりの再送回数の上限
+            backoff_seconds (float): 1回目の再送までの待ち時間（秒）。以降は倍々に広げる
+            keepalive_seconds (float): 送信待ちがない間、NOOPで接続を確認する間隔（秒）
+            idle_timeout_seconds (float): 送信がないまま経過したら接続を閉じる時間（秒）
+            timeout_seconds (float): ソケットのタイムアウト（秒）
+        """
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.account = account
+        self.password = password
+        self.use_ssl = use_ssl
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.timeout_seconds = timeout_seconds
+
+        self.sent_count = 0
+        self.failed_count = 0
+        self.dropped_count = 0
+        self.last_error: Optional[Exception] = None
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._connection: Optional[smtplib.SMTP] = None
+        # 最後に送信（またはログイン）した時刻と、最後に接続を確認（NOOP）した時刻
+        self._last_sent = 0.0
+        self._last_checked = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._thread_guard = threading.Lock()
+        self._stopping = threading.Event()
+
+    def submit(self, msg: Message) -> bool:
+        """メールを送信待ちキューに積む（送信完了を待たずに戻る）
+
+        Args:
+            msg (Message): 送信するメール
+
+        Returns:
+            bool: キューに積めた場合True、キューが満杯で破棄した場合False
+        """
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(msg)
+        except queue.Full:
+            self.dropped_count += 1
+            return False
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """送信待ちキューが空になる（積んだメールの送信・失敗が確定する）まで待つ
+
+        Args:
+            timeout (Optional[float]): 待ち時間の上限（秒）。Noneの場合は無制限
+
+        Returns:
+            bool: 時間内に空になった場合True
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """送信待ちのメールを送信し終えてから送信用スレッドを止め、接続を閉じる
+
+        Args:
+            timeout (Optional[float]): 待ち時間の上限（秒）。Noneの場合は無制限
+        """
+        self.flush(timeout)
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+        self._stopping.clear()
+
+    # -------------------------------------------------------------
+    # 送信用スレッドで実行する処理
+    # -------------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        """送信用スレッドが動いていなければ起動する"""
+        with self._thread_guard:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="BackgroundSMTPSender", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """送信待ちキューからメールを取り出して送信する"""
+        while not self._stopping.is_set():
+            try:
+                msg = self._queue.get(timeout=min(self.keepalive_seconds, 0.5))
+            except queue.Empty:
+                self._keepalive()
+                continue
+            try:
+                self._send_with_retry(msg)
+            finally:
+                self._queue.task_done()
+        self._close()
+
+    def _send_with_retry(self, msg: Message) -> None:
+        """接続を使い回して送信し、失敗した場合は接続を張り直して再送する"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                connection = self._connect()
+                connection.send_message(msg)
+                self._last_sent = self._last_checked = time.monotonic()
+                self.sent_count += 1
+                return
+            except (smtplib.SMTPException, OSError) as e:
+                self.last_error = e
+                self._close()
+                if attempt < self.max_retries:
+                    self._stopping.wait(self.backoff_seconds * (2 ** attempt))
+        self.failed_count += 1
+
+    def _keepalive(self) -> None:
+        """送信待ちがない間に接続を確認し、長時間送信していない・切れている接続は閉じる
+
+        接続を閉じるかは最後の送信からの時間で、NOOPで確認するかは最後の確認からの時間で判定する
+        （NOOPは送信ではないため、確認しても接続を閉じるまでの時間は延ばさない）。
+        """
+        if self._connection is None:
+            return
+        now = time.monotonic()
+        if now - self._last_sent >= self.idle_timeout_seconds:
+            self._close()
+        elif now - self._last_checked >= self.keepalive_seconds:
+            try:
+                self._connection.noop()
+                self._last_checked = time.monotonic()
+            except (smtplib.SMTPException, OSError):
+                self._close()
+
+    def _connect(self) -> smtplib.SMTP:
+        """ログイン済みの接続を返す（なければ接続してログインする）"""
+        if self._connection is not None:
+            return self._connection
+        if self.use_ssl:
+            connection = smtplib.SMTP_SSL(
+                self.smtp_server, self.smtp_port,
+                context=ssl.create_default_context(), timeout=self.timeout_seconds)
+        else:
+            connection = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout_seconds)
+        try:
+            connection.login(self.account, self.password)
+        except Exception:
+            connection.close()
+            raise
+        self._connection = connection
+        self._last_sent = self._last_checked = time.monotonic()
+        return connection
+
+    def _close(self) -> None:
+        """接続を閉じる（QUITに失敗した場合もソケットは閉じる）"""
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
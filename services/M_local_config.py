@@ -0,0 +1,127 @@
+"""
+dataフォルダ内のローカル設定モジュール（SMTPアカウント・アップロード先パス・タイマー通知先）の読み込みモジュール
+設定モジュールは初回使用時に読み込んでキャッシュし、import時には読み込まない。
+テストやバッチ処理では override() / set_override() で設定を差し替えられる
+"""
+import importlib.util
+import os
+import sys
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+# 設定名ごとの（dataフォルダ内のサブフォルダ, モジュール名）
+CONFIG_MODULES = {
+    "smtp_account": ("smtp_account", "my_gmail_account"),
+    "upload_path": ("upload_path", "my_upload_folder"),
+    "timer_notification": ("timer_notification", "my_timer_notification"),
+}
+
+# 設定モジュールを置くdataフォルダ（リポジトリ直下のdataフォルダ）
+CONFIG_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data"))
+
+# 読み込み済みの設定 {設定名: モジュール}
+_cache: dict[str, Any] = {}
+
+# 差し替え中の設定 {設定名: 設定オブジェクト}
+_overrides: dict[str, Any] = {}
+
+
+def get_config(name: str) -> Any:
+    """設定を返す。差し替え中の場合は差し替えた設定、未読み込みの場合は設定モジュールを読み込む
+
+    Args:
+        name (str): 設定名（CONFIG_MODULES のキー）
+
+    Raises:
+        ImportError: 設定モジュールが存在しない、または読み込みに失敗した場合
+
+    Returns:
+        Any: 設定モジュール（または差し替えた設定オブジェクト）
+    """
+    if name in _overrides:
+        return _overrides[name]
+    if name not in _cache:
+        _cache[name] = _load_config_module(name)
+    return _cache[name]
+
+
+def find_config(name: str) -> Optional[Any]:
+    """設定を返す。設定モジュールが存在しない・読み込みに失敗した場合はNoneを返す（任意の設定用）
+
+    Args:
+        name (str): 設定名（CONFIG_MODULES のキー）
+
+    Returns:
+        Optional[Any]: 設定モジュール（または差し替えた設定オブジェクト）。設定がない場合はNone
+    """
+    try:
+        return get_config(name)
+    except ImportError:
+        return None
+
+
+def set_override(name: str, config: Any) -> None:
+    """設定を差し替える（clear_override() を呼ぶまで有効）
+
+    Args:
+        name (str): 設定名
+        config (Any): 差し替える設定オブジェクト（設定モジュールと同じ属性を持つもの）
+    """
+    _overrides[name] = config
+
+
+def clear_override(name: str) -> None:
+    """設定の差し替えを解除する
+
+    Args:
+        name (str): 設定名
+    """
+    _overrides.pop(name, None)
+
+
+@contextmanager
+def override(name: str, config: Any) -> Iterator[Any]:
+    """withブロックの間だけ設定を差し替える
+
+    Args:
+        name (str): 設定名
+        config (Any): 差し替える設定オブジェクト
+
+    Yields:
+        Any: 差し替えた設定オブジェクト
+    """
+    missing = object()
+    previous = _overrides.get(name, missing)
+    set_override(name, config)
+    try:
+        yield config
+    finally:
+        if previous is missing:
+            clear_override(name)
+        else:
+            set_override(name, previous)
+
+
+def clear_cache() -> None:
+    """読み込み済みの設定を破棄する（次回の get_config() で読み込み直す）"""
+    _cache.clear()
+
+# -------------------------------------------------------------
+# 上記の関数で使用する補助関数群
+# -------------------------------------------------------------
+
+def _load_config_module(name: str) -> Any:
+    """dataフォルダ内の設定モジュールを型安全にインポートする"""
+    folder, module_name = CONFIG_MODULES[name]
+    module_path = os.path.join(CONFIG_ROOT, folder, f"{module_name}.py")
+    try:
+        spec = importlib.util.spec_from_file_location(module_name, module_path)
+        if spec and spec.loader:
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        else:
+            raise ImportError(f"Could not load {module_name} module")
+    except Exception as e:
+        raise ImportError(f"{module_name}のインポートに失敗しました: {e}")
+    sys.modules[module_name] = module
+    return module
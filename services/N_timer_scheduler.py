@@ -0,0 +1,309 @@
+"""
+タイマー終了通知のスケジューラモジュール
+実行中の工数実績行の終了時刻をプロセス内のタイマー（終了時刻順のヒープ）で管理し、
+終了時刻になったら登録された通知先（メール・ローカルコマンド・ファイル出力）に通知する。
+
+- タイマーの登録・取消はヒープへの追加のみ（O(log n)）。取消・置き換えられた古い要素は取り出し時に読み飛ばす
+- 通知は通知用スレッドで行うため、Streamlitのページは通知の完了を待たない
+- 未通知のタイマーはjsonファイルに保存し、再起動後に読み込む（再起動中に終了時刻を過ぎたものはすぐに通知する）
+- 通知先はローカル設定（M_local_config）から作成する。スケジューラはアプリ起動時（P_app_startup）に作成し、
+  保存済みのタイマーを読み込む
+"""
+import heapq
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import services.M_local_config as Output_M
+
+# 未通知のタイマーの保存先
+PENDING_PATH = os.path.join("data", "timer_pending.json")
+
+# ファイル出力による通知の出力先フォルダ
+NOTIFICATION_DIR = os.path.join("data", "timer_notifications")
+
+# 通知先: タイマー情報の辞書（timer_id, fire_at, payload）を受け取る呼び出し可能オブジェクト
+Notifier = Callable[[dict], None]
+
+# プロセスで1つのスケジューラ（get_scheduler()の初回呼び出し時に作成）
+_scheduler: Optional["TimerScheduler"] = None
+_scheduler_guard = threading.Lock()
+
+# -------------------------------------------------------------
+# スケジューラ
+# -------------------------------------------------------------
+
+
+class TimerScheduler:
+    """終了時刻順のヒープでタイマーを管理し、終了時刻になったら通知先に通知するクラス
+
+    Attributes:
+        notifiers (list[Notifier]): 通知先のリスト
+        last_error (Optional[Exception]): 最後に発生した通知エラー
+    """
+
+    def __init__(self, notifiers: Optional[list[Notifier]] = None, pending_path: Optional[str] = PENDING_PATH):
+        """
+        Args:
+            notifiers (Optional[list[Notifier]]): 通知先のリスト
+            pending_path (Optional[str]): 未通知のタイマーの保存先。Noneの場合は保存しない
+        """
+        self.notifiers: list[Notifier] = list(notifiers or [])
+        # カレントディレクトリが変わっても同じファイルに保存するよう絶対パスにしておく
+        self.pending_path = os.path.abspath(pending_path) if pending_path is not None else None
+        self.last_error: Optional[Exception] = None
+
+        # ヒープの要素は (終了時刻のエポック秒, 登録順, タイマーID)
+        self._heap: list[tuple[float, int, str]] = []
+        # 有効なタイマー {タイマーID: {"timer_id", "fire_at", "payload", "seq"}}
+        self._timers: dict[str, dict] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TimerNotifier")
+
+        self._load_pending()
+
+    def register_notifier(self, notifier: Notifier) -> None:
+        """通知先を追加する
+
+        Args:
+            notifier (Notifier): タイマー情報の辞書を受け取る呼び出し可能オブジェクト
+        """
+        self.notifiers.append(notifier)
+
+    def schedule(self, timer_id: str, fire_at: datetime, payload: Optional[dict] = None) -> None:
+        """タイマーを登録する。同じIDのタイマーが登録済みの場合は置き換える
+
+        Args:
+            timer_id (str): タイマーID
+            fire_at (datetime): 通知する日時
+            payload (Optional[dict]): 通知先に渡す情報（jsonに保存できる値のみ）
+        """
+        with self._cond:
+            self._push({"timer_id": timer_id, "fire_at": fire_at.isoformat(), "payload": payload or {}})
+            self._save_pending()
+            self._cond.notify()
+        self._ensure_thread()
+
+    def cancel(self, timer_id: str) -> bool:
+        """タイマーを取り消す
+
+        Args:
+            timer_id (str): タイマーID
+
+        Returns:
+            bool: 取り消した場合True、登録されていなかった場合False
+        """
+        with self._cond:
+            if self._timers.pop(timer_id, None) is None:
+                return False
+            self._save_pending()
+            self._cond.notify()
+        return True
+
+    def pending(self) -> list[dict]:
+        """未通知のタイマーを通知する日時の昇順で返す"""
+        with self._cond:
+            timers = sorted(self._timers.values(), key=lambda t: (t["fire_at"], t["seq"]))
+            return [{k: v for k, v in t.items() if k != "seq"} for t in timers]
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """タイマー用スレッドを止め、実行中の通知の完了を待つ（未通知のタイマーは保存済みのまま残る）
+
+        Args:
+            timeout (Optional[float]): スレッド終了の待ち時間の上限（秒）
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._executor.shutdown(wait=True)
+
+    # -------------------------------------------------------------
+    # タイマー用スレッドで実行する処理
+    # -------------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        """タイマー用スレッドが動いていなければ起動する"""
+        with self._cond:
+            if self._stopping or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(target=self._run, name="TimerScheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        """直近のタイマーの終了時刻まで待ち、終了時刻になったタイマーを通知用スレッドに渡す"""
+        with self._cond:
+            while not self._stopping:
+                # 取消・置き換え済みの要素を読み飛ばす
+                while self._heap and not self._is_live(self._heap[0]):
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                delay = self._heap[0][0] - datetime.now().timestamp()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+
+                _, _, timer_id = heapq.heappop(self._heap)
+                timer = self._timers.pop(timer_id)
+                self._save_pending()
+                self._executor.submit(self._notify, {k: v for k, v in timer.items() if k != "seq"})
+
+    def _notify(self, timer: dict) -> None:
+        """全ての通知先に通知する（ある通知先の失敗は他の通知先に影響させない）"""
+        for notifier in list(self.notifiers):
+            try:
+                notifier(timer)
+            except Exception as e:
+                self.last_error = e
+
+    # -------------------------------------------------------------
+    # 上記の処理で使用する補助関数群
+    # -------------------------------------------------------------
+
+    def _push(self, timer: dict) -> None:
+        """タイマーを有効なタイマーとヒープに追加する（呼び出し側でロックを取得すること）"""
+        timer = dict(timer, seq=next(self._seq))
+        self._timers[timer["timer_id"]] = timer
+        fire_at = datetime.fromisoformat(timer["fire_at"]).timestamp()
+        heapq.heappush(self._heap, (fire_at, timer["seq"], timer["timer_id"]))
+
+    def _is_live(self, entry: tuple[float, int, str]) -> bool:
+        """ヒープの要素が有効なタイマー（取消・置き換えされていない）かを返す"""
+        timer = self._timers.get(entry[2])
+        return timer is not None and timer["seq"] == entry[1]
+
+    def _save_pending(self) -> None:
+        """未通知のタイマーをjsonファイルに保存する（一時ファイルからの置き換え）"""
+        if self.pending_path is None:
+            return
+        timers = [
+            {k: v for k, v in t.items() if k != "seq"}
+            for t in sorted(self._timers.values(), key=lambda t: (t["fire_at"], t["seq"]))
+        ]
+        folder = os.path.dirname(self.pending_path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = self.pending_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(timers, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.pending_path)
+
+    def _load_pending(self) -> None:
+        """保存済みの未通知のタイマーを読み込み、あればタイマー用スレッドを起動する"""
+        if self.pending_path is None or not os.path.exists(self.pending_path):
+            return
+        with open(self.pending_path, "r", encoding="utf-8") as f:
+            timers = json.load(f)
+        with self._cond:
+            for timer in timers:
+                self._push(timer)
+        if self._timers:
+            self._ensure_thread()
+
+# -------------------------------------------------------------
+# 通知先
+# -------------------------------------------------------------
+
+
+class EmailNotifier:
+    """タイマー終了をメールで通知する（送信はD_external_timer_bootの送信用スレッドで行う）"""
+
+    def __call__(self, timer: dict) -> None:
+        import services.D_external_timer_boot as Output_D
+        Output_D.send_timer_end_email(timer["payload"].get("label", timer["timer_id"]))
+
+
+class CommandNotifier:
+    """タイマー終了時にローカルのコマンドを起動する（コマンドの終了は待たない）
+
+    コマンドの各引数中の {timer_id} / {fire_at} / {label} はタイマー情報に置き換える。
+    """
+
+    def __init__(self, command: list[str]):
+        """
+        Args:
+            command (list[str]): 起動するコマンドと引数のリスト
+        """
+        self.command = command
+
+    def __call__(self, timer: dict) -> None:
+        values = {
+            "timer_id": timer["timer_id"],
+            "fire_at": timer["fire_at"],
+            "label": timer["payload"].get("label", ""),
+        }
+        subprocess.Popen([arg.format(**values) for arg in self.command])
+
+
+class FileDropNotifier:
+    """タイマー終了時に、タイマー情報をjsonファイルとして指定フォルダに出力する"""
+
+    def __init__(self, folder: str = NOTIFICATION_DIR):
+        """
+        Args:
+            folder (str): 出力先フォルダ
+        """
+        self.folder = os.path.abspath(folder)
+
+    def __call__(self, timer: dict) -> None:
+        os.makedirs(self.folder, exist_ok=True)
+        fired = datetime.fromisoformat(timer["fire_at"]).strftime("%Y%m%d%H%M%S")
+        safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in timer["timer_id"])
+        path = os.path.join(self.folder, f"{fired}_{safe_id}.json")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(timer, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def build_notifiers() -> list[Notifier]:
+    """ローカル設定から通知先のリストを作成する
+
+    - SMTPアカウントの設定（smtp_account）がある場合はメールで通知する
+    - タイマー通知の設定（timer_notification）の command があれば、そのコマンドを起動する
+    - タイマー通知の設定の file_drop_folder があれば、そのフォルダにファイルを出力する
+
+    Returns:
+        list[Notifier]: 通知先のリスト（設定がない場合は空）
+    """
+    notifiers: list[Notifier] = []
+    if Output_M.find_config("smtp_account") is not None:
+        notifiers.append(EmailNotifier())
+
+    notification_config = Output_M.find_config("timer_notification")
+    command = getattr(notification_config, "command", None)
+    if command:
+        notifiers.append(CommandNotifier(list(command)))
+    file_drop_folder = getattr(notification_config, "file_drop_folder", None)
+    if file_drop_folder:
+        notifiers.append(FileDropNotifier(file_drop_folder))
+    return notifiers
+
+
+def get_scheduler() -> TimerScheduler:
+    """プロセスで1つのスケジューラを返す（初回呼び出し時に保存済みのタイマーを読み込んで作成する）
+
+    通知先は build_notifiers() でローカル設定から作成する。
+
+    Returns:
+        TimerScheduler: スケジューラ
+    """
+    global _scheduler
+    with _scheduler_guard:
+        if _scheduler is None:
+            _scheduler = TimerScheduler(notifiers=build_notifiers())
+        return _scheduler
@@ -0,0 +1,243 @@
+"""
+工数実績の日別集計済みフレームのキャッシュ（サイドカーファイル）モジュール
+期間集計（G_dashboard_aggregation.load_worklogs_in_period）で日ごとに作成する
+「工数切り捨て分調整の行を加え、時刻を分単位に切り捨てた工数実績」を、日ごとのParquetファイルに保存する。
+
+- キャッシュのキーは（取り込み元のパス, 取り込み元の版, オーダ管理csvの版）で、Parquetのメタデータに記録する
+- キーが一致しない日（新しい日・更新された日・オーダ管理csvが更新された場合の全日）のみ呼び出し側で作成し直す
+- 日別集計キューブ（日 × オーダ略称 × プロジェクト略称 × 区分 の作業時間）も1つのParquetファイルに保存し、
+  集計元の日のキーが変わった日の行のみ置き換える
+- pyarrowがインストールされていない環境では保存・読み込みを行わず、呼び出し側は毎回作成する
+"""
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import services.K_worklog_store as Output_K
+
+# キャッシュの保存先フォルダ
+CACHE_DIR = os.path.join("data", "WorkLogs", "day_cache")
+
+# キーの版（キャッシュする内容を変えた場合に上げると、全日作成し直す）
+CACHE_VERSION = 1
+
+# キーを記録するParquetのメタデータ名
+METADATA_KEY = b"worklog_day_cache_key"
+
+# キャッシュする列（工数実績csvの列に、ファイル日付・作業時間(分)を加えたもの）
+STRING_COLUMNS = Output_K.STRING_COLUMNS
+DATETIME_COLUMNS = Output_K.DATETIME_COLUMNS
+DATE_COLUMN = Output_K.DATE_COLUMN
+MINUTES_COLUMN = "作業時間(分)"
+COLUMNS = STRING_COLUMNS + DATETIME_COLUMNS + [DATE_COLUMN, MINUTES_COLUMN]
+
+# 日別集計キューブ（日 × オーダ略称 × プロジェクト略称 × 区分 の作業時間）の保存先と列
+CUBE_PATH = os.path.join(CACHE_DIR, "日別集計.parquet")
+CUBE_METADATA_KEY = b"worklog_cube_keys"
+CUBE_STRING_COLUMNS = ["オーダ略称", "プロジェクト略称", "区分"]
+CUBE_COLUMNS = [DATE_COLUMN] + CUBE_STRING_COLUMNS + [MINUTES_COLUMN]
+
+# -------------------------------------------------------------
+# 読み込み・保存
+# -------------------------------------------------------------
+
+def is_available() -> bool:
+    """キャッシュが使用可能か（pyarrowがインストールされているか）を返す"""
+    return pq is not None
+
+
+def make_key(source_path: str, order_csv_path: str = os.path.join("data", "オーダ管理.csv")) -> str:
+    """1日分のキャッシュのキーを作成する
+
+    Args:
+        source_path (str): 工数実績csvのパス（バンドル内の仮想パスを含む）
+        order_csv_path (str): オーダ管理csvのパス
+
+    Returns:
+        str: 取り込み元のパス・版とオーダ管理csvの版を表す文字列
+    """
+    return json.dumps({
+        "version": CACHE_VERSION,
+        "source": source_path,
+        "signature": Output_K._source_signature(source_path),
+        "order": _file_signature(order_csv_path),
+    }, ensure_ascii=False, sort_keys=True)
+
+
+def read_day(date_str: str, key: str) -> Optional[pd.DataFrame]:
+    """キーが一致する1日分のキャッシュを読み込む
+
+    Args:
+        date_str (str): 日付（yymmdd）
+        key (str): make_key() で作成したキー
+
+    Returns:
+        Optional[pd.DataFrame]: キャッシュした工数実績。キャッシュがない・キーが一致しない場合はNone
+    """
+    path = _cache_path(date_str)
+    if not is_available() or not os.path.exists(path):
+        return None
+    try:
+        metadata = pq.read_schema(path).metadata or {}
+        if metadata.get(METADATA_KEY) != key.encode("utf-8"):
+            return None
+        df = pq.read_table(path).to_pandas()
+    except Exception:
+        return None  # 壊れたキャッシュは作成し直す
+
+    for col in STRING_COLUMNS:
+        # 欠損値はcsv読み込み時と同じくNaNにそろえる
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    for col in DATETIME_COLUMNS:
+        df[col] = df[col].astype("datetime64[ns]")
+    return df
+
+
+def write_day(date_str: str, key: str, df: pd.DataFrame) -> None:
+    """1日分の工数実績をキーとともにキャッシュに保存する（一時ファイルからの置き換え）
+
+    Args:
+        date_str (str): 日付（yymmdd）
+        key (str): make_key() で作成したキー
+        df (pd.DataFrame): COLUMNS の列を持つ工数実績
+    """
+    if not is_available():
+        return
+    table = pa.Table.from_pandas(df[COLUMNS], schema=_schema(), preserve_index=False)
+    table = table.replace_schema_metadata({METADATA_KEY: key.encode("utf-8")})
+
+    _write_table_atomic(table, _cache_path(date_str))
+
+# -------------------------------------------------------------
+# 日別集計キューブ
+# -------------------------------------------------------------
+
+def read_cube(keys: dict[str, str]) -> tuple[pd.DataFrame, set[str]]:
+    """日別集計キューブのうち、集計元の日のキーが一致する日の行を読み込む
+
+    Args:
+        keys (dict[str, str]): {日付(yymmdd): make_key() で作成したキー}
+
+    Returns:
+        tuple[pd.DataFrame, set[str]]: (CUBE_COLUMNS の列を持つDataFrame, 含まれる日付（yymmdd）の集合)
+    """
+    table, stored_keys = _read_cube_table()
+    fresh_dates = {date_str for date_str, key in keys.items() if stored_keys.get(date_str) == key}
+    if table is None or not fresh_dates:
+        return pd.DataFrame(columns=CUBE_COLUMNS), fresh_dates
+
+    df = _cube_table_to_pandas(table)
+    dates = {datetime.strptime(date_str, "%y%m%d").date() for date_str in fresh_dates}
+    return df[df[DATE_COLUMN].isin(dates)].reset_index(drop=True), fresh_dates
+
+
+def write_cube(rows: pd.DataFrame, keys: dict[str, str]) -> None:
+    """日別集計キューブの指定した日の行を置き換えて保存する（一時ファイルからの置き換え）
+
+    Args:
+        rows (pd.DataFrame): CUBE_COLUMNS の列を持つ、keys の日の集計行
+        keys (dict[str, str]): {日付(yymmdd): 集計元の make_key() で作成したキー}
+    """
+    if not is_available():
+        return
+    table, stored_keys = _read_cube_table()
+    if table is not None:
+        df = _cube_table_to_pandas(table)
+        dates = {datetime.strptime(date_str, "%y%m%d").date() for date_str in keys}
+        kept = df[~df[DATE_COLUMN].isin(dates)]
+        # 空のDataFrameを除外してconcatすることでFutureWarningを回避
+        if not kept.empty:
+            rows = pd.concat([kept, rows[CUBE_COLUMNS]], ignore_index=True)
+    stored_keys = dict(sorted({**stored_keys, **keys}.items()))
+
+    new_table = pa.Table.from_pandas(rows[CUBE_COLUMNS], schema=_cube_schema(), preserve_index=False)
+    new_table = new_table.replace_schema_metadata(
+        {CUBE_METADATA_KEY: json.dumps(stored_keys, ensure_ascii=False).encode("utf-8")})
+
+    _write_table_atomic(new_table, CUBE_PATH)
+
+# -------------------------------------------------------------
+# 上記の関数で使用する補助関数群
+# -------------------------------------------------------------
+
+def _schema() -> "pa.Schema":
+    """キャッシュのスキーマ（文字列列・タイムスタンプ列・日付列・作業時間列）"""
+    return pa.schema(
+        [(col, pa.string()) for col in STRING_COLUMNS]
+        + [(col, pa.timestamp("ns")) for col in DATETIME_COLUMNS]
+        + [(DATE_COLUMN, pa.date32()), (MINUTES_COLUMN, pa.int64())]
+    )
+
+
+def _cube_schema() -> "pa.Schema":
+    """日別集計キューブのスキーマ（日付列・文字列列・作業時間列）"""
+    return pa.schema(
+        [(DATE_COLUMN, pa.date32())]
+        + [(col, pa.string()) for col in CUBE_STRING_COLUMNS]
+        + [(MINUTES_COLUMN, pa.int64())]
+    )
+
+
+def _read_cube_table() -> tuple[Optional["pa.Table"], dict[str, str]]:
+    """保存済みの日別集計キューブと、日ごとの集計元のキーを読み込む（ない・壊れている場合は (None, {})）"""
+    if not is_available() or not os.path.exists(CUBE_PATH):
+        return None, {}
+    try:
+        table = pq.read_table(CUBE_PATH)
+        stored_keys = json.loads((table.schema.metadata or {})[CUBE_METADATA_KEY].decode("utf-8"))
+    except Exception:
+        return None, {}  # 壊れたキューブは作成し直す
+    return table, stored_keys
+
+
+def _cube_table_to_pandas(table: "pa.Table") -> pd.DataFrame:
+    """日別集計キューブのTableをDataFrameに変換する（欠損値はNaNにそろえる）"""
+    df = table.to_pandas()
+    for col in CUBE_STRING_COLUMNS:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def _write_table_atomic(table: "pa.Table", path: str) -> None:
+    """Parquetファイルを一時ファイルからの置き換えで保存する
+
+    一時ファイルは保存先フォルダに一意な名前で作成するため、複数のセッションが同時に同じファイルを
+    保存しても書き込みが混ざらない（後から置き換えた方が残る）。
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pq.write_table(table, f)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _cache_path(date_str: str) -> str:
+    """日付（yymmdd）のキャッシュのパス"""
+    return os.path.join(CACHE_DIR, f"工数実績{date_str}.parquet")
+
+
+def _file_signature(path: str) -> Optional[str]:
+    """ファイルの更新時刻とサイズを表す文字列を返す（ファイルがない場合はNone）"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
@@ -0,0 +1,37 @@
+"""
+アプリ起動時の処理モジュール
+Streamlitは操作のたびにページのスクリプトを再実行するため、各ページ共通のサイドバー（task_view.task_sidebar）から
+run_startup_tasks() を呼び出し、プロセスで最初の1回だけ起動時の処理を行う。
+
+- 中断されたファイル書き込みのトランザクションがあれば、ジャーナルを再実行して完了させる
+  （読み込み側はロックを取得しないため、次の書き込みを待たずに反映途中の状態を解消する）
+- タイマー通知のスケジューラを作成し、再起動前に保存した未通知のタイマーを読み込む
+  （アプリを操作していない間に終了時刻を迎えたタイマーも通知される）
+"""
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import services.I_file_transaction as Output_I
+import services.N_timer_scheduler as Output_N
+
+# 起動時の処理を実行済みかどうか
+_started = False
+_started_guard = threading.Lock()
+
+
+def run_startup_tasks() -> bool:
+    """起動時の処理を実行する（プロセスで最初の呼び出しのみ実行し、以降は何もしない）
+
+    Returns:
+        bool: 今回の呼び出しで起動時の処理を実行した場合True
+    """
+    global _started
+    with _started_guard:
+        if _started:
+            return False
+        Output_I.recover_on_startup()
+        Output_N.get_scheduler()
+        _started = True
+        return True
@@ -7,9 +7,13 @@ import streamlit as st
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import models.Task_definition as Task_def
+import services.P_app_startup as Output_P
 
 
 def task_sidebar():
+    # 全ページ共通の起動時の処理（プロセスで最初の1回のみ）
+    Output_P.run_startup_tasks()
+
     # タスクIDとタスク名一覧取得
     with st.sidebar:
         folder_option = st.radio(
@@ -2,6 +2,7 @@ import os
 import sys
 from datetime import datetime, timedelta
 
+import pandas as pd
 import pytest
 
 # プロジェクトのルートパスを取得してPythonパスに追加
@@ -268,3 +269,46 @@ def test_add_WillDo_all_ProjectTasks(tmp_path):
         assert df.iloc[0]["サブ名"].startswith("サブタスクP")
     finally:
         os.chdir(old_cwd)
+
+
+def test_status_events_skip_duplicate_keys_and_fold_into_old(tmp_path):
+    columns = [col.metadata["label"] for col in Task_def.WillDoEntry.__dataclass_fields__.values()]
+    WillDo_df = pd.DataFrame([
+        {"タスクID": "990001", "サブID": "#001", "状態": None},
+        {"タスクID": "打合せ", "サブID": None, "状態": None},
+        {"タスクID": "打合せ", "サブID": None, "状態": None},
+    ]).reindex(columns=columns)
+    old_dir = tmp_path / "data" / "WillDo" / "old"
+    old_dir.mkdir(parents=True)
+    WillDo_df.to_csv(old_dir / "WillDo240115.csv", index=False, encoding="utf-8-sig")
+
+    old_cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        Output_B.append_WillDo_status_events("240115", [
+            {"記録時刻": "2024-01-15 09:00:00", "タスクID": "990001", "サブID": "#001",
+             "項目": "状態", "変更前": "", "変更後": "今"},
+            {"記録時刻": "2024-01-15 09:00:00", "タスクID": "打合せ", "サブID": "",
+             "項目": "状態", "変更前": "", "変更後": "今"},
+        ])
+        # タスクID・サブIDが重複する会議の行には適用しないこと
+        applied = Output_B.apply_WillDo_status_events(WillDo_df, Output_B.read_WillDo_status_events("240115"))
+        assert applied["状態"].tolist()[0] == "今"
+        assert applied["状態"].isna().tolist()[1:] == [True, True]
+
+        # oldフォルダのcsvに反映し、反映済みログに移すこと
+        assert Output_B.fold_WillDo_status_events("240115")
+        folded = pd.read_csv(old_dir / "WillDo240115.csv", encoding="utf-8-sig")
+        assert folded.loc[0, "状態"] == "今"
+        assert Output_B.read_WillDo_status_events("240115").empty
+        assert len(Output_B.read_WillDo_status_events("240115", include_folded=True)) == 2
+
+        # csvが見つからない日のイベントは未反映のまま残すこと
+        Output_B.append_WillDo_status_events("240116", [
+            {"記録時刻": "2024-01-16 09:00:00", "タスクID": "990001", "サブID": "#001",
+             "項目": "状態", "変更前": "", "変更後": "済"},
+        ])
+        assert not Output_B.fold_WillDo_status_events("240116")
+        assert len(Output_B.read_WillDo_status_events("240116")) == 1
+    finally:
+        os.chdir(old_cwd)
@@ -0,0 +1,79 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+# プロジェクトのルートパスを取得してPythonパスに追加
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+import models.Task_definition as Task_def
+import services.C_WorkLog_record as Output_C
+import services.N_timer_scheduler as Output_N
+
+TASK_CSV = (
+    "タスク\n\nTEST-ORDER\n\n\n\n\n\n\n"
+    "#001,サブ1,60,0,,,True,False,1.0,True\n"
+    "#002,サブ2,60,0,,,True,False,2.0,True\n"
+)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """タスクcsvとオーダ管理csvを作成し、カレントディレクトリをtmp_pathに変更する"""
+    # タイマーの保存先がtmp_path内になるよう、スケジューラをテストごとに作り直す
+    monkeypatch.setattr(Output_N, "_scheduler", None)
+    (tmp_path / "data" / "WorkLogs").mkdir(parents=True)
+    (tmp_path / "data" / "Project" / "Active").mkdir(parents=True)
+    (tmp_path / "data" / "Project" / "Active" / "990001.csv").write_text(TASK_CSV, encoding="utf-8")
+    (tmp_path / "data" / "オーダ管理.csv").write_text("TEST-ORDER,PJ,ORD,テスト\n", encoding="utf-8")
+    old_cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield tmp_path
+    os.chdir(old_cwd)
+
+
+def _actual_times() -> list[int]:
+    task = Task_def.read_task_csv(os.path.join("data", "Project", "Active", "990001.csv"))
+    return task.sub_tasks["actual_time"].tolist()
+
+
+def test_start_timer_appends_row_and_updates_task(data_dir):
+    Output_C.start_new_timer_and_record_WorkLog("240101", 30, "990001", "#001")
+    Output_C.start_new_timer_and_record_WorkLog("240101", 15, "990001", "#002")
+
+    worklog_path = os.path.join("data", "WorkLogs", "工数実績240101.csv")
+    with open(worklog_path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 3
+    assert lines[0].split(",") == Output_C.WORKLOG_COLUMNS
+
+    # 2回目の開始で1行目の終了時刻が切り詰められ、実績時間が補正されること
+    first = Output_C._read_last_worklog_row(worklog_path)
+    assert first["サブタスクID"] == "#002"
+    assert _actual_times() == [0, 15]
+
+    # 実行中の行（2行目）の終了時刻がタイマーに登録されていること
+    pending = Output_N.get_scheduler().pending()
+    assert [t["timer_id"] for t in pending] == ["工数実績240101"]
+    assert pending[0]["payload"]["label"] == "タスク / サブ2"
+
+
+def test_continuously_start_takes_over_end_time(data_dir):
+    Output_C.start_new_timer_and_record_WorkLog("240101", 30, "990001", "#001")
+    worklog_path = os.path.join("data", "WorkLogs", "工数実績240101.csv")
+
+    # 1行目（30分）を10分前に開始したことにして「続けて開始」する
+    started = datetime.now() - timedelta(minutes=10)
+    Output_C._rewrite_last_worklog_row(worklog_path, {
+        "開始時刻": started.strftime("%Y-%m-%d %H:%M:%S"),
+        "終了時刻": (started + timedelta(minutes=30)).strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    planned_end = Output_C.check_WorkLog_latest_end_datetime("240101")
+    Output_C.continuously_start_and_record_WorkLog("240101", "990001", "#002")
+
+    last = Output_C._read_last_worklog_row(worklog_path)
+    assert last["サブタスクID"] == "#002"
+    assert last["終了時刻"] == planned_end.strftime("%Y-%m-%d %H:%M:%S")
+    assert _actual_times()[0] == 10
@@ -0,0 +1,209 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートパスを取得してPythonパスに追加
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+import services.E_WorkLog_formatting as Output_E
+
+WORKLOG_CSV = (
+    "オーダ番号,オーダ略称,プロジェクト略称,タスクID,サブタスクID,タスク名,サブタスク名,開始時刻,終了時刻\n"
+    "TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ,2024-01-16 09:00:10,2024-01-16 09:40:30\n"
+    "TEST-ORDER,ORD,PJ,990001,#002,タスク,サブ2,2024-01-16 09:42:00,2024-01-16 10:00:00\n"
+    "TEST-ORDER,ORD,PJ,MTG-1000,#000,打合せ,,2024-01-16 10:10:00,2024-01-16 10:30:00\n"
+    "間接-ORDER,間接,間接,990002,#001,雑務,,2024-01-16 10:33:00,2024-01-16 11:00:00\n"
+    "TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ,2024-01-16 12:00:00,2024-01-16 13:30:00\n"
+)
+
+
+@pytest.fixture
+def worklog_path(tmp_path):
+    """工数実績csvとオーダ管理csvを作成し、カレントディレクトリをtmp_pathに変更する"""
+    worklog_dir = tmp_path / "data" / "WorkLogs"
+    worklog_dir.mkdir(parents=True)
+    path = worklog_dir / "工数実績240116.csv"
+    path.write_text(WORKLOG_CSV, encoding="utf-8")
+    (tmp_path / "data" / "オーダ管理.csv").write_text(
+        "TEST-ORDER,PJ,ORD,テスト\n間接-ORDER,間接,間接,間接\n", encoding="utf-8")
+    old_cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield os.path.join("data", "WorkLogs", "工数実績240116.csv")
+    os.chdir(old_cwd)
+
+
+def test_worklog_day_matches_path_functions(worklog_path):
+    day = Output_E.load_WorkLog_day(worklog_path)
+
+    pd.testing.assert_frame_equal(day.rest_df, Output_E.extract_rest_time_from_WorkLog(worklog_path))
+    for include_MTG in (True, False):
+        expected = Output_E.sum_df_each_subtask(worklog_path, include_MTG=include_MTG)
+        pd.testing.assert_frame_equal(day.sum_each_subtask(include_MTG), expected)
+        pd.testing.assert_frame_equal(day.sum_each_order(include_MTG), Output_E.sum_df_each_order(expected))
+    df_sum_order = Output_E.sum_df_each_order(Output_E.sum_df_each_subtask(worklog_path, include_MTG=True))
+    for add_daytime_break in (True, False):
+        pd.testing.assert_frame_equal(
+            day.summary(add_daytime_break),
+            Output_E.calc_WorkLog_summary(worklog_path, df_sum_order, add_daytime_break))
+    # 集計しても読み込んだままの工数実績は変更しないこと
+    assert day.raw_df['開始時刻'].iloc[0] == pd.Timestamp("2024-01-16 09:00:10")
+
+
+def test_load_worklog_day_reuses_until_file_changes(worklog_path):
+    day = Output_E.load_WorkLog_day(worklog_path)
+    rows = len(day.raw_df)
+    assert Output_E.load_WorkLog_day(worklog_path) is day
+
+    with open(worklog_path, "a", encoding="utf-8") as f:
+        f.write("TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ,2024-01-16 14:00:00,2024-01-16 14:15:00\n")
+    reloaded = Output_E.load_WorkLog_day(worklog_path)
+    assert reloaded is not day
+    assert len(reloaded.raw_df) == rows + 1
+
+
+def _extract_rest_time_reference(df: pd.DataFrame) -> pd.DataFrame:
+    """行ごとのループによる休憩時間抽出（ベクトル化前の実装）"""
+    rest_records = []
+    skipped_rest_minutes = 0
+    for i in range(len(df) - 1):
+        current_end = df.iloc[i]['終了時刻']
+        next_start = df.iloc[i + 1]['開始時刻']
+        if current_end == next_start:
+            continue
+        rest_minutes = (next_start - current_end).total_seconds() / 60
+        if rest_minutes < 4:
+            rest_records.append({
+                '休憩(推奨)': None,
+                '休憩開始(推奨)': None,
+                '休憩終了(推奨)': None,
+                '休憩(実績)': int(rest_minutes),
+                '休憩開始(実績)': current_end.strftime("%H:%M"),
+                '休憩終了(実績)': next_start.strftime("%H:%M"),
+            })
+            skipped_rest_minutes += rest_minutes
+        else:
+            start_adjust = 0
+            end_adjust = 0
+            for _ in range(2):
+                if skipped_rest_minutes >= 1:
+                    skipped_rest_minutes -= 1
+                    start_adjust += 1
+                if skipped_rest_minutes >= 1:
+                    skipped_rest_minutes -= 1
+                    end_adjust += 1
+            current_end_adjusted = current_end - pd.Timedelta(minutes=start_adjust)
+            next_start_adjusted = next_start + pd.Timedelta(minutes=end_adjust)
+            rest_minutes_adjusted = (next_start_adjusted - current_end_adjusted).total_seconds() / 60
+            rest_records.append({
+                '休憩(推奨)': int(rest_minutes_adjusted),
+                '休憩開始(推奨)': current_end_adjusted.strftime("%H:%M"),
+                '休憩終了(推奨)': next_start_adjusted.strftime("%H:%M"),
+                '休憩(実績)': int(rest_minutes),
+                '休憩開始(実績)': current_end.strftime("%H:%M"),
+                '休憩終了(実績)': next_start.strftime("%H:%M"),
+            })
+    return pd.DataFrame(rest_records)
+
+
+def _make_random_worklog(rng: np.random.Generator, rows: int) -> pd.DataFrame:
+    """作業時間・行間の空き時間（重なり・短い空き・長い空きを含む）をランダムに並べた工数実績を作成する"""
+    gaps = rng.choice([0, 0, 0, 1, 2, 3, -1, 4, 5, 12, 60], size=rows)
+    durations = rng.integers(1, 90, size=rows)
+    start = pd.Timestamp("2024-01-16 05:10")
+    starts, ends = [], []
+    for gap, duration in zip(gaps, durations):
+        start = start + pd.Timedelta(minutes=int(gap))
+        starts.append(start)
+        start = start + pd.Timedelta(minutes=int(duration))
+        ends.append(start)
+    return pd.DataFrame({'開始時刻': starts, '終了時刻': ends})
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_extract_rest_time_matches_row_loop(seed):
+    rng = np.random.default_rng(seed)
+    df = _make_random_worklog(rng, int(rng.integers(0, 40)))
+    pd.testing.assert_frame_equal(Output_E.extract_rest_time_from_df(df), _extract_rest_time_reference(df))
+
+
+def test_extract_rest_time_for_each_day():
+    rng = np.random.default_rng(0)
+    days = {"240116": _make_random_worklog(rng, 30), "240117": _make_random_worklog(rng, 30)}
+    df = pd.concat([d.assign(ファイル日付=day) for day, d in days.items()], ignore_index=True)
+
+    result = Output_E.extract_rest_time_from_df(df, day_column="ファイル日付")
+    for day, df_day in days.items():
+        expected = _extract_rest_time_reference(df_day)
+        actual = result[result["ファイル日付"] == day].drop(columns="ファイル日付").reset_index(drop=True)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_barchart_places_rows_in_time_bands(worklog_path):
+    pytest.importorskip("matplotlib")
+    with open(worklog_path, "a", encoding="utf-8") as f:
+        f.write("TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ,2024-01-16 22:00:00,2024-01-16 22:30:00\n")
+        f.write("TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ,2024-01-17 01:00:00,2024-01-17 01:30:00\n")
+
+    fig = Output_E.make_WorkLog_barchart(worklog_path)
+    bars_per_band = [sum(len(c.get_paths()) for c in ax.collections) for ax in fig.axes]
+    # 5時～13時に5行、13時～21時に0行、21時～翌5時に2行（翌日1時の行を含む）
+    assert bars_per_band == [5, 0, 2]
+    labels = [text.get_text() for text in fig.axes[2].texts]
+    assert labels == ["5", "6"]
+
+
+def test_barchart_png_is_rendered_once(worklog_path, monkeypatch):
+    pytest.importorskip("matplotlib")
+    day = Output_E.load_WorkLog_day(worklog_path)
+    png = day.barchart_png()
+    assert png.startswith(b"\x89PNG")
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("再描画しないこと")
+    monkeypatch.setattr(Output_E, "render_WorkLog_barchart_png", _fail)
+    assert Output_E.load_WorkLog_day(worklog_path).barchart_png() is png
+
+
+def test_registration_tables_match_daily_outputs(worklog_path):
+    df_days = []
+    for day, shift in (("240116", 0), ("240117", 1)):
+        df_day = Output_E.WorkLogDay(worklog_path).df.copy()
+        df_day['開始時刻'] += pd.Timedelta(days=shift, minutes=7 * shift)
+        df_day['終了時刻'] += pd.Timedelta(days=shift)
+        df_days.append((day, df_day))
+    df = pd.concat([d.assign(ファイル日付=day) for day, d in df_days], ignore_index=True)
+
+    tables = Output_E.build_registration_tables_from_df(df, add_daytime_break=True)
+    for day, df_day in df_days:
+        df_order = Output_E.sum_df_each_order(Output_E.sum_df_each_subtask_from_df(df_day, include_MTG=True))
+        bjp = tables["BJP"][tables["BJP"]["日付"] == day].drop(columns="日付").reset_index(drop=True)
+        pd.testing.assert_frame_equal(
+            bjp, df_order[['オーダ番号', '工数', '実時間', '名前']].reset_index(drop=True))
+
+        ess = tables["ESS"][tables["ESS"]["日付"] == day].drop(columns="日付").reset_index(drop=True)
+        pd.testing.assert_frame_equal(ess, Output_E.calc_WorkLog_summary_from_df(df_day, df_order, True))
+
+        rest = tables["休憩"][tables["休憩"]["日付"] == day].drop(columns="日付").reset_index(drop=True)
+        pd.testing.assert_frame_equal(rest, Output_E.extract_rest_time_from_df(df_day), check_dtype=False)
+
+
+def test_order_categorical_follows_order_file(worklog_path):
+    orders = pd.Series(["X-UNKNOWN", "間接-ORDER", "TEST-ORDER", None, "A-UNKNOWN"])
+    categorical, project_abbrs = Output_E.to_order_categorical(orders)
+
+    assert list(categorical.cat.categories) == ["TEST-ORDER", "間接-ORDER", "A-UNKNOWN", "X-UNKNOWN"]
+    assert list(categorical.sort_values().dropna()) == ["TEST-ORDER", "間接-ORDER", "A-UNKNOWN", "X-UNKNOWN"]
+    assert list(project_abbrs[categorical.cat.codes.to_numpy()]) == ["", "間接", "PJ", "", ""]
+
+    # オーダ管理csvを更新した場合は読み込み直すこと
+    order_csv = os.path.join("data", "オーダ管理.csv")
+    with open(order_csv, "a", encoding="utf-8") as f:
+        f.write("A-UNKNOWN,PJ2,A,追加\n")
+    os.utime(order_csv, ns=(0, os.stat(order_csv).st_mtime_ns + 1_000_000))
+    categorical, project_abbrs = Output_E.to_order_categorical(orders)
+    assert list(categorical.cat.categories) == ["TEST-ORDER", "間接-ORDER", "A-UNKNOWN", "X-UNKNOWN"]
+    assert project_abbrs[2] == "PJ2"
@@ -0,0 +1,205 @@
+import datetime
+import os
+import sys
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+# プロジェクトのルートパスを取得してPythonパスに追加
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+import models.Task_definition as Task_def
+import services.F_complete_forecast as Output_F
+import services.M_local_config as Output_M
+
+TASK_CSV = (
+    "{name}\n\nTEST-ORDER\n\n\n\n\n\n\n"
+    "#002,サブ2,30,{actual},,,True,False,2.0,False\n"
+    "#001,サブ1,60,45,,,True,False,1.0,False\n"
+)
+
+
+@pytest.fixture
+def complete_dir(tmp_path, monkeypatch):
+    """完了済タスクcsv3件・オーダ管理csv・出力先フォルダを作成し、Output_Fの参照先をtmp_pathに変更する"""
+    complete_dir = tmp_path / "Complete"
+    complete_dir.mkdir()
+    for task_id in ["990001", "990002", "990003"]:
+        (complete_dir / f"{task_id}.csv").write_text(
+            TASK_CSV.format(name=f"タスク{task_id}", actual=10), encoding="utf-8")
+    (tmp_path / "オーダ管理.csv").write_text("TEST-ORDER,PJ,ORD,テスト\n", encoding="utf-8")
+    (tmp_path / "オーダ管理_old.csv").write_text("", encoding="utf-8")
+    (tmp_path / "upload").mkdir()
+
+    monkeypatch.setattr(Output_F, "COMPLETE_FOLDER", str(complete_dir))
+    monkeypatch.setattr(Output_F, "ORDER_CSV_PATH", str(tmp_path / "オーダ管理.csv"))
+    monkeypatch.setattr(Output_F, "ORDER_OLD_CSV_PATH", str(tmp_path / "オーダ管理_old.csv"))
+    monkeypatch.setattr(Output_F, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    with Output_M.override("upload_path", SimpleNamespace(my_upload_folder_path=str(tmp_path / "upload"))):
+        yield complete_dir
+
+
+def _read_output(complete_dir) -> pd.DataFrame:
+    path = complete_dir.parent / "upload" / Output_F.OUTPUT_FILENAME
+    return pd.read_csv(path, encoding="utf-8-sig", dtype={"タスクID+サブID": str})
+
+
+def test_output_rows(complete_dir):
+    assert sorted(Output_F.output_completed_tasks()) == ["990001", "990002", "990003"]
+
+    df = _read_output(complete_dir)
+    assert list(df.columns) == Output_F.COMPLETED_TASK_COLUMNS
+    rows = df[df["タスクID+サブID"].str.startswith("990002")]
+    # サブタスクはサブ順序の順に並べること
+    assert rows["タスクID+サブID"].tolist() == ["990002#001", "990002#002"]
+    assert rows.iloc[0][["PJ略", "オーダ略称", "タスク名", "実績", "削除フラグ"]].tolist() == [
+        "PJ", "ORD", "タスク990002", 45, False]
+
+    # 変更がなければ何も読み込まないこと
+    assert Output_F.output_completed_tasks() == []
+
+
+def test_incremental_output_matches_full_output(complete_dir):
+    Output_F.output_completed_tasks()
+    output_path = complete_dir.parent / "upload" / Output_F.OUTPUT_FILENAME
+    order = _read_output(complete_dir)["タスクID+サブID"].str[:6].drop_duplicates().tolist()
+
+    # 途中のタスクの変更は、そのタスクのみ読み込み直すこと
+    (complete_dir / f"{order[1]}.csv").write_text(
+        TASK_CSV.format(name="変更後", actual=0), encoding="utf-8")
+    assert Output_F.output_completed_tasks() == [order[1]]
+    incremental = output_path.read_bytes()
+    Output_F.output_completed_tasks(full=True)
+    assert output_path.read_bytes() == incremental
+
+    # 削除・追加されたタスクを反映すること
+    os.remove(complete_dir / f"{order[0]}.csv")
+    (complete_dir / "990004.csv").write_text(TASK_CSV.format(name="追加", actual=5), encoding="utf-8")
+    assert Output_F.output_completed_tasks() == ["990004"]
+    df = _read_output(complete_dir)
+    assert sorted(df["タスクID+サブID"].str[:6].unique()) == sorted(set(order[1:]) | {"990004"})
+    assert df.loc[df["タスクID+サブID"] == f"{order[1]}#002", "削除フラグ"].tolist() == [True]
+
+
+def test_external_change_rebuilds_output(complete_dir):
+    Output_F.output_completed_tasks()
+    output_path = complete_dir.parent / "upload" / Output_F.OUTPUT_FILENAME
+    output_path.write_text("壊れたファイル", encoding="utf-8")
+
+    assert sorted(Output_F.output_completed_tasks()) == ["990001", "990002", "990003"]
+    assert len(_read_output(complete_dir)) == 6
+
+
+def test_failed_write_keeps_previous_output(complete_dir, monkeypatch):
+    Output_F.output_completed_tasks()
+    output_path = complete_dir.parent / "upload" / Output_F.OUTPUT_FILENAME
+    previous = output_path.read_bytes()
+
+    def broken_rows(*args):
+        raise ValueError("読み込み失敗")
+
+    (complete_dir / "990004.csv").write_text(TASK_CSV.format(name="追加", actual=5), encoding="utf-8")
+    with monkeypatch.context() as patch:
+        patch.setattr(Output_F, "_build_task_rows_bytes", broken_rows)
+        with pytest.raises(ValueError):
+            Output_F.output_completed_tasks()
+
+    # 書き出し途中で失敗しても前回の出力は壊れず、一時ファイルも残らないこと
+    assert output_path.read_bytes() == previous
+    assert os.listdir(output_path.parent) == [Output_F.OUTPUT_FILENAME]
+    assert Output_F.output_completed_tasks() == ["990004"]
+
+
+def _make_task(task_id: str, rows: list[tuple]) -> Task_def.Task:
+    """(サブID, 見込み, 実績, 当初作業, 未完了) のリストからTaskオブジェクトを作成する"""
+    task = Task_def.Task(task_id=task_id, name=task_id, order_number="TEST-ORDER")
+    for i, (subtask_id, estimated, actual, initial, incomplete) in enumerate(rows):
+        task.add_subtask({
+            "subtask_id": subtask_id, "name": subtask_id, "estimated_time": estimated, "actual_time": actual,
+            "deadline_date": None, "deadline_reason": None, "is_initial": initial, "is_nominal": False,
+            "sort_index": float(i), "is_incomplete": incomplete,
+        })
+    return task
+
+
+def test_forecast_percentiles_and_business_days():
+    # 当初作業は常に見込みの2倍、追加作業は常に見込み通りの履歴
+    history = pd.DataFrame({
+        "order_number": ["TEST-ORDER"] * 10,
+        "is_initial": [True] * 5 + [False] * 5,
+        "is_nominal": [False] * 10,
+        "estimated_time": [60] * 10,
+        "actual_time": [120] * 5 + [60] * 5,
+    })
+    forecaster = Output_F.CompletionForecaster(history)
+    tasks = {
+        "990001": _make_task("990001", [("#001", 60, 30, True, True), ("#002", 60, 0, False, True)]),
+        "990002": _make_task("990002", [("#001", 60, 60, True, False)]),
+        "990003": _make_task("990003", [("#000", 45, 0, False, True)]),
+    }
+    # 2026-01-09(金)開始、1営業日60分。01-12は成人の日
+    df = forecaster.forecast(
+        tasks, start_date=datetime.date(2026, 1, 9), daily_minutes=60, seed=0)
+
+    assert df["タスクID"].tolist() == ["990001", "990002", "990003"]
+    # 990001: 当初作業 60*2-30=90分 + 追加作業 60分 = 150分 → 3営業日（01-09, 01-13, 01-14）
+    assert df.loc[0, ["残り時間P50", "残り時間P95"]].tolist() == [150, 150]
+    assert df.loc[0, "完了予測P95"] == "2026-01-14"
+    # 990002: 未完了サブタスクなし → 開始日
+    assert df.loc[1, ["残り時間P50", "完了予測P50"]].tolist() == [0, "2026-01-09"]
+    # 990003: #000のみ → 履歴のない区分は全体の比率（1か2）で試行する
+    assert df.loc[2, "残り時間P50"] in (45, 90)
+    assert df.loc[2, "残り時間P95"] == 90
+
+
+def test_forecast_without_history_uses_estimates():
+    forecaster = Output_F.CompletionForecaster(pd.DataFrame(columns=list(Output_F._HISTORY_COLUMNS)))
+    tasks = {"990001": _make_task("990001", [("#001", 90, 0, True, True)])}
+    df = forecaster.forecast(tasks, start_date=datetime.date(2026, 1, 10), daily_minutes={"990001": 60}, seed=0)
+    # 01-10(土)は翌営業日（01-13）から数え、2営業日目の01-14に完了する
+    assert df.loc[0, ["残り時間P80", "完了予測P80"]].tolist() == [90, "2026-01-14"]
+
+
+def test_forecast_in_blocks_matches_single_block(monkeypatch):
+    # 当初作業は見込みの2倍、追加作業は見込み通りの履歴（試行によらず残り時間が決まる）
+    history = pd.DataFrame({
+        "order_number": ["TEST-ORDER"] * 10,
+        "is_initial": [True] * 5 + [False] * 5,
+        "is_nominal": [False] * 10,
+        "estimated_time": [60] * 10,
+        "actual_time": [120] * 5 + [60] * 5,
+    })
+    forecaster = Output_F.CompletionForecaster(history)
+    tasks = {
+        f"99{n:04d}": _make_task(f"99{n:04d}", [
+            (f"#{i + 1:03d}", 60, 0, i % 2 == 0, i < n % 4) for i in range(3)])
+        for n in range(20)
+    }
+    single = forecaster.forecast(tasks, start_date=datetime.date(2026, 1, 9), n_draws=50, seed=0)
+    # 1ブロックに2タスク分（試行回数50 × サブタスク6）までに区切っても同じ結果になること
+    monkeypatch.setattr(Output_F, "FORECAST_BLOCK_ELEMENTS", 300)
+    blocked = forecaster.forecast(tasks, start_date=datetime.date(2026, 1, 9), n_draws=50, seed=0)
+    pd.testing.assert_frame_equal(blocked, single)
+    # 未完了サブタスク 0, 1, 2, 3 件（当初作業, 追加作業, 当初作業 の順）→ 0, 120, 180, 300分
+    assert single["残り時間P50"].tolist()[:4] == [0, 120, 180, 300]
+
+
+def test_forecast_rejects_non_positive_daily_minutes():
+    forecaster = Output_F.CompletionForecaster(pd.DataFrame(columns=list(Output_F._HISTORY_COLUMNS)))
+    tasks = {
+        "990001": _make_task("990001", [("#001", 90, 0, True, True)]),
+        "990002": _make_task("990002", [("#001", 90, 0, True, True)]),
+    }
+    with pytest.raises(ValueError, match="990002"):
+        forecaster.forecast(tasks, daily_minutes={"990002": 0}, seed=0)
+    with pytest.raises(ValueError):
+        forecaster.forecast(tasks, daily_minutes=0, seed=0)
+
+
+def test_completed_subtask_history(complete_dir):
+    history = Output_F.load_completed_subtask_history(str(complete_dir))
+    assert len(history) == 6
+    assert history["actual_time"].sum() == 3 * (10 + 45)
+    assert Output_F.load_completed_subtask_history(str(complete_dir)) is history
@@ -0,0 +1,233 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# プロジェクトのルートパスを取得してPythonパスに追加
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+import models.Task_definition as Task_def
+import services.G_dashboard_aggregation as Output_G
+import services.K_worklog_store as Output_K
+import services.O_worklog_day_cache as Output_O
+
+TASK_HEADER = "{name}\n{waiting}\nTEST-ORDER\n\n\n\n\n\n\n"
+
+
+@pytest.fixture
+def active_dir(tmp_path):
+    """状態の異なるActiveタスクcsvとオーダ管理csvを作成し、カレントディレクトリをtmp_pathに変更する"""
+    today = Task_def.get_ESS_dt().date()
+
+    def day(n):
+        return (today + timedelta(days=n)).strftime("%Y-%m-%d")
+
+    tasks = {
+        # 段取り中（#000のみ）
+        "990001": ["#000,段取り,30,0,,,True,False,0.0,True"],
+        # 〆切未定
+        "990002": ["#000,段取り,30,10,,,True,False,0.0,False",
+                   "#001,サブ1,60,0,,,True,False,1.0,True"],
+        # 〆切超過
+        "990003": [f"#001,サブ1,60,0,{day(-1)},理由,True,False,1.0,True"],
+        # 完了間近（完了済サブタスクの実績が見込みより少なく、補正後残りが45分以下）
+        "990004": ["#001,サブ1,60,30,,,True,False,1.0,False",
+                   f"#002,サブ2,60,0,{day(10)},,True,False,2.0,True"],
+        # 〆切迫る
+        "990005": [f"#002,サブ2,120,0,{day(5)},,False,False,2.0,True",
+                   f"#001,サブ1,120,0,{day(1)},,True,False,1.0,True"],
+        # 未着手
+        "990006": [f"#001,サブ1,120,0,{day(10)},,True,False,1.0,True"],
+        # 着手済（完了済サブタスクの実績が見込みより多い）
+        "990007": ["#001,サブ1,60,90,,,True,False,1.0,False",
+                   f"#002,サブ2,120,20,{day(10)},,True,True,2.0,True",
+                   "#003,サブ3,60,0,,,False,False,3.0,False"],
+    }
+    task_dir = tmp_path / "data" / "Project" / "Active"
+    task_dir.mkdir(parents=True)
+    for task_id, rows in tasks.items():
+        waiting = day(3) if task_id == "990006" else ""
+        (task_dir / f"{task_id}.csv").write_text(
+            TASK_HEADER.format(name=f"タスク{task_id}", waiting=waiting) + "\n".join(rows) + "\n",
+            encoding="utf-8")
+    (tmp_path / "data" / "オーダ管理.csv").write_text("TEST-ORDER,PJ,ORD,テスト\n", encoding="utf-8")
+
+    old_cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield tmp_path
+    os.chdir(old_cwd)
+
+
+def test_summary_reads_each_task_once(active_dir, monkeypatch):
+    calls = []
+    read_task_csv = Task_def.read_task_csv
+
+    def counting_read(path):
+        calls.append(os.path.basename(path))
+        return read_task_csv(path)
+
+    monkeypatch.setattr(Task_def, "read_task_csv", counting_read)
+    df = Output_G.build_active_task_summary_df()
+
+    # タスクcsvは1タスクにつき1回だけ読み込むこと
+    assert sorted(calls) == sorted(f"{task_id}.csv" for task_id in df["タスクID"])
+    monkeypatch.undo()
+
+    # タスクIDで呼び出す従来の関数と同じ値になること
+    for task_id, corrected in zip(df["タスクID"], df["補正後残り"]):
+        assert Output_G.calculate_remaining_estimated_time(task_id) == corrected
+
+    status = dict(zip(df["タスクID"], df["状態"]))
+    assert status == {
+        "990001": "段取り中", "990002": "〆切未定", "990003": "〆切超過", "990004": "完了間近",
+        "990005": "〆切迫る", "990006": "未着手", "990007": "着手済",
+    }
+
+
+def _reference_summary_df(tasks: dict, today) -> pd.DataFrame:
+    """タスクごとにループして集計する従来の実装（一括集計との比較用）"""
+    order_info = Task_def.OrderInformation()
+    summary_data = []
+    for task_id, task in tasks.items():
+        non_000_df = task.sub_tasks[task.sub_tasks["subtask_id"] != "#000"]
+        is_000_only = non_000_df.empty
+        incomplete_df = non_000_df[non_000_df["is_incomplete"] == True]
+        estimated_total = non_000_df["estimated_time"].sum()
+        if is_000_only:
+            actual_completed_total = 0
+        else:
+            actual_completed_total = non_000_df[non_000_df["is_incomplete"] == False]["actual_time"].sum()
+        estimated_remaining = incomplete_df["estimated_time"].sum()
+        corrected = Output_G.calculate_remaining_estimated_time_from_task(task)
+        progress = (estimated_total - corrected) / estimated_total * 100 if estimated_total > 0 else 0
+        next_deadline = None
+        for d in incomplete_df.sort_values(by="sort_index")["deadline_date"]:
+            d_date = Output_G._parse_date_str(d)
+            if d_date is not None:
+                next_deadline = d_date
+                break
+        incomplete_count = (
+            len(task.sub_tasks[task.sub_tasks["is_incomplete"] == True]) if is_000_only else len(incomplete_df))
+        summary_data.append({
+            "タスクID": task_id,
+            "タスク名": task.name,
+            "PJ略": order_info.get_project_abbr(task.order_number),
+            "オーダ略": order_info.get_order_abbr(task.order_number),
+            "状態": Output_G._classify_task_status(task, today),
+            "見込み残り": estimated_remaining,
+            "補正後残り": corrected,
+            "完了済実績合計": actual_completed_total,
+            "見込み合計": estimated_total,
+            "補正後合計": actual_completed_total + corrected,
+            "進捗率(%)": round(progress, 0),
+            "未完了サブタスク数": incomplete_count,
+            "直近〆切": next_deadline.strftime("%Y-%m-%d") if next_deadline is not None else None,
+            "待機日": task.waiting_date,
+        })
+    return pd.DataFrame(summary_data)
+
+
+def test_summary_matches_per_task_loop(active_dir):
+    # ランダムなサブタスクを持つタスクを追加する
+    rng = np.random.default_rng(0)
+    today = Task_def.get_ESS_dt().date()
+    task_dir = active_dir / "data" / "Project" / "Active"
+    for n in range(40):
+        rows = []
+        for i in range(int(rng.integers(1, 6))):
+            subtask_id = "#000" if i == 0 and rng.random() < 0.5 else f"#{i + 1:03d}"
+            estimated = int(rng.choice([0, 15, 30, 60, 120]))
+            actual = int(rng.choice([0, 0, 10, 45, 90]))
+            deadline = "" if rng.random() < 0.4 else (today + timedelta(days=int(rng.integers(-3, 8)))).strftime("%Y-%m-%d")
+            incomplete = bool(rng.random() < 0.6)
+            rows.append(f"{subtask_id},サブ,{estimated},{actual},{deadline},,{bool(rng.random() < 0.5)},False,"
+                        f"{float(rng.integers(0, 10))},{incomplete}")
+        (task_dir / f"98{n:04d}.csv").write_text(
+            TASK_HEADER.format(name=f"ランダム{n}", waiting="") + "\n".join(rows) + "\n", encoding="utf-8")
+
+    df = Output_G.build_active_task_summary_df()
+    expected = _reference_summary_df(Output_G._collect_all_active_tasks(), today)
+    # 従来の実装と列名・列の並び・値が一致すること
+    pd.testing.assert_frame_equal(df, expected)
+
+
+WORKLOG_CSV = (
+    "オーダ番号,オーダ略称,プロジェクト略称,タスクID,サブタスクID,タスク名,サブタスク名,開始時刻,終了時刻\n"
+    "TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ,2024-01-{day} 09:00:00,2024-01-{day} 09:40:30\n"
+    "TEST-ORDER2,ORD2,PJ,MTG-1000,#000,打合せ,,2024-01-{day} 10:00:00,2024-01-{day} 10:40:00\n"
+)
+
+
+@pytest.fixture
+def worklog_dir(tmp_path, monkeypatch):
+    """2024年1月分の工数実績csv（1日分は時刻が壊れたもの）を作成し、カレントディレクトリをtmp_pathに変更する"""
+    worklog_dir = tmp_path / "data" / "WorkLogs"
+    (worklog_dir / "old").mkdir(parents=True)
+    for day in range(10, 20):
+        (worklog_dir / "old" / f"工数実績2401{day}.csv").write_text(WORKLOG_CSV.format(day=day), encoding="utf-8")
+    (worklog_dir / "old" / "工数実績240120.csv").write_text(
+        WORKLOG_CSV.format(day="xx"), encoding="utf-8")
+    (tmp_path / "data" / "オーダ管理.csv").write_text("TEST-ORDER,PJ,ORD,テスト\n", encoding="utf-8")
+
+    # 日別キャッシュ・ストアを使わず、毎回全日を読み込む
+    monkeypatch.setattr(Output_O, "is_available", lambda: False)
+    monkeypatch.setattr(Output_K, "is_available", lambda: False)
+    old_cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield worklog_dir
+    os.chdir(old_cwd)
+
+
+def test_parallel_load_matches_sequential_and_reports_errors(worklog_dir, monkeypatch):
+    start, end = datetime(2024, 1, 1), datetime(2024, 1, 31, 23, 59)
+    sequential, errors = Output_G.load_worklogs_in_period_with_errors(start, end, max_workers=1)
+
+    monkeypatch.setattr(Output_G, "PARALLEL_MIN_DAYS", 2)
+    parallel, parallel_errors = Output_G.load_worklogs_in_period_with_errors(start, end, max_workers=2)
+
+    # プロセスプールで読み込んでも日付順に結合され、同じ結果になること
+    pd.testing.assert_frame_equal(parallel, sequential)
+    assert parallel["ファイル日付"].astype(str).unique().tolist() == [f"2024-01-{day}" for day in range(10, 20)]
+    # 失敗した日はスキップし、エラー内容を返すこと
+    assert list(errors) == ["240120"] and list(parallel_errors) == ["240120"]
+    assert errors["240120"].startswith("工数実績240120.csv: ")
+
+
+def test_work_kind_and_calendar_keys_match_string_formatting():
+    # 年をまたぐ週・月を含む日付と、会議・議論・それ以外（欠損値を含む）のタスクID
+    rng = np.random.default_rng(0)
+    dates = [d.date() for d in pd.date_range("2023-12-20", "2025-01-10", freq="D")]
+    n = 3000
+    df = pd.DataFrame({
+        "ファイル日付": [dates[i] for i in rng.integers(0, len(dates), n)],
+        "タスクID": rng.choice(np.array(["MTG-1000", "DSC-2000", "990001", "ZZZ1050", "xMTG", None], dtype=object), n),
+        "オーダ略称": rng.choice(["ORD", "ORD2"], n),
+        "作業時間(分)": rng.integers(1, 60, n),
+    })
+    df["区分"] = Output_G._classify_work_kind(df["タスクID"])
+    Output_G._add_calendar_columns(df)
+
+    expected_kind = df["タスクID"].apply(
+        lambda x: "会議" if str(x).startswith("MTG") else ("議論" if str(x).startswith("DSC") else "作業"))
+    assert df["区分"].astype(str).tolist() == expected_kind.tolist()
+    assert df["区分"].dtype == "category" and df["年週"].dtype == "category"
+
+    # 集計結果の区間は、日付ごとに文字列に変換していた従来の書式と一致すること
+    dt = pd.to_datetime(df["ファイル日付"])
+    expected_labels = {
+        "monthly": dt.dt.strftime("%Y-%m"),
+        "daily": dt.dt.strftime("%Y-%m-%d"),
+        "weekly": (dt - pd.to_timedelta(dt.dt.dayofweek, unit="D")).dt.strftime("%Y-%m-%d～"),
+    }
+    for granularity, labels in expected_labels.items():
+        expected = (
+            df.assign(区間=labels, 区分=expected_kind)
+            .groupby(["区間", "オーダ略称", "区分"])["作業時間(分)"].sum().reset_index()
+        )
+        expected["作業時間(h)"] = (expected["作業時間(分)"] / 60).round(1)
+        # 行順（区間 → オーダ略称 → 区分 の文字列の昇順）も従来と一致すること
+        pd.testing.assert_frame_equal(Output_G.aggregate_by_order(df, granularity), expected)
@@ -0,0 +1,63 @@
+import os
+import sys
+import zipfile
+
+import pytest
+
+# プロジェクトのルートパスを取得してPythonパスに追加
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+import services.H_monthly_archive as Output_H
+
+WORKLOG_CSV = (
+    "オーダ番号,オーダ略称,プロジェクト略称,タスクID,サブタスクID,タスク名,サブタスク名,開始時刻,終了時刻\n"
+    "TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ,2024-01-{day} 09:00:00,2024-01-{day} 09:15:00\n"
+)
+
+
+@pytest.fixture
+def worklog_old_dir(tmp_path):
+    """2024年1月分の工数実績csvを2日分oldフォルダに置き、カレントディレクトリをtmp_pathに変更する"""
+    old_dir = tmp_path / "data" / "WorkLogs" / "old"
+    old_dir.mkdir(parents=True)
+    for day in ["15", "16"]:
+        (old_dir / f"工数実績2401{day}.csv").write_text(WORKLOG_CSV.format(day=day), encoding="utf-8")
+    old_cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield old_dir
+    os.chdir(old_cwd)
+
+
+def test_compact_closed_months(worklog_old_dir):
+    bundle_paths = Output_H.compact_closed_months("WorkLog")
+
+    # 日次csvが月次バンドル1つにまとめられていること
+    assert bundle_paths == [os.path.join("data", "WorkLogs", "old", "工数実績2401.zip")]
+    assert sorted(os.listdir(worklog_old_dir)) == ["工数実績2401.zip"]
+    with zipfile.ZipFile(bundle_paths[0]) as zf:
+        assert Output_H.INDEX_MEMBER in zf.namelist()
+    assert Output_H.list_bundled_dates("WorkLog") == ["240115", "240116"]
+
+
+def test_read_day_from_bundle(worklog_old_dir):
+    Output_H.compact_closed_months("WorkLog")
+
+    path = Output_H.resolve_day_path("WorkLog", "240116")
+    assert Output_H.exists(path)
+    df = Output_H.read_csv(path, parse_dates=["開始時刻", "終了時刻"])
+    assert len(df) == 1
+    assert df.iloc[0]["開始時刻"].day == 16
+
+    # 存在しない日付は保存先フォルダのパスを返し、存在しない扱いになること
+    missing = Output_H.resolve_day_path("WorkLog", "240117")
+    assert not Output_H.exists(missing)
+
+
+def test_compact_merges_into_existing_bundle(worklog_old_dir):
+    Output_H.compact_closed_months("WorkLog")
+    (worklog_old_dir / "工数実績240117.csv").write_text(WORKLOG_CSV.format(day="17"), encoding="utf-8")
+
+    Output_H.compact_closed_months("WorkLog")
+    assert Output_H.list_bundled_dates("WorkLog") == ["240115", "240116", "240117"]
+    assert set(Output_H.list_day_paths("WorkLog")) == {"240115", "240116", "240117"}
@@ -0,0 +1,107 @@
+import os
+import sys
+
+import pytest
+
+# プロジェクトのルートパスを取得してPythonパスに追加
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+import services.I_file_transaction as Output_I
+import services.N_timer_scheduler as Output_N
+import services.P_app_startup as Output_P
+
+
+@pytest.fixture
+def data_root(tmp_path):
+    """tmp_path直下にdataフォルダを作成し、カレントディレクトリをtmp_pathに変更する"""
+    root = tmp_path / "data"
+    root.mkdir()
+    (root / "log.csv").write_bytes(b"header\nrow1\n")
+    old_cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield root
+    os.chdir(old_cwd)
+
+
+def test_commit_applies_staged_writes(data_root):
+    log_path = os.path.join("data", "log.csv")
+    task_path = os.path.join("data", "task.csv")
+
+    with Output_I.transaction() as tx:
+        tx.write_text(task_path, "タスク\n")
+        tx.append_bytes(log_path, b"row2\n")
+        # 確定前は実ファイルに反映されず、トランザクション内からは反映後の内容が見えること
+        assert not os.path.exists(task_path)
+        assert tx.read_bytes(log_path) == b"header\nrow1\nrow2\n"
+        tx.truncate_write(log_path, len(b"header\nrow1\n"), b"ROW2\n")
+
+    assert (data_root / "task.csv").read_text(encoding="utf-8") == "タスク\n"
+    assert (data_root / "log.csv").read_bytes() == b"header\nrow1\nROW2\n"
+    assert not os.path.exists(os.path.join("data", Output_I.JOURNAL_NAME))
+
+
+def test_exception_discards_staged_writes(data_root):
+    with pytest.raises(RuntimeError):
+        with Output_I.transaction() as tx:
+            tx.append_bytes(os.path.join("data", "log.csv"), b"row2\n")
+            raise RuntimeError("中断")
+
+    assert (data_root / "log.csv").read_bytes() == b"header\nrow1\n"
+
+
+def test_nested_transaction_commits_with_outer(data_root):
+    log_path = os.path.join("data", "log.csv")
+    with Output_I.transaction() as outer:
+        with Output_I.transaction() as inner:
+            assert inner is outer
+            inner.append_bytes(log_path, b"row2\n")
+        # 内側のブロックを抜けても確定されないこと
+        assert (data_root / "log.csv").read_bytes() == b"header\nrow1\n"
+
+    assert (data_root / "log.csv").read_bytes() == b"header\nrow1\nrow2\n"
+
+
+def test_interrupted_commit_is_replayed(data_root, monkeypatch):
+    # ジャーナル書き出し後、反映前に異常終了した状態を再現する
+    def crash(entries, fsync):
+        raise SystemExit("異常終了")
+
+    monkeypatch.setattr(Output_I, "_apply_entries", crash)
+    with pytest.raises(SystemExit):
+        with Output_I.transaction() as tx:
+            tx.write_text(os.path.join("data", "task.csv"), "タスク\n")
+            tx.append_bytes(os.path.join("data", "log.csv"), b"row2\n")
+    monkeypatch.undo()
+
+    assert os.path.exists(os.path.join("data", Output_I.JOURNAL_NAME))
+    assert (data_root / "log.csv").read_bytes() == b"header\nrow1\n"
+
+    # 次のトランザクション開始時にジャーナルが再実行されること
+    with Output_I.transaction():
+        pass
+    assert (data_root / "task.csv").read_text(encoding="utf-8") == "タスク\n"
+    assert (data_root / "log.csv").read_bytes() == b"header\nrow1\nrow2\n"
+    assert not os.path.exists(os.path.join("data", Output_I.JOURNAL_NAME))
+
+    # 再実行済みのジャーナルを再度実行しても結果が変わらないこと
+    assert Output_I.recover() is False
+
+
+def test_interrupted_commit_is_replayed_on_startup(data_root, monkeypatch):
+    def crash(entries, fsync):
+        raise SystemExit("異常終了")
+
+    monkeypatch.setattr(Output_I, "_apply_entries", crash)
+    with pytest.raises(SystemExit):
+        with Output_I.transaction() as tx:
+            tx.append_bytes(os.path.join("data", "log.csv"), b"row2\n")
+    monkeypatch.undo()
+
+    # 次の書き込みを待たずに、アプリ起動時の処理でジャーナルが再実行されること
+    monkeypatch.setattr(Output_P, "_started", False)
+    monkeypatch.setattr(Output_N, "get_scheduler", lambda: None)
+    assert Output_P.run_startup_tasks()
+    assert (data_root / "log.csv").read_bytes() == b"header\nrow1\nrow2\n"
+    assert not os.path.exists(os.path.join("data", Output_I.JOURNAL_NAME))
+    assert Output_I.recover_on_startup() is False
@@ -0,0 +1,67 @@
+import os
+import sys
+
+import pytest
+
+# プロジェクトのルートパスを取得してPythonパスに追加
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+import models.Task_definition as Task_def
+import services.H_monthly_archive as Output_H
+import services.J_actual_time_reconcile as Output_J
+
+WORKLOG_HEADER = "オーダ番号,オーダ略称,プロジェクト略称,タスクID,サブタスクID,タスク名,サブタスク名,開始時刻,終了時刻\n"
+TASK_CSV = (
+    "タスク\n\nTEST-ORDER\n\n\n\n\n\n\n"
+    "#001,サブ1,60,{actual1},,,True,False,1.0,True\n"
+    "#002,サブ2,60,{actual2},,,True,False,2.0,True\n"
+)
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """2024年1月（月次バンドル）と当日分の工数実績csv、タスクcsvを作成し、カレントディレクトリをtmp_pathに変更する"""
+    worklog_dir = tmp_path / "data" / "WorkLogs"
+    (worklog_dir / "old").mkdir(parents=True)
+    (worklog_dir / "old" / "工数実績240115.csv").write_text(
+        WORKLOG_HEADER
+        + "TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ1,2024-01-15 09:00:00,2024-01-15 09:30:59\n"
+        + "TEST-ORDER,ORD,PJ,MTG-1000,#000,打合せ,,2024-01-15 10:00:00,2024-01-15 11:00:00\n",
+        encoding="utf-8")
+    (worklog_dir / "工数実績240201.csv").write_text(
+        WORKLOG_HEADER
+        + "TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ1,2024-02-01 09:00:00,2024-02-01 09:15:00\n",
+        encoding="utf-8")
+
+    task_dir = tmp_path / "data" / "Project" / "Active"
+    task_dir.mkdir(parents=True)
+    (task_dir / "990001.csv").write_text(TASK_CSV.format(actual1=50, actual2=20), encoding="utf-8")
+
+    old_cwd = os.getcwd()
+    os.chdir(tmp_path)
+    Output_H.compact_closed_months("WorkLog")
+    yield tmp_path
+    os.chdir(old_cwd)
+
+
+def test_aggregate_worklog_minutes_reads_bundles(data_dir):
+    minutes_df = Output_J.aggregate_worklog_minutes()
+    minutes = dict(zip(zip(minutes_df["タスクID"], minutes_df["サブタスクID"]), minutes_df["実績(工数実績)"]))
+
+    # 行ごとに分単位で切り捨ててから合計すること（30分 + 15分）
+    assert minutes[("990001", "#001")] == 45
+    assert minutes[("MTG-1000", "#000")] == 60
+
+
+def test_reconcile_and_fix(data_dir):
+    mismatch_df = Output_J.reconcile_actual_times()
+    assert mismatch_df[["タスクID", "サブタスクID", "差分"]].values.tolist() == [["990001", "#001", 5]]
+
+    # 工数実績のないサブタスクも突合する場合は#002も報告されること
+    assert len(Output_J.reconcile_actual_times(include_unlogged=True)) == 2
+
+    assert Output_J.fix_actual_times(mismatch_df) == 1
+    task = Task_def.read_task_csv(os.path.join("data", "Project", "Active", "990001.csv"))
+    assert task.sub_tasks["actual_time"].tolist() == [45, 20]
+    assert Output_J.reconcile_actual_times().empty
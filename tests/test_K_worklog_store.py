@@ -0,0 +1,85 @@
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+# プロジェクトのルートパスを取得してPythonパスに追加
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+pytest.importorskip("pyarrow")
+
+import services.G_dashboard_aggregation as Output_G
+import services.H_monthly_archive as Output_H
+import services.K_worklog_store as Output_K
+import services.O_worklog_day_cache as Output_O
+
+WORKLOG_CSV = (
+    "オーダ番号,オーダ略称,プロジェクト略称,タスクID,サブタスクID,タスク名,サブタスク名,開始時刻,終了時刻\n"
+    "TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ,2024-01-{day} 09:00:00,2024-01-{day} 09:40:30\n"
+    "TEST-ORDER,ORD,PJ,MTG-1000,#000,打合せ,,2024-01-{day} 10:00:00,2024-01-{day} 10:30:00\n"
+)
+
+
+@pytest.fixture
+def worklog_dir(tmp_path):
+    """2024年1月分の工数実績csvを3日分作成し、カレントディレクトリをtmp_pathに変更する"""
+    worklog_dir = tmp_path / "data" / "WorkLogs"
+    (worklog_dir / "old").mkdir(parents=True)
+    for day in ["15", "16", "17"]:
+        (worklog_dir / "old" / f"工数実績2401{day}.csv").write_text(WORKLOG_CSV.format(day=day), encoding="utf-8")
+    (tmp_path / "data" / "オーダ管理.csv").write_text("TEST-ORDER,PJ,ORD,テスト\n", encoding="utf-8")
+    old_cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield worklog_dir
+    os.chdir(old_cwd)
+
+
+def test_ingest_is_incremental(worklog_dir):
+    assert Output_K.ingest_worklogs() == ["2401"]
+    assert Output_K.ingest_worklogs() == []
+
+    # 月次バンドルに移動した日、内容を修正した日を含む月は取り込み直すこと
+    Output_H.compact_closed_months("WorkLog")
+    assert Output_K.ingest_worklogs() == ["2401"]
+    assert Output_K.ingest_worklogs() == []
+
+
+def test_read_day_matches_csv(worklog_dir):
+    Output_K.ingest_worklogs()
+    path = os.path.join("data", "WorkLogs", "old", "工数実績240116.csv")
+
+    stored = Output_K.read_day(path)
+    expected = Output_H.read_csv(path, parse_dates=["開始時刻", "終了時刻"])
+    expected["タスクID"] = expected["タスクID"].astype(str)
+    pd.testing.assert_frame_equal(stored, expected)
+
+    # 取り込み後にcsvが更新された場合はストアを使わないこと
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ,2024-01-16 11:00:00,2024-01-16 11:10:00\n")
+    assert Output_K.read_day(path) is None
+
+
+def test_read_period_filters_dates(worklog_dir):
+    Output_K.ingest_worklogs()
+    df, dates = Output_K.read_period(datetime(2024, 1, 16), datetime(2024, 1, 16, 23, 59))
+    assert dates == {"240116"}
+    assert set(df["ファイル日付"].astype(str)) == {"2024-01-16"}
+    assert len(df) == 2
+
+
+def test_load_worklogs_in_period_same_with_store(worklog_dir, monkeypatch):
+    start, end = datetime(2024, 1, 1), datetime(2024, 1, 31, 23, 59)
+    # 日別キャッシュを使わずにストアとcsvの読み込みを比べる
+    monkeypatch.setattr(Output_O, "is_available", lambda: False)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Output_K, "is_available", lambda: False)
+        from_csv = Output_G.load_worklogs_in_period(start, end)
+    from_store = Output_G.load_worklogs_in_period(start, end)
+
+    assert os.path.exists(Output_K.MANIFEST_PATH)
+    from_csv["タスクID"] = from_csv["タスクID"].astype(str)
+    pd.testing.assert_frame_equal(from_store, from_csv)
@@ -0,0 +1,175 @@
+import base64
+import os
+import socket
+import socketserver
+import sys
+import threading
+from email.mime.text import MIMEText
+
+import pytest
+
+# プロジェクトのルートパスを取得してPythonパスに追加
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+import services.L_smtp_sender as Output_L
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    """テスト用の最小限のSMTPサーバー（受信したメール本文・接続数・ログインを記録する）"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInSMTPHandler)
+        self.messages = []
+        self.connections = 0
+        self.logins = []
+        # Trueの場合、1通受信するたびに接続を切断する（接続切れからの再接続の確認用）
+        self.drop_after_data = False
+
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str) -> None:
+        self.wfile.write((line + "\r\n").encode("ascii"))
+
+    def handle(self):
+        self.server.connections += 1
+        self._reply("220 localhost stand-in")
+        while True:
+            line = self.rfile.readline().decode("utf-8").rstrip("\r\n")
+            if not line:
+                return
+            command = line.split(" ")[0].upper()
+            if command in ("EHLO", "HELO"):
+                self._reply("250-localhost")
+                self._reply("250 AUTH PLAIN")
+            elif command == "AUTH":
+                credentials = base64.b64decode(line.split(" ")[2]).split(b"\0")
+                self.server.logins.append(credentials[1].decode("utf-8"))
+                self._reply("235 authenticated")
+            elif command == "DATA":
+                self._reply("354 end with .")
+                lines = []
+                while True:
+                    data_line = self.rfile.readline().decode("utf-8").rstrip("\r\n")
+                    if data_line == ".":
+                        break
+                    lines.append(data_line)
+                self.server.messages.append("\n".join(lines))
+                self._reply("250 queued")
+                if self.server.drop_after_data:
+                    return
+            elif command == "QUIT":
+                self._reply("221 bye")
+                return
+            else:
+                self._reply("250 OK")
+
+
+@pytest.fixture
+def smtp_server():
+    server = StandInSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _make_sender(port: int, **kwargs) -> Output_L.BackgroundSMTPSender:
+    return Output_L.BackgroundSMTPSender(
+        "127.0.0.1", port, "user@example.com", "password", use_ssl=False,
+        backoff_seconds=0.01, **kwargs)
+
+
+def _make_msg(body: str) -> MIMEText:
+    msg = MIMEText(body, _subtype="plain", _charset="utf-8")
+    msg["Subject"] = "Timer_boot"
+    msg["From"] = "user@example.com"
+    msg["To"] = "timer@example.com"
+    return msg
+
+
+def test_reuses_authenticated_connection(smtp_server):
+    sender = _make_sender(smtp_server.server_address[1])
+    for minute in (5, 10, 15):
+        assert sender.submit(_make_msg(str(minute)))
+    assert sender.flush(timeout=10)
+    sender.stop(timeout=10)
+
+    assert sender.sent_count == 3
+    assert len(smtp_server.messages) == 3
+    # 1回だけ接続・ログインして使い回すこと
+    assert smtp_server.connections == 1
+    assert smtp_server.logins == ["user@example.com"]
+
+
+def test_reconnects_after_disconnect(smtp_server):
+    smtp_server.drop_after_data = True
+    sender = _make_sender(smtp_server.server_address[1])
+    sender.submit(_make_msg("5"))
+    assert sender.flush(timeout=10)
+    sender.submit(_make_msg("10"))
+    assert sender.flush(timeout=10)
+    sender.stop(timeout=10)
+
+    assert sender.sent_count == 2
+    assert sender.failed_count == 0
+    assert len(smtp_server.messages) == 2
+    assert smtp_server.connections == 2
+
+
+def test_gives_up_after_retries():
+    # 接続を受け付けないポートを確保する
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+
+    sender = _make_sender(port, max_retries=2, timeout_seconds=1.0)
+    sender.submit(_make_msg("5"))
+    assert sender.flush(timeout=10)
+    sender.stop(timeout=10)
+
+    assert sender.sent_count == 0
+    assert sender.failed_count == 1
+    assert isinstance(sender.last_error, OSError)
+
+
+class FakeConnection:
+    """NOOP・QUITの呼び出しを記録する接続"""
+
+    def __init__(self):
+        self.calls = []
+
+    def noop(self):
+        self.calls.append("noop")
+
+    def quit(self):
+        self.calls.append("quit")
+
+    def close(self):
+        self.calls.append("close")
+
+
+def test_idle_connection_is_closed_despite_keepalive(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(Output_L.time, "monotonic", lambda: now[0])
+    sender = Output_L.BackgroundSMTPSender(
+        "127.0.0.1", 0, "user@example.com", "password", use_ssl=False,
+        keepalive_seconds=30.0, idle_timeout_seconds=300.0)
+    connection = FakeConnection()
+    sender._connection = connection
+    sender._last_sent = sender._last_checked = now[0]
+
+    # 送信がない間はNOOP間隔ごとに接続を確認し、確認しても閉じるまでの時間は延びないこと
+    for _ in range(9):
+        now[0] += 30.0
+        sender._keepalive()
+    assert connection.calls == ["noop"] * 9
+    assert sender._connection is connection
+
+    now[0] += 30.0
+    sender._keepalive()
+    assert connection.calls[-1] == "quit"
+    assert sender._connection is None
@@ -0,0 +1,41 @@
+import os
+import sys
+import types
+
+import pytest
+
+# プロジェクトのルートパスを取得してPythonパスに追加
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+import services.M_local_config as Output_M
+
+
+@pytest.fixture
+def config_root(tmp_path, monkeypatch):
+    """設定モジュールを置くdataフォルダをtmp_pathに差し替え、読み込み済みの設定を破棄する"""
+    monkeypatch.setattr(Output_M, "CONFIG_ROOT", str(tmp_path))
+    Output_M.clear_cache()
+    yield tmp_path
+    Output_M.clear_cache()
+
+
+def test_config_is_loaded_lazily_and_cached(config_root):
+    # 設定モジュールがない場合は使用時にImportErrorとなること
+    with pytest.raises(ImportError):
+        Output_M.get_config("upload_path")
+
+    (config_root / "upload_path").mkdir()
+    (config_root / "upload_path" / "my_upload_folder.py").write_text(
+        'my_upload_folder_path = "/tmp/upload"\n', encoding="utf-8")
+    config = Output_M.get_config("upload_path")
+    assert config.my_upload_folder_path == "/tmp/upload"
+    assert Output_M.get_config("upload_path") is config
+
+
+def test_override(config_root):
+    account = types.SimpleNamespace(from_account="a@example.com", to_account="b@example.com", password="pw")
+    with Output_M.override("smtp_account", account):
+        assert Output_M.get_config("smtp_account") is account
+    with pytest.raises(ImportError):
+        Output_M.get_config("smtp_account")
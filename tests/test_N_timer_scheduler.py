@@ -0,0 +1,107 @@
+import json
+import os
+import sys
+import threading
+import types
+from datetime import datetime, timedelta
+
+# プロジェクトのルートパスを取得してPythonパスに追加
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+import services.M_local_config as Output_M
+import services.N_timer_scheduler as Output_N
+import services.P_app_startup as Output_P
+
+
+class RecordingNotifier:
+    """通知されたタイマーIDを記録し、指定数の通知でイベントをセットする"""
+
+    def __init__(self, expected: int):
+        self.timer_ids = []
+        self.expected = expected
+        self.done = threading.Event()
+
+    def __call__(self, timer):
+        self.timer_ids.append(timer["timer_id"])
+        if len(self.timer_ids) >= self.expected:
+            self.done.set()
+
+
+def test_fires_in_end_time_order(tmp_path):
+    notifier = RecordingNotifier(expected=2)
+    scheduler = Output_N.TimerScheduler(notifiers=[notifier], pending_path=str(tmp_path / "pending.json"))
+    now = datetime.now()
+    scheduler.schedule("late", now + timedelta(seconds=0.3))
+    scheduler.schedule("early", now + timedelta(seconds=0.1))
+    scheduler.schedule("cancelled", now + timedelta(seconds=0.05))
+    assert scheduler.cancel("cancelled")
+    # 同じIDで登録し直すと置き換わること
+    scheduler.schedule("late", now + timedelta(seconds=0.2))
+
+    assert notifier.done.wait(5)
+    scheduler.stop(timeout=5)
+    assert notifier.timer_ids == ["early", "late"]
+    assert scheduler.pending() == []
+
+
+def test_pending_timers_survive_restart(tmp_path):
+    pending_path = str(tmp_path / "pending.json")
+    scheduler = Output_N.TimerScheduler(pending_path=pending_path)
+    scheduler.schedule("worklog", datetime.now() + timedelta(seconds=0.2), {"label": "タスク / サブ"})
+    scheduler.stop(timeout=5)
+    with open(pending_path, encoding="utf-8") as f:
+        assert [t["timer_id"] for t in json.load(f)] == ["worklog"]
+
+    # 再起動後は保存済みのタイマーを読み込み、終了時刻にファイル出力で通知すること
+    drop_dir = tmp_path / "notifications"
+    notifier = RecordingNotifier(expected=1)
+    restarted = Output_N.TimerScheduler(
+        notifiers=[Output_N.FileDropNotifier(str(drop_dir)), notifier], pending_path=pending_path)
+    assert notifier.done.wait(5)
+    restarted.stop(timeout=5)
+
+    dropped = os.listdir(drop_dir)
+    assert len(dropped) == 1
+    with open(drop_dir / dropped[0], encoding="utf-8") as f:
+        assert json.load(f)["payload"]["label"] == "タスク / サブ"
+
+
+def test_notifiers_are_built_from_local_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(Output_M, "CONFIG_ROOT", str(tmp_path))
+    Output_M.clear_cache()
+    # 設定がない場合は通知先なし
+    assert Output_N.build_notifiers() == []
+
+    account = types.SimpleNamespace(from_account="a@example.com", to_account="b@example.com", password="pw")
+    notification = types.SimpleNamespace(command=["notify-send", "{label}"], file_drop_folder=str(tmp_path / "drop"))
+    with Output_M.override("smtp_account", account), Output_M.override("timer_notification", notification):
+        notifiers = Output_N.build_notifiers()
+    assert [type(n) for n in notifiers] == [Output_N.EmailNotifier, Output_N.CommandNotifier, Output_N.FileDropNotifier]
+    assert notifiers[1].command == ["notify-send", "{label}"]
+    assert notifiers[2].folder == str(tmp_path / "drop")
+    Output_M.clear_cache()
+
+
+def test_startup_loads_pending_timers(tmp_path, monkeypatch):
+    # 再起動前に保存したタイマー（アプリを操作していない間に終了時刻を迎えるもの）
+    (tmp_path / "data").mkdir()
+    scheduler = Output_N.TimerScheduler(pending_path=str(tmp_path / Output_N.PENDING_PATH))
+    scheduler.schedule("worklog", datetime.now() + timedelta(seconds=0.1))
+    scheduler.stop(timeout=5)
+
+    notifier = RecordingNotifier(expected=1)
+    monkeypatch.setattr(Output_N, "_scheduler", None)
+    monkeypatch.setattr(Output_N, "build_notifiers", lambda: [notifier])
+    monkeypatch.setattr(Output_P, "_started", False)
+    old_cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        # 起動時の処理は1回だけ実行され、次のタイマー開始を待たずに通知されること
+        assert Output_P.run_startup_tasks()
+        assert not Output_P.run_startup_tasks()
+        assert notifier.done.wait(5)
+        assert notifier.timer_ids == ["worklog"]
+    finally:
+        Output_N._scheduler.stop(timeout=5)
+        os.chdir(old_cwd)
@@ -0,0 +1,162 @@
+import os
+import sys
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+# プロジェクトのルートパスを取得してPythonパスに追加
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+pytest.importorskip("pyarrow")
+
+import services.G_dashboard_aggregation as Output_G
+import services.O_worklog_day_cache as Output_O
+
+WORKLOG_CSV = (
+    "オーダ番号,オーダ略称,プロジェクト略称,タスクID,サブタスクID,タスク名,サブタスク名,開始時刻,終了時刻\n"
+    "TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ,2024-01-{day} 09:00:00,2024-01-{day} 09:40:30\n"
+    "TEST-ORDER2,ORD2,PJ,MTG-1000,#000,打合せ,,2024-01-{day} 10:00:00,2024-01-{day} 10:40:00\n"
+)
+START, END = datetime(2024, 1, 1), datetime(2024, 1, 31, 23, 59)
+DAY16 = date(2024, 1, 16)
+
+
+@pytest.fixture
+def worklog_dir(tmp_path, monkeypatch):
+    """2024年1月分の工数実績csvを3日分作成し、カレントディレクトリをtmp_pathに変更する
+
+    日ごとの集計済みフレームの作成回数を built に記録する
+    """
+    worklog_dir = tmp_path / "data" / "WorkLogs"
+    (worklog_dir / "old").mkdir(parents=True)
+    for day in ["15", "16", "17"]:
+        (worklog_dir / "old" / f"工数実績2401{day}.csv").write_text(WORKLOG_CSV.format(day=day), encoding="utf-8")
+    (tmp_path / "data" / "オーダ管理.csv").write_text(
+        "TEST-ORDER,PJ,ORD,テスト\nTEST-ORDER2,PJ,ORD2,テスト2\nZZZ-1050,間接,その他,その他\n", encoding="utf-8")
+
+    built = []
+    build_worklog_day = Output_G._build_worklog_day
+
+    def counting_build(file_date, df, other_abbrs):
+        built.append(file_date.strftime("%y%m%d"))
+        return build_worklog_day(file_date, df, other_abbrs)
+
+    monkeypatch.setattr(Output_G, "_build_worklog_day", counting_build)
+    old_cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield built
+    os.chdir(old_cwd)
+
+
+def test_cached_days_are_not_rebuilt(worklog_dir):
+    built = worklog_dir
+    cold = Output_G.load_worklogs_in_period(START, END)
+    assert built == ["240115", "240116", "240117"]
+    # 工数切り捨て分調整の行（オーダごとに40分 → 30分、日の合計80分 → 75分で15分）を日ごとに先頭に加えること
+    assert cold.loc[cold["タスクID"] == "ZZZ1050", "作業時間(分)"].tolist() == [15, 15, 15]
+    assert cold.loc[0, ["オーダ略称", "プロジェクト略称"]].tolist() == ["その他", "間接"]
+
+    built.clear()
+    warm = Output_G.load_worklogs_in_period(START, END)
+    assert built == []
+    pd.testing.assert_frame_equal(warm, cold)
+
+    # 更新された日のみ作成し直すこと
+    with open(os.path.join("data", "WorkLogs", "old", "工数実績240116.csv"), "a", encoding="utf-8") as f:
+        f.write("TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ,2024-01-16 11:00:00,2024-01-16 11:10:00\n")
+    updated = Output_G.load_worklogs_in_period(START, END)
+    assert built == ["240116"]
+    assert len(updated) == len(cold) + 1
+
+
+def test_order_file_change_rebuilds_all_days(worklog_dir):
+    built = worklog_dir
+    Output_G.load_worklogs_in_period(START, END)
+    built.clear()
+
+    with open(os.path.join("data", "オーダ管理.csv"), "w", encoding="utf-8") as f:
+        f.write("TEST-ORDER,PJ,ORD,テスト\nTEST-ORDER2,PJ,ORD2,テスト2\nZZZ-1050,間接,調整,その他\n")
+    df = Output_G.load_worklogs_in_period(START, END)
+    assert built == ["240115", "240116", "240117"]
+    assert df.loc[df["タスクID"] == "ZZZ1050", "オーダ略称"].unique().tolist() == ["調整"]
+
+
+def test_read_day_rejects_other_key(worklog_dir):
+    Output_G.load_worklogs_in_period(START, END)
+    key = Output_O.make_key(os.path.join("data", "WorkLogs", "old", "工数実績240115.csv"))
+
+    assert Output_O.read_day("240115", key) is not None
+    assert Output_O.read_day("240115", key.replace('"version": 1', '"version": 0')) is None
+    assert Output_O.read_day("240118", key) is None
+
+
+def test_daily_cube_matches_raw_worklogs(worklog_dir):
+    built = worklog_dir
+    with open(os.path.join("data", "WorkLogs", "old", "工数実績240115.csv"), "a", encoding="utf-8") as f:
+        f.write("TEST-ORDER,ORD,PJ,990002,#001,タスク2,サブ,2024-01-15 11:00:00,2024-01-15 11:20:00\n")
+    raw = Output_G.load_worklogs_in_period(START, END)
+    built.clear()
+    cube, errors = Output_G.load_daily_cube(START, END)
+    # 日別キャッシュから集計し、作成し直さないこと
+    assert built == [] and errors == {}
+    assert len(cube) < len(raw)
+
+    # 集計粒度・区分の絞り込みによらず、工数実績から集計した結果と一致すること
+    for granularity in ["daily", "weekly", "monthly"]:
+        for include_mtg in [True, False]:
+            for include_dsc in [True, False]:
+                pd.testing.assert_frame_equal(
+                    Output_G.aggregate_by_order(cube, granularity, include_mtg, include_dsc),
+                    Output_G.aggregate_by_order(raw, granularity, include_mtg, include_dsc))
+    # KPIの合計・直間比率・日数も一致すること
+    assert cube["作業時間(分)"].sum() == raw["作業時間(分)"].sum()
+    indirect = cube.loc[cube["プロジェクト略称"] == "間接", "作業時間(分)"].sum()
+    assert indirect == raw.loc[raw["プロジェクト略称"] == "間接", "作業時間(分)"].sum()
+    assert cube["ファイル日付"].nunique() == raw["ファイル日付"].nunique()
+
+
+def test_daily_cube_updates_only_changed_days(worklog_dir):
+    built = worklog_dir
+    first, _ = Output_G.load_daily_cube(START, END)
+    assert os.path.exists(Output_O.CUBE_PATH)
+
+    # 保存済みのキューブから読み込み、日別キャッシュも読み込まないこと
+    built.clear()
+    os.remove(Output_O._cache_path("240115"))
+    warm, _ = Output_G.load_daily_cube(START, END)
+    assert built == []
+    pd.testing.assert_frame_equal(warm, first)
+
+    with open(os.path.join("data", "WorkLogs", "old", "工数実績240116.csv"), "a", encoding="utf-8") as f:
+        f.write("TEST-ORDER,ORD,PJ,990001,#001,タスク,サブ,2024-01-16 11:00:00,2024-01-16 11:10:00\n")
+    updated, _ = Output_G.load_daily_cube(START, END)
+    assert built == ["240116"]
+    day16 = updated[updated["ファイル日付"] == DAY16]
+    assert day16["作業時間(分)"].sum() == first[first["ファイル日付"] == DAY16]["作業時間(分)"].sum() + 10
+    pd.testing.assert_frame_equal(
+        updated[updated["ファイル日付"] != DAY16].reset_index(drop=True),
+        first[first["ファイル日付"] != DAY16].reset_index(drop=True))
+
+
+def test_concurrent_writes_keep_a_complete_file(worklog_dir):
+    from concurrent.futures import ThreadPoolExecutor
+
+    df = Output_G.load_worklogs_in_period(START, END)
+    day = df[df["ファイル日付"] == date(2024, 1, 15)][Output_O.COLUMNS].reset_index(drop=True)
+    key = Output_O.make_key(os.path.join("data", "WorkLogs", "old", "工数実績240115.csv"))
+
+    # 複数のセッションが同時に同じ日・キューブを保存しても、壊れたファイルや一時ファイルが残らないこと
+    def write(n):
+        Output_O.write_day("240115", key, day.assign(**{"作業時間(分)": day["作業時間(分)"] + n}))
+        Output_O.write_cube(Output_G._build_cube_rows(day), {"240115": key})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(32)))
+
+    cached = Output_O.read_day("240115", key)
+    assert cached is not None and len(cached) == len(day)
+    cube, fresh = Output_O.read_cube({"240115": key})
+    assert fresh == {"240115"} and cube["作業時間(分)"].sum() == day["作業時間(分)"].sum()
+    assert [f for f in os.listdir(Output_O.CACHE_DIR) if f.endswith(".tmp")] == []
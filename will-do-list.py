@@ -13,6 +13,12 @@ import services.B_WillDo_create as Output_B
 import services.C_WorkLog_record as Output_C
 from sidebar import task_view
 
+# 表示しない内部管理用の列（残時間/日の再計算判定に使用）
+HIDDEN_COLUMNS = [
+    Task_def.WillDoEntry.attr_map("source_version"),
+    Task_def.WillDoEntry.attr_map("computed_date"),
+]
+
 
 def WillDo_display_settings(
         df: pd.DataFrame, use_filter: bool) -> st_aggrid.AgGrid:
@@ -46,6 +52,9 @@ def WillDo_display_settings(
         # タスクID列なら太字表示
         if col == "タスクID":
             col_def["cellStyle"] = {"fontWeight": "bold"}
+        # 再計算管理用の列は非表示
+        if col in HIDDEN_COLUMNS:
+            col_def["hide"] = True
         columnDefs.append(col_def)
 
     # 行スタイル設定（状態列が「今」の行は背景色変更）
@@ -195,6 +204,50 @@ def has_dataframe_changed(edited_df: pd.DataFrame, original_df: pd.DataFrame) ->
     return False
 
 
+def extract_status_change_events(
+        edited_df: pd.DataFrame, original_df: pd.DataFrame) -> list[dict] | None:
+    """編集前後のDataFrameから「状態」列の変更を状態変更イベントとして抽出する
+
+    Args:
+        edited_df: 編集後のDataFrame
+        original_df: 元のDataFrame
+
+    Returns:
+        list[dict] | None: 状態変更イベントのリスト（変更がなければ空リスト）。
+                           状態列以外にも差分がある場合や、変更した行のタスクID・サブIDが
+                           他の行と重複する場合（会議の行など）はNone（csv全体の保存が必要）。
+    """
+    if edited_df.shape != original_df.shape:
+        return None
+    if list(edited_df.columns) != list(original_df.columns):
+        return None
+    other_cols = [c for c in edited_df.columns if c != "状態"]
+    if has_dataframe_changed(edited_df[other_cols], original_df[other_cols]):
+        return None
+
+    old_status = original_df["状態"].fillna("").astype(str).to_numpy()
+    new_status = edited_df["状態"].fillna("").astype(str).to_numpy()
+    changed_rows = (old_status != new_status).nonzero()[0]
+    # イベントはタスクID・サブIDで行を特定するため、重複するキーの行の変更はcsv全体で保存する
+    row_keys = Output_B.get_WillDo_row_keys(edited_df)
+    if row_keys.iloc[changed_rows].isin(row_keys[row_keys.duplicated()]).any():
+        return None
+
+    recorded_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    events = []
+    for i in changed_rows:
+        row = edited_df.iloc[i]
+        events.append({
+            "記録時刻": recorded_at,
+            "タスクID": str(row["タスクID"]),
+            "サブID": "" if pd.isna(row["サブID"]) else str(row["サブID"]),
+            "項目": "状態",
+            "変更前": old_status[i],
+            "変更後": new_status[i],
+        })
+    return events
+
+
 def find_task_csv_path(task_id: str) -> str | None:
     """タスクIDに対応するCSVファイルのパスをDaily/Active・Project/Activeから検索して返す。
 
@@ -256,6 +309,13 @@ if __name__ == "__main__":
     willdo_file = _willdo_main if os.path.exists(_willdo_main) else _willdo_old
     if os.path.exists(willdo_file):
         df_today = load_willdo_csv(willdo_file)
+        # 未反映の状態変更イベントを適用（csvへの反映は日替わり時などにまとめて行う）
+        df_today = Output_B.apply_WillDo_status_events(
+            df_today, Output_B.read_WillDo_status_events(selected_str))
+        # 算出元タスクcsvが更新された行・日付が変わった行のみ残時間/日と直近〆切を再計算
+        df_today, refreshed_count = Output_B.refresh_WillDo_entries(df_today)
+        if refreshed_count > 0:
+            df_today.to_csv(willdo_file, index=False, encoding="utf-8-sig")
         # 表示用に並べ替え: 残時間/日降順・完了系を末尾へ
         df_today = sort_willdo_for_display(df_today)
 
@@ -266,9 +326,15 @@ if __name__ == "__main__":
         aggrid_ret = WillDo_display_settings(df_today, use_filter=False)
 
         # 差分があれば自動保存（streamlit-aggrid v1.x対応）
+        # 状態列のみの変更はイベントログへの追記で済ませ、それ以外の変更はcsv全体を保存する
         edited_df = get_edited_dataframe(aggrid_ret, df_original)
-        if has_dataframe_changed(edited_df, df_original):
+        status_events = extract_status_change_events(edited_df, df_original)
+        if status_events is not None:
+            Output_B.append_WillDo_status_events(selected_str, status_events)
+        elif has_dataframe_changed(edited_df, df_original):
             edited_df.to_csv(willdo_file, index=False, encoding="utf-8-sig")
+            # edited_dfには未反映のイベントを適用済みのため、csvには再適用せずに反映済みログに移す
+            Output_B.fold_WillDo_status_events(selected_str, apply_events=False)
 
         # 状態列が"今"の行数を取得し、行数に応じた処理をするための準備
         now_count = edited_df[edited_df["状態"] == "今"].shape[0]